@@ -1,12 +1,27 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, g, abort, send_file
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase
 import datetime
 import uuid
 import json
-from scanner import Scanner
+import click
+from urllib.parse import urlencode
+from storage import compact_results, upgrade_schema
+from scope import is_valid_target, within_size_limit, MAX_TARGET_ADDRESSES
+from policy import tool_policy
+from ratelimit import rate_limiter
+from singleflight import tool_runs
+from inventory import find_assets, scans_for_asset, rebuild_inventory, backfill_asset_tools
+from search import ensure_search_index, search_results, rebuild_search_index
+from exports import get_export, not_modified, export_response
+from summary import get_summary, get_summaries
+from archive import RETENTION_DAYS, scan_results, archive_scans, rehydrate_scan, query_archive
+from profiling import profiler, profiling_allowed, sign_profile_link, profile_link_valid
+from schedules import Scheduler, create_schedule, update_schedule, upcoming_runs, SCHEDULER_INTERVAL
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -33,11 +48,60 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # Initialize the app with the extension
 db.init_app(app)
 
-# Import models after db initialization to avoid circular imports
-from models import Scan, ScanResult
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Let several worker processes share the SQLite database."""
+    if 'sqlite' in type(dbapi_connection).__module__:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+# Import models and the scanner after db initialization to avoid circular imports
+from models import Scan, ScanResult, ScheduledScan
+from scanner import Scanner
 
-# Initialize scanner
+# Initialize scanner and the scheduler of recurring scans, started by main.py and asgi.py
 scanner = Scanner()
+scheduler = Scheduler(scanner)
+
+def profile_trigger():
+    """Get the profiling trigger of the current request, from the X-Profile header or profile form field."""
+    # Never from the query string, where the token would end up in logs, history and Referer headers
+    return request.headers.get('X-Profile') or request.form.get('profile')
+
+def scope_from_form():
+    """Get the extra scope entries of a form, one per line or comma separated."""
+    return {
+        'include': [entry.strip() for entry in request.form.get('scope', '').replace(',', '\n').splitlines() if entry.strip()],
+        'exclude': [entry.strip() for entry in request.form.get('exclude', '').replace(',', '\n').splitlines() if entry.strip()]
+    }
+
+@app.before_request
+def start_request_profile():
+    """Profile the request when it carries a valid profiling trigger."""
+    # Scans are profiled on their own thread, and profiles are not profiled
+    if request.endpoint in ('start_scan', 'static') or request.path.startswith('/profiles'):
+        return
+    if profiling_allowed(profile_trigger()):
+        g.profile = profiler.start('request', f"{request.method} {request.path}")
+
+@app.after_request
+def finish_request_profile(response):
+    """Write the request profile and point the client to it."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        name = profiler.stop(profile)
+        if name:
+            response.headers['X-Profile-Id'] = name
+    return response
+
+@app.teardown_request
+def abort_request_profile(exception):
+    """Stop the request profile when the request failed before after_request."""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile)
 
 @app.route('/')
 def index():
@@ -56,6 +120,21 @@ def start_scan():
             
         if not selected_tools:
             return jsonify({'status': 'error', 'message': 'At least one tool must be selected'}), 400
+            
+        if not is_valid_target(target):
+            return jsonify({'status': 'error', 'message': f'Invalid target: {target}'}), 400
+            
+        if not within_size_limit(target):
+            return jsonify({'status': 'error', 'message': f'Target is larger than {MAX_TARGET_ADDRESSES} addresses'}), 400
+            
+        if scanner.stopping:
+            return jsonify({'status': 'error', 'message': 'Server is shutting down, try again shortly'}), 503
+            
+        # Optional extra scope entries
+        scope = scope_from_form()
+        invalid = [entry for entry in scope['include'] + scope['exclude'] if not is_valid_target(entry)]
+        if invalid:
+            return jsonify({'status': 'error', 'message': f'Invalid scope entries: {", ".join(invalid)}'}), 400
         
         # Generate a unique scan ID
         scan_id = str(uuid.uuid4())
@@ -65,6 +144,7 @@ def start_scan():
             id=scan_id,
             target=target,
             tools=json.dumps(selected_tools),
+            scope=json.dumps(scope),
             status="running",
             start_time=datetime.datetime.utcnow()
         )
@@ -72,7 +152,8 @@ def start_scan():
         db.session.commit()
         
         # Start the scan process asynchronously
-        scanner.start_scan_async(scan_id, target, selected_tools)
+        scanner.start_scan_async(scan_id, target, selected_tools, scope,
+                                 profile=profiling_allowed(profile_trigger()))
         
         return jsonify({
             'status': 'success', 
@@ -99,7 +180,8 @@ def scan_status(scan_id):
                 'scan_status': scan.status,
                 'start_time': scan.start_time.isoformat() if scan.start_time else None,
                 'end_time': scan.end_time.isoformat() if scan.end_time else None,
-                'progress': scan.progress or 0
+                'progress': scan.progress or 0,
+                'stages': scanner.active_scans.get(scan_id, {}).get('stages', {})
             }
         })
         
@@ -107,6 +189,42 @@ def scan_status(scan_id):
         logger.error(f"Error getting scan status: {str(e)}")
         return jsonify({'status': 'error', 'message': f'Error getting scan status: {str(e)}'}), 500
 
+@app.route('/scan_summary/<scan_id>')
+def scan_summary(scan_id):
+    """Get the statistics of a specific scan without loading its results."""
+    try:
+        summary = get_summary(db.session, scan_id)
+        
+        if summary is None:
+            return jsonify({'status': 'error', 'message': 'Scan not found'}), 404
+            
+        return jsonify({
+            'status': 'success',
+            'data': summary
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting scan summary: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error getting scan summary: {str(e)}'}), 500
+
+@app.route('/api/scan_summaries')
+def scan_summaries():
+    """Get the statistics of several scans, e.g. every scan on the history page."""
+    try:
+        scan_ids = request.args.getlist('scan_id')[:200]
+        
+        if not scan_ids:
+            return jsonify({'status': 'error', 'message': 'At least one scan_id is required'}), 400
+            
+        return jsonify({
+            'status': 'success',
+            'data': get_summaries(db.session, scan_ids)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting scan summaries: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error getting scan summaries: {str(e)}'}), 500
+
 @app.route('/results/<scan_id>')
 def results(scan_id):
     """Show results for a specific scan."""
@@ -118,24 +236,43 @@ def results(scan_id):
         
     return render_template('results.html', scan=scan)
 
+def cached_export(scan_id, format):
+    """
+    Serve the materialized export of a completed scan.
+    
+    Args:
+        scan_id: Unique scan identifier
+        format: Export format (results, json, csv)
+        
+    Returns:
+        Response tuple, or None if the scan has no export
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    accept_encoding = request.headers.get('Accept-Encoding')
+    
+    response = not_modified(scan_id, format, if_none_match, accept_encoding)
+    if response is None:
+        scan = db.session.get(Scan, scan_id)
+        export = get_export(db.session, scan, format) if scan else None
+        if export is None:
+            return None
+        response = export_response(export, if_none_match, accept_encoding)
+    return response
+
 @app.route('/get_results/<scan_id>')
 def get_results(scan_id):
     """Get all results for a specific scan."""
     try:
-        results = ScanResult.query.filter_by(scan_id=scan_id).all()
-        
-        results_data = []
-        for result in results:
-            results_data.append({
-                'tool': result.tool,
-                'result_type': result.result_type,
-                'data': json.loads(result.data),
-                'created_at': result.created_at.isoformat()
-            })
+        response = cached_export(scan_id, 'results')
+        if response is not None:
+            return response
             
+        scan = db.session.get(Scan, scan_id)
+        results = scan_results(db.session, scan) if scan else []
+        
         return jsonify({
             'status': 'success',
-            'data': results_data
+            'data': [result.to_dict() for result in results]
         })
         
     except Exception as e:
@@ -148,6 +285,125 @@ def history():
     scans = Scan.query.order_by(Scan.start_time.desc()).all()
     return render_template('history.html', scans=scans)
 
+@app.route('/api/assets')
+def list_assets():
+    """Query the asset inventory across all scans."""
+    try:
+        port = request.args.get('port', type=int)
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        offset = request.args.get('offset', 0, type=int)
+        
+        assets = find_assets(
+            db.session,
+            kind=request.args.get('kind'),
+            value=request.args.get('value'),
+            domain=request.args.get('domain'),
+            port=port,
+            service=request.args.get('service'),
+            tool=request.args.get('tool'),
+            limit=limit,
+            offset=offset
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'data': [asset.to_dict() for asset in assets]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error querying assets: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error querying assets: {str(e)}'}), 500
+
+@app.route('/api/assets/scans')
+def asset_scans():
+    """Get every scan that found a specific asset."""
+    try:
+        kind = request.args.get('kind', '').strip()
+        value = request.args.get('value', '').strip()
+        
+        if not kind or not value:
+            return jsonify({'status': 'error', 'message': 'Asset kind and value are required'}), 400
+            
+        sightings = scans_for_asset(db.session, kind, value)
+        
+        return jsonify({
+            'status': 'success',
+            'data': [{
+                'scan_id': scan.id,
+                'target': scan.target,
+                'status': scan.status,
+                'start_time': scan.start_time.isoformat() if scan.start_time else None,
+                'seen_at': seen_at.isoformat() if seen_at else None
+            } for scan, seen_at in sightings]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting asset scans: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error getting asset scans: {str(e)}'}), 500
+
+@app.route('/search')
+def search():
+    """Show the full-text search page."""
+    return render_template('search.html')
+
+@app.route('/api/search')
+def api_search():
+    """Search result values across all scans."""
+    try:
+        query = request.args.get('q', '').strip()
+        
+        if not query:
+            return jsonify({'status': 'error', 'message': 'Search query is required'}), 400
+            
+        hits = search_results(
+            db.session,
+            query,
+            tool=request.args.get('tool'),
+            result_type=request.args.get('result_type'),
+            target=request.args.get('target'),
+            scan_id=request.args.get('scan_id'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=min(request.args.get('limit', 50, type=int), 500),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'data': hits
+        })
+        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+    except Exception as e:
+        logger.error(f"Error searching results: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error searching results: {str(e)}'}), 500
+
+@app.route('/api/tool_timeouts')
+def tool_timeouts():
+    """Get the adaptive timeout currently used for each tool."""
+    return jsonify({
+        'status': 'success',
+        'data': tool_policy.stats()
+    })
+
+@app.route('/api/rate_limits')
+def rate_limits():
+    """Get the state of the shared rate limiter buckets."""
+    return jsonify({
+        'status': 'success',
+        'data': rate_limiter.state()
+    })
+
+@app.route('/api/tool_runs')
+def tool_runs_in_flight():
+    """Get the tool runs in flight and how many scans share each of them."""
+    return jsonify({
+        'status': 'success',
+        'data': tool_runs.state()
+    })
+
 @app.route('/download_results/<scan_id>/<format>')
 def download_results(scan_id, format):
     """Download scan results in the specified format."""
@@ -156,31 +412,22 @@ def download_results(scan_id, format):
     from io import StringIO
     
     try:
+        if format in ('json', 'csv'):
+            response = cached_export(scan_id, format)
+            if response is not None:
+                return response
+        
         scan = Scan.query.filter_by(id=scan_id).first()
         
         if not scan:
             return jsonify({'status': 'error', 'message': 'Scan not found'}), 404
             
-        results = ScanResult.query.filter_by(scan_id=scan_id).all()
+        results = scan_results(db.session, scan)
         
         if format == 'json':
-            results_data = []
-            for result in results:
-                results_data.append({
-                    'tool': result.tool,
-                    'result_type': result.result_type,
-                    'data': json.loads(result.data),
-                    'created_at': result.created_at.isoformat()
-                })
-                
             return jsonify({
-                'scan_id': scan.id,
-                'target': scan.target,
-                'tools': json.loads(scan.tools),
-                'status': scan.status,
-                'start_time': scan.start_time.isoformat() if scan.start_time else None,
-                'end_time': scan.end_time.isoformat() if scan.end_time else None,
-                'results': results_data
+                **scan.to_dict(),
+                'results': [result.to_dict() for result in results]
             })
             
         elif format == 'csv':
@@ -193,19 +440,7 @@ def download_results(scan_id, format):
             
             # Write data
             for result in results:
-                data = json.loads(result.data)
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, dict):
-                            for key, value in item.items():
-                                writer.writerow([result.tool, result.result_type, f"{key}: {value}", result.created_at])
-                        else:
-                            writer.writerow([result.tool, result.result_type, item, result.created_at])
-                elif isinstance(data, dict):
-                    for key, value in data.items():
-                        writer.writerow([result.tool, result.result_type, f"{key}: {value}", result.created_at])
-                else:
-                    writer.writerow([result.tool, result.result_type, data, result.created_at])
+                writer.writerows(result.csv_rows())
                     
             response = Response(output.getvalue(), mimetype='text/csv')
             response.headers["Content-Disposition"] = f"attachment; filename=recon_results_{scan_id}.csv"
@@ -217,6 +452,253 @@ def download_results(scan_id, format):
         logger.error(f"Error downloading results: {str(e)}")
         return jsonify({'status': 'error', 'message': f'Error downloading results: {str(e)}'}), 500
 
-# Create tables
-with app.app_context():
+@app.route('/api/archive')
+def archive_query():
+    """Query archived results without rehydrating their scans."""
+    try:
+        hits = query_archive(
+            target=request.args.get('target'),
+            month=request.args.get('month'),
+            scan_id=request.args.get('scan_id'),
+            tool=request.args.get('tool'),
+            result_type=request.args.get('result_type'),
+            limit=min(request.args.get('limit', 100, type=int), 1000)
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'data': hits
+        })
+        
+    except RuntimeError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+        
+    except Exception as e:
+        logger.error(f"Error querying archive: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error querying archive: {str(e)}'}), 500
+
+@app.route('/rehydrate_scan/<scan_id>', methods=['POST'])
+def rehydrate(scan_id):
+    """Move the results of an archived scan back into the database."""
+    try:
+        scan = db.session.get(Scan, scan_id)
+        
+        if not scan:
+            return jsonify({'status': 'error', 'message': 'Scan not found'}), 404
+            
+        restored = rehydrate_scan(db.session, scan)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Restored {restored} results'
+        })
+        
+    except RuntimeError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+        
+    except Exception as e:
+        logger.error(f"Error rehydrating scan: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error rehydrating scan: {str(e)}'}), 500
+
+@app.route('/api/schedules', methods=['GET', 'POST'])
+def schedules():
+    """List recurring scans, or create one from target, tools, interval, jitter and overlap fields."""
+    try:
+        if request.method == 'GET':
+            return jsonify({
+                'status': 'success',
+                'data': [schedule.to_dict() for schedule in ScheduledScan.query.order_by(ScheduledScan.next_run_at).all()]
+            })
+        
+        schedule = create_schedule(
+            db.session,
+            target=request.form.get('target', ''),
+            tools=request.form.getlist('tools'),
+            interval=request.form.get('interval', 0, type=int),
+            scope=scope_from_form(),
+            jitter=request.form.get('jitter', None, type=int),
+            overlap=request.form.get('overlap', 'defer')
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Schedule created successfully',
+            'data': schedule.to_dict()
+        })
+        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+    except Exception as e:
+        logger.error(f"Error handling schedules: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error handling schedules: {str(e)}'}), 500
+
+@app.route('/api/schedules/<int:schedule_id>', methods=['GET', 'POST', 'DELETE'])
+def schedule_detail(schedule_id):
+    """Get, update (tools, interval, jitter, overlap, enabled) or delete a recurring scan."""
+    try:
+        schedule = db.session.get(ScheduledScan, schedule_id)
+        
+        if not schedule:
+            return jsonify({'status': 'error', 'message': 'Schedule not found'}), 404
+        
+        if request.method == 'DELETE':
+            db.session.delete(schedule)
+            db.session.commit()
+            return jsonify({'status': 'success', 'message': 'Schedule deleted'})
+        
+        if request.method == 'POST':
+            form = request.form
+            update_schedule(
+                db.session,
+                schedule,
+                tools=[tool for tool in form.getlist('tools') if tool] if 'tools' in form else None,
+                interval=form.get('interval', -1, type=int) if 'interval' in form else None,
+                jitter=form.get('jitter', -1, type=int) if 'jitter' in form else None,
+                overlap=form.get('overlap') if 'overlap' in form else None,
+                enabled=form['enabled'].lower() in ('1', 'true', 'yes', 'on') if 'enabled' in form else None
+            )
+        
+        return jsonify({
+            'status': 'success',
+            'data': schedule.to_dict()
+        })
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error handling schedule {schedule_id}: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error handling schedule: {str(e)}'}), 500
+
+@app.route('/api/schedules/upcoming')
+def upcoming_schedule_runs():
+    """List the scheduled runs of the next hours, so gaps and clusters are visible."""
+    try:
+        return jsonify({
+            'status': 'success',
+            'data': upcoming_runs(
+                db.session,
+                hours=min(request.args.get('hours', 24, type=float), 24 * 7),
+                limit=min(request.args.get('limit', 100, type=int), 1000)
+            )
+        })
+        
+    except Exception as e:
+        logger.error(f"Error listing upcoming runs: {str(e)}")
+        return jsonify({'status': 'error', 'message': f'Error listing upcoming runs: {str(e)}'}), 500
+
+def profile_access_allowed(name):
+    """Check whether the request may read a profile, by profiling trigger or signed link."""
+    return profiling_allowed(profile_trigger()) or \
+        profile_link_valid(name, request.args.get('expires'), request.args.get('signature'))
+
+@app.route('/profiles', methods=['GET', 'POST'])
+def profiles():
+    """List stored request and scan profiles, linking to each with a short-lived signed link."""
+    if not profiling_allowed(profile_trigger()):
+        abort(404)
+    listed = profiler.list_profiles()
+    for profile in listed:
+        profile['link'] = urlencode(sign_profile_link(profile['name']))
+    return render_template('profiles.html', profiles=listed)
+
+@app.route('/profiles/<name>')
+def profile_stats(name):
+    """Show a stored profile as pstats text."""
+    from flask import Response
+    
+    if not profile_access_allowed(name):
+        abort(404)
+    try:
+        text = profiler.stats_text(name, sort=request.args.get('sort', 'cumulative'))
+    except (ValueError, KeyError, OSError):
+        abort(404)
+    return Response(text, mimetype='text/plain')
+
+@app.route('/profiles/<name>/download')
+def download_profile(name):
+    """Download a stored profile for snakeviz, pstats or similar tools."""
+    if not profile_access_allowed(name):
+        abort(404)
+    try:
+        path = os.path.abspath(profiler.path(name))
+    except ValueError:
+        abort(404)
+    if not os.path.exists(path):
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f"{name}.prof")
+
+@app.cli.command('archive-scans')
+@click.option('--older-than', default=RETENTION_DAYS, show_default=True, help='Minimum scan age in days.')
+@click.option('--limit', default=None, type=int, help='Maximum number of scans to archive.')
+@click.option('--no-vacuum', is_flag=True, help='Skip VACUUM after archiving.')
+def archive_scans_command(older_than, limit, no_vacuum):
+    """Move finished scans older than the retention period into the Parquet archive."""
+    stats = archive_scans(db.session, older_than_days=older_than, limit=limit, vacuum=not no_vacuum)
+    click.echo(
+        f"Archived {stats['scans_archived']} scans ({stats['results_archived']} results), "
+        f"{stats['scans_failed']} failed, deleted {stats['blobs_deleted']} unused blobs"
+    )
+
+@app.cli.command('rehydrate-scan')
+@click.argument('scan_id')
+def rehydrate_scan_command(scan_id):
+    """Move the results of an archived scan back into the database."""
+    scan = db.session.get(Scan, scan_id)
+    if not scan:
+        raise click.ClickException(f"Scan {scan_id} not found")
+    restored = rehydrate_scan(db.session, scan)
+    click.echo(f"Restored {restored} results")
+
+@app.cli.command('run-schedules')
+def run_schedules_command():
+    """Start the scheduled scans that are due now and wait for them to finish."""
+    started = scheduler.run_due()
+    click.echo(f"Started {len(started)} scheduled scans")
+    # Keep sending heartbeats so schedulers elsewhere see these scans as running
+    for scan in list(scanner.active_scans.values()):
+        while scan['thread'].is_alive():
+            scanner.heartbeat()
+            scan['thread'].join(SCHEDULER_INTERVAL)
+
+@app.cli.command('compact-results')
+@click.option('--batch-size', default=500, show_default=True, help='Rows rewritten per commit.')
+@click.option('--no-vacuum', is_flag=True, help='Skip VACUUM after compaction.')
+def compact_results_command(batch_size, no_vacuum):
+    """Compress large stored results and deduplicate them by content hash."""
+    stats = compact_results(db.session, batch_size=batch_size, vacuum=not no_vacuum)
+    click.echo(
+        f"Rewrote {stats['rows_rewritten']} results ({stats['bytes_before']} bytes inline), "
+        f"deleted {stats['blobs_deleted']} unused blobs"
+    )
+
+@app.cli.command('rebuild-inventory')
+@click.option('--batch-size', default=200, show_default=True, help='Results indexed per commit.')
+def rebuild_inventory_command(batch_size):
+    """Rebuild the asset inventory from all stored results."""
+    processed = rebuild_inventory(db.session, batch_size=batch_size)
+    click.echo(f"Indexed {processed} results")
+
+@app.cli.command('rebuild-search-index')
+@click.option('--batch-size', default=200, show_default=True, help='Results indexed per commit.')
+def rebuild_search_index_command(batch_size):
+    """Rebuild the full-text search index from all stored results."""
+    processed = rebuild_search_index(db.session, batch_size=batch_size)
+    click.echo(f"Indexed {processed} results")
+
+def init_db() -> None:
+    """Create missing tables, upgrade the schema and backfill derived tables."""
     db.create_all()
+    upgrade_schema(db.engine)
+    ensure_search_index(db.engine)
+    backfill_asset_tools(db.session)
+
+# Create tables; serve.py does this once before starting its worker processes
+# and sets SCHEMA_READY, so workers importing the app do not race on the migration
+with app.app_context():
+    if os.environ.get("SCHEMA_READY") != "1":
+        init_db()
+    tool_policy.load(db.session)
@@ -0,0 +1,372 @@
+import os
+import re
+import json
+import logging
+import datetime
+import tempfile
+from typing import Any, Dict, List, Optional
+
+# pyarrow is optional; only archiving and reading archived scans need it
+try:
+    import pyarrow
+    import pyarrow.dataset
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from storage import store_result_data, delete_unused_blobs, vacuum_database
+from search import index_result, remove_scan
+from exports import etag_cache
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Root of the archive, partitioned as target=<target>/month=<YYYY-MM>/<scan_id>.parquet
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
+
+# Finished scans older than this are moved out of the database
+RETENTION_DAYS = int(os.environ.get("RETENTION_DAYS", 90))
+
+ARCHIVE_COMPRESSION = os.environ.get("ARCHIVE_COMPRESSION", "zstd")
+
+
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required to read and write the scan archive")
+
+
+def _schema():
+    return pyarrow.schema([
+        ('result_id', pyarrow.int64()),
+        ('scan_id', pyarrow.string()),
+        ('tool', pyarrow.string()),
+        ('result_type', pyarrow.string()),
+        ('data', pyarrow.large_string()),  # JSON encoded result data
+        ('created_at', pyarrow.timestamp('us')),
+    ])
+
+
+def _partitioning():
+    return pyarrow.dataset.partitioning(
+        pyarrow.schema([('target', pyarrow.string()), ('month', pyarrow.string())]),
+        flavor='hive'
+    )
+
+
+def partition_name(target: str) -> str:
+    """
+    Make a target usable as a partition directory name.
+
+    Args:
+        target: Scan target, e.g. example.com or 10.0.0.0/24
+
+    Returns:
+        str: Filesystem safe name, e.g. 10.0.0.0_24
+    """
+    return re.sub(r'[^a-z0-9._-]', '_', target.strip().lower())
+
+
+def partition_path(scan) -> str:
+    """
+    Get the archive file of a scan relative to ARCHIVE_DIR.
+
+    Args:
+        scan: Scan instance
+
+    Returns:
+        str: Relative path
+    """
+    month = (scan.start_time or datetime.datetime.utcnow()).strftime('%Y-%m')
+    return os.path.join(f"target={partition_name(scan.target)}", f"month={month}", f"{scan.id}.parquet")
+
+
+def write_archive(scan, results: List[Any]) -> str:
+    """
+    Write the results of a scan to its archive file.
+
+    The file is written under a temporary name and renamed into place once
+    its row count has been checked, so readers never see partial files.
+
+    Args:
+        scan: Scan instance
+        results: ScanResult instances of the scan
+
+    Returns:
+        str: Archive path relative to ARCHIVE_DIR
+    """
+    _require_pyarrow()
+
+    relative = partition_path(scan)
+    path = os.path.join(ARCHIVE_DIR, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pyarrow.Table.from_pylist([{
+        'result_id': result.id,
+        'scan_id': result.scan_id,
+        'tool': result.tool,
+        'result_type': result.result_type,
+        'data': json.dumps(result.payload),
+        'created_at': result.created_at
+    } for result in results], schema=_schema())
+
+    # Dot-prefixed files are skipped by dataset scans
+    fd, temporary = tempfile.mkstemp(prefix='.', suffix='.parquet', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        pyarrow.parquet.write_table(table, temporary, compression=ARCHIVE_COMPRESSION)
+        written = pyarrow.parquet.read_metadata(temporary).num_rows
+        if written != len(results):
+            raise IOError(f"Archive of scan {scan.id} has {written} rows, expected {len(results)}")
+        os.replace(temporary, path)
+    except Exception:
+        os.remove(temporary)
+        raise
+
+    return relative
+
+
+def load_archived_results(scan) -> List[Any]:
+    """
+    Read the results of an archived scan.
+
+    Args:
+        scan: Archived Scan instance
+
+    Returns:
+        list: Detached ScanResult instances, in their original order
+    """
+    from models import ScanResult
+
+    _require_pyarrow()
+
+    table = pyarrow.parquet.read_table(os.path.join(ARCHIVE_DIR, scan.archive_path))
+    rows = sorted(table.to_pylist(), key=lambda row: row['result_id'])
+
+    return [ScanResult(
+        scan_id=row['scan_id'],
+        tool=row['tool'],
+        result_type=row['result_type'],
+        data=row['data'],
+        blob_hash=None,
+        created_at=row['created_at']
+    ) for row in rows]
+
+
+def scan_results(session, scan) -> List[Any]:
+    """
+    Get the results of a scan, whether it is archived or not.
+
+    Args:
+        session: SQLAlchemy session
+        scan: Scan instance
+
+    Returns:
+        list: ScanResult instances in insertion order
+    """
+    from models import ScanResult
+
+    if scan.archived_at is not None:
+        return load_archived_results(scan)
+
+    return (
+        session.query(ScanResult)
+        .filter_by(scan_id=scan.id)
+        .order_by(ScanResult.id)
+        .all()
+    )
+
+
+def archive_scan(session, scan) -> int:
+    """
+    Move the results of a finished scan into the archive, keeping the Scan row as a stub.
+
+    The summary, asset sightings and the Scan row stay in the database;
+    results, materialized exports and search index rows are removed.
+
+    Args:
+        session: SQLAlchemy session
+        scan: Finished Scan instance
+
+    Returns:
+        int: Number of archived results
+    """
+    from models import ScanExport, ScanResult
+    from summary import get_summary
+
+    # The summary is computed from results, so make sure it exists first
+    get_summary(session, scan.id)
+
+    results = scan_results(session, scan)
+    relative = write_archive(scan, results)
+
+    try:
+        remove_scan(session, scan.id)
+        session.query(ScanExport).filter_by(scan_id=scan.id).delete(synchronize_session=False)
+        session.query(ScanResult).filter_by(scan_id=scan.id).delete(synchronize_session=False)
+        scan.archived_at = datetime.datetime.utcnow()
+        scan.archive_path = relative
+        session.commit()
+    except Exception:
+        session.rollback()
+        os.remove(os.path.join(ARCHIVE_DIR, relative))
+        raise
+
+    # The exports are gone and the json export now reports the scan archived
+    etag_cache.discard(scan.id)
+
+    logger.debug(f"Archived {len(results)} results of scan {scan.id} to {relative}")
+    return len(results)
+
+
+def archive_scans(session, older_than_days: int = RETENTION_DAYS, limit: Optional[int] = None,
+                  vacuum: bool = True) -> Dict[str, int]:
+    """
+    Archive every finished scan older than the retention period.
+
+    Args:
+        session: SQLAlchemy session
+        older_than_days: Minimum scan age in days
+        limit: Maximum number of scans to archive
+        vacuum: Run VACUUM afterwards to return freed pages to the filesystem
+
+    Returns:
+        dict: Counts of archived scans and results, failures and deleted blobs
+    """
+    from models import Scan
+
+    _require_pyarrow()
+
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    query = (
+        session.query(Scan)
+        .filter(Scan.archived_at.is_(None))
+        .filter(Scan.status.in_(['completed', 'failed']))
+        .filter(Scan.start_time < cutoff)
+        .order_by(Scan.start_time)
+    )
+    if limit:
+        query = query.limit(limit)
+
+    stats = {'scans_archived': 0, 'results_archived': 0, 'scans_failed': 0, 'blobs_deleted': 0}
+
+    for scan in query.all():
+        try:
+            stats['results_archived'] += archive_scan(session, scan)
+            stats['scans_archived'] += 1
+        except Exception as e:
+            stats['scans_failed'] += 1
+            logger.error(f"Error archiving scan {scan.id}: {str(e)}")
+
+    if stats['scans_archived']:
+        stats['blobs_deleted'] = delete_unused_blobs(session)
+        if vacuum:
+            vacuum_database(session)
+
+    return stats
+
+
+def rehydrate_scan(session, scan) -> int:
+    """
+    Move the results of an archived scan back into the database.
+
+    Exports stored before the scan was archived are dropped; they are
+    materialized again from the restored results on first use.
+
+    Args:
+        session: SQLAlchemy session
+        scan: Archived Scan instance
+
+    Returns:
+        int: Number of restored results
+    """
+    from models import ScanExport, ScanResult
+
+    if scan.archived_at is None:
+        return 0
+
+    archived = load_archived_results(scan)
+
+    try:
+        for row in archived:
+            data = row.payload
+            result = ScanResult(
+                scan_id=scan.id,
+                tool=row.tool,
+                result_type=row.result_type,
+                created_at=row.created_at,
+                **store_result_data(session, data)
+            )
+            session.add(result)
+            # Assign the id for the search index and make new blobs visible to the next lookup
+            session.flush()
+            index_result(session, result, scan.target, data)
+
+        session.query(ScanExport).filter_by(scan_id=scan.id).delete(synchronize_session=False)
+        path = os.path.join(ARCHIVE_DIR, scan.archive_path)
+        scan.archived_at = None
+        scan.archive_path = None
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    etag_cache.discard(scan.id)
+
+    os.remove(path)
+    logger.debug(f"Rehydrated {len(archived)} results of scan {scan.id}")
+    return len(archived)
+
+
+def query_archive(target: Optional[str] = None, month: Optional[str] = None,
+                  scan_id: Optional[str] = None, tool: Optional[str] = None,
+                  result_type: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Query archived results without rehydrating them.
+
+    Target and month filters prune whole partitions before any file is read.
+
+    Args:
+        target: Scan target
+        month: Scan month as YYYY-MM
+        scan_id: Unique scan identifier
+        tool: Tool name
+        result_type: Type of result
+        limit: Maximum number of results to return
+
+    Returns:
+        list: Archived results with decoded data
+    """
+    _require_pyarrow()
+
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+
+    field = pyarrow.dataset.field
+    filters = []
+    if target:
+        filters.append(field('target') == partition_name(target))
+    if month:
+        filters.append(field('month') == month)
+    if scan_id:
+        filters.append(field('scan_id') == scan_id)
+    if tool:
+        filters.append(field('tool') == tool)
+    if result_type:
+        filters.append(field('result_type') == result_type)
+
+    expression = None
+    for condition in filters:
+        expression = condition if expression is None else expression & condition
+
+    dataset = pyarrow.dataset.dataset(ARCHIVE_DIR, format='parquet', partitioning=_partitioning())
+    table = dataset.head(limit, filter=expression)
+
+    return [{
+        'scan_id': row['scan_id'],
+        'target': row['target'],
+        'month': row['month'],
+        'tool': row['tool'],
+        'result_type': row['result_type'],
+        'data': json.loads(row['data']),
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None
+    } for row in table.to_pylist()]
@@ -0,0 +1,341 @@
+import os
+import csv
+import json
+import logging
+import functools
+import contextlib
+from io import StringIO
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from a2wsgi import WSGIMiddleware
+
+from app import app, db, scanner, scheduler
+from models import Scan, ScanResult
+from exports import get_export, not_modified, export_response
+from archive import load_archived_results
+from profiling import profiler, profiling_allowed
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Async drivers used in place of the synchronous ones configured for Flask
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+# Results fetched per round trip when streaming downloads
+STREAM_BATCH_SIZE = 200
+
+# Seconds running scans get to finish when a worker shuts down
+SCAN_SHUTDOWN_TIMEOUT = float(os.environ.get("SCAN_SHUTDOWN_TIMEOUT", 60))
+
+# Threads serving the routes left on the Flask app
+WSGI_WORKERS = int(os.environ.get("WSGI_WORKERS", 10))
+
+
+def async_database_url(url):
+    """
+    Get the async driver equivalent of a database URL.
+
+    Args:
+        url: SQLAlchemy URL of the Flask engine
+
+    Returns:
+        URL: Same database with an async driver
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+# Flask-SQLAlchemy resolves relative SQLite paths, so reuse its URL
+with app.app_context():
+    engine = create_async_engine(async_database_url(db.engine.url), pool_pre_ping=True)
+
+Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def error(message: str, status_code: int) -> JSONResponse:
+    return JSONResponse({'status': 'error', 'message': message}, status_code=status_code)
+
+
+def request_hooks(handler: Callable[[Request], Awaitable[Response]]) -> Callable[[Request], Awaitable[Response]]:
+    """
+    Apply the Flask app's request hooks to a route served on the event loop.
+
+    Routes on the event loop never pass through Flask, so its
+    before_request/after_request hooks are mirrored here. The only hooks are
+    the request profiler's. The profile covers the event loop thread from
+    the request to the returned response: work handed to the threadpool and
+    the body of streamed responses are not in it, and other requests served
+    while the handler awaits are.
+
+    Args:
+        handler: Route handler
+
+    Returns:
+        Handler running the hooks around the route
+    """
+    @functools.wraps(handler)
+    async def wrapper(request: Request) -> Response:
+        # The profile form field of the Flask hook never applies to these GET routes
+        profile = None
+        if profiling_allowed(request.headers.get('x-profile')):
+            profile = profiler.start('request', f"{request.method} {request.url.path}")
+
+        try:
+            response = await handler(request)
+        finally:
+            name = profiler.stop(profile) if profile is not None else None
+
+        if name:
+            response.headers['X-Profile-Id'] = name
+        return response
+
+    return wrapper
+
+
+def build_export_response(scan_id: str, format: str, if_none_match: Optional[str],
+                          accept_encoding: Optional[str]) -> Optional[Tuple[bytes, int, Dict[str, str]]]:
+    """
+    Get the export response of a completed scan, materializing the export if needed.
+
+    Blocking; run it on a worker thread.
+
+    Args:
+        scan_id: Unique scan identifier
+        format: Export format (results, json, csv)
+        if_none_match: If-None-Match request header
+        accept_encoding: Accept-Encoding request header
+
+    Returns:
+        tuple: (body, status code, headers), or None if the scan has no export
+    """
+    with app.app_context():
+        scan = db.session.get(Scan, scan_id)
+        if scan is None or scan.status != 'completed':
+            return None
+        export = get_export(db.session, scan, format)
+        if export is None:
+            return None
+        return export_response(export, if_none_match, accept_encoding)
+
+
+async def cached_export(request: Request, scan_id: str, format: str):
+    """
+    Serve the materialized export of a completed scan.
+
+    Args:
+        request: Incoming request
+        scan_id: Unique scan identifier
+        format: Export format (results, json, csv)
+
+    Returns:
+        Response, or None if the scan has no export
+    """
+    if_none_match = request.headers.get('if-none-match')
+    accept_encoding = request.headers.get('accept-encoding')
+
+    response = not_modified(scan_id, format, if_none_match, accept_encoding)
+    if response is None:
+        # Rendering, compressing and reading archived results is CPU and disk
+        # bound, so the cache miss is built on a worker thread with the sync session
+        response = await run_in_threadpool(build_export_response, scan_id, format, if_none_match, accept_encoding)
+        if response is None:
+            return None
+
+    body, status_code, headers = response
+    return Response(body, status_code=status_code, headers=headers)
+
+
+async def scan_status(request: Request) -> Response:
+    """Get the status of a specific scan."""
+    scan_id = request.path_params['scan_id']
+    try:
+        async with Session() as session:
+            scan = await session.get(Scan, scan_id)
+
+        if not scan:
+            return error('Scan not found', 404)
+
+        return JSONResponse({
+            'status': 'success',
+            'data': {
+                'scan_status': scan.status,
+                'start_time': scan.start_time.isoformat() if scan.start_time else None,
+                'end_time': scan.end_time.isoformat() if scan.end_time else None,
+                'progress': scan.progress or 0,
+                'stages': scanner.active_scans.get(scan_id, {}).get('stages', {})
+            }
+        })
+
+    except Exception as e:
+        logger.error(f"Error getting scan status: {str(e)}")
+        return error(f'Error getting scan status: {str(e)}', 500)
+
+
+async def get_results(request: Request) -> Response:
+    """Get all results for a specific scan."""
+    scan_id = request.path_params['scan_id']
+    try:
+        response = await cached_export(request, scan_id, 'results')
+        if response is not None:
+            return response
+
+        async with Session() as session:
+            scan = await session.get(Scan, scan_id)
+            if scan is not None and scan.archived_at is not None:
+                results = await run_in_threadpool(load_archived_results, scan)
+            else:
+                results = (await session.scalars(
+                    select(ScanResult).filter_by(scan_id=scan_id).order_by(ScanResult.id)
+                )).all()
+
+        # Decompressing large blobs is CPU bound, keep it off the event loop
+        data = await run_in_threadpool(lambda: [result.to_dict() for result in results])
+
+        return JSONResponse({
+            'status': 'success',
+            'data': data
+        })
+
+    except Exception as e:
+        logger.error(f"Error getting results: {str(e)}")
+        return error(f'Error getting results: {str(e)}', 500)
+
+
+async def iter_results(scan: Scan) -> AsyncIterator[list]:
+    """
+    Fetch the results of a scan in batches.
+
+    Args:
+        scan: Scan instance
+
+    Yields:
+        list: Batch of ScanResult instances
+    """
+    if scan.archived_at is not None:
+        archived = await run_in_threadpool(load_archived_results, scan)
+        for start in range(0, len(archived), STREAM_BATCH_SIZE):
+            yield archived[start:start + STREAM_BATCH_SIZE]
+        return
+
+    async with Session() as session:
+        stream = await session.stream_scalars(
+            select(ScanResult)
+            .filter_by(scan_id=scan.id)
+            .order_by(ScanResult.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for batch in stream.partitions():
+            yield batch
+
+
+async def stream_json(scan: Scan) -> AsyncIterator[str]:
+    header = json.dumps(scan.to_dict())
+    yield header[:-1] + ', "results": ['
+
+    first = True
+    async for batch in iter_results(scan):
+        chunk = await run_in_threadpool(
+            lambda: ', '.join(json.dumps(result.to_dict()) for result in batch)
+        )
+        if chunk:
+            yield chunk if first else ', ' + chunk
+            first = False
+
+    yield ']}'
+
+
+async def stream_csv(scan: Scan) -> AsyncIterator[str]:
+    def write(rows) -> str:
+        output = StringIO()
+        csv.writer(output).writerows(rows)
+        return output.getvalue()
+
+    yield write([['Tool', 'Type', 'Value', 'Timestamp']])
+
+    async for batch in iter_results(scan):
+        yield await run_in_threadpool(
+            lambda: write(row for result in batch for row in result.csv_rows())
+        )
+
+
+async def download_results(request: Request) -> Response:
+    """Download scan results in the specified format, streamed in batches."""
+    scan_id = request.path_params['scan_id']
+    format = request.path_params['format']
+    try:
+        if format in ('json', 'csv'):
+            response = await cached_export(request, scan_id, format)
+            if response is not None:
+                return response
+
+        async with Session() as session:
+            scan = await session.get(Scan, scan_id)
+
+        if not scan:
+            return error('Scan not found', 404)
+
+        if format == 'json':
+            return StreamingResponse(stream_json(scan), media_type='application/json')
+
+        elif format == 'csv':
+            return StreamingResponse(stream_csv(scan), media_type='text/csv', headers={
+                'Content-Disposition': f"attachment; filename=recon_results_{scan_id}.csv"
+            })
+        else:
+            return error('Unsupported format', 400)
+
+    except Exception as e:
+        logger.error(f"Error downloading results: {str(e)}")
+        return error(f'Error downloading results: {str(e)}', 500)
+
+
+async def history(request: Request) -> Response:
+    """Show scan history."""
+    from flask import render_template
+
+    async with Session() as session:
+        scans = (await session.scalars(select(Scan).order_by(Scan.start_time.desc()))).all()
+
+    def render() -> str:
+        with app.test_request_context(request.url.path):
+            return render_template('history.html', scans=scans)
+
+    return HTMLResponse(await run_in_threadpool(render))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(application: Starlette) -> AsyncIterator[None]:
+    scheduler.start()
+    yield
+    scheduler.stop()
+    # Let running scans finish before the worker exits
+    interrupted = await run_in_threadpool(scanner.shutdown, SCAN_SHUTDOWN_TIMEOUT)
+    if interrupted:
+        logger.warning(f"Interrupted {len(interrupted)} running scans at shutdown")
+    await engine.dispose()
+
+
+# Read APIs run on the event loop, everything else is served by the Flask app
+application = Starlette(
+    routes=[
+        Route('/scan_status/{scan_id}', request_hooks(scan_status)),
+        Route('/get_results/{scan_id}', request_hooks(get_results)),
+        Route('/download_results/{scan_id}/{format}', request_hooks(download_results)),
+        Route('/history', request_hooks(history)),
+        Mount('/', app=WSGIMiddleware(app, workers=WSGI_WORKERS)),
+    ],
+    lifespan=lifespan,
+)
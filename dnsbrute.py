@@ -0,0 +1,392 @@
+import os
+import re
+import time
+import socket
+import random
+import struct
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from policy import tool_policy
+from workspace import Workspace, LineCollector
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOLVERS = [
+    '1.1.1.1', '1.0.0.1',
+    '8.8.8.8', '8.8.4.4',
+    '9.9.9.9', '149.112.112.112',
+    '208.67.222.222', '208.67.220.220',
+]
+DEFAULT_WORDLIST = "/usr/share/wordlists/seclists/Discovery/DNS/subdomains-top1million-5000.txt"
+FALLBACK_WORDS = ['www', 'admin', 'mail', 'blog', 'dev', 'test', 'staging']
+
+CACHE_DIR = os.environ.get("RECON_CACHE_DIR", os.path.expanduser("~/.cache/recon"))
+WORKERS = int(os.environ.get("DNS_BRUTE_WORKERS", 4))
+MIN_SHARD_SIZE = 500  # Words per shard below which extra shards are not worth a process launch
+SHARDS_PER_WORKER = 4  # Shards queue behind the workers, so later ones start with a fresher resolver pool
+
+# Resolver health settings
+PROBE_TIMEOUT = 2.0  # Seconds per probe query
+PROBE_INTERVAL = 30.0  # Seconds between background re-probes
+EWMA_ALPHA = 0.3
+MAX_ERROR_RATE = 0.5  # Resolvers failing more often than this are dropped
+MAX_LATENCY = 1.5  # Seconds; slower resolvers are dropped
+
+LABEL_RE = re.compile(r'^[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?(?:\.[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9_])?)*$')
+
+
+def build_query(name: str, query_id: int) -> bytes:
+    """
+    Build a DNS A query packet.
+
+    Args:
+        name: Name to resolve
+        query_id: 16-bit query identifier
+
+    Returns:
+        bytes: Wire format query
+    """
+    header = struct.pack('>HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+    qname = b''.join(
+        bytes([len(label)]) + label.encode('ascii') for label in name.strip('.').split('.')
+    ) + b'\x00'
+    return header + qname + struct.pack('>HH', 1, 1)
+
+
+class ResolverPool:
+    """Resolvers scored by latency and error rate from periodic probes."""
+
+    def __init__(self, resolvers: List[str]):
+        """
+        Initialize the ResolverPool.
+
+        Args:
+            resolvers: Resolver IP addresses
+        """
+        self._lock = threading.Lock()
+        self.stats = {
+            resolver: {'latency': None, 'error_rate': 0.0, 'probes': 0}
+            for resolver in resolvers
+        }
+
+    def probe(self, resolver: str, name: str) -> Tuple[bool, float]:
+        """
+        Send one query to a resolver and update its score.
+
+        NOERROR and NXDOMAIN both count as healthy answers; timeouts,
+        SERVFAIL and REFUSED count as errors.
+
+        Args:
+            resolver: Resolver IP address
+            name: Name to query
+
+        Returns:
+            tuple: (healthy (bool), latency in seconds (float))
+        """
+        query_id = random.randint(0, 0xFFFF)
+        started = time.monotonic()
+        healthy = False
+
+        try:
+            family = socket.AF_INET6 if ':' in resolver else socket.AF_INET
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(PROBE_TIMEOUT)
+                sock.sendto(build_query(name, query_id), (resolver, 53))
+                while True:
+                    response, _ = sock.recvfrom(512)
+                    if len(response) >= 4 and struct.unpack('>H', response[:2])[0] == query_id:
+                        break
+                healthy = (response[3] & 0x0F) in (0, 3)
+        except (OSError, socket.timeout):
+            healthy = False
+
+        latency = time.monotonic() - started if healthy else PROBE_TIMEOUT
+
+        with self._lock:
+            stats = self.stats[resolver]
+            error = 0.0 if healthy else 1.0
+            if stats['probes'] == 0:
+                stats['latency'] = latency
+                stats['error_rate'] = error
+            else:
+                stats['latency'] = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats['latency']
+                stats['error_rate'] = EWMA_ALPHA * error + (1 - EWMA_ALPHA) * stats['error_rate']
+            stats['probes'] += 1
+
+        return healthy, latency
+
+    def probe_all(self, name: str) -> None:
+        """
+        Probe every resolver in parallel.
+
+        Args:
+            name: Name to query
+        """
+        with ThreadPoolExecutor(max_workers=min(len(self.stats), 16) or 1) as executor:
+            for resolver in list(self.stats):
+                executor.submit(self.probe, resolver, name)
+
+    def score(self, resolver: str) -> float:
+        """Lower is better: latency inflated by the error rate."""
+        stats = self.stats[resolver]
+        if stats['latency'] is None:
+            return PROBE_TIMEOUT
+        return stats['latency'] * (1 + 4 * stats['error_rate'])
+
+    def healthy(self) -> List[str]:
+        """
+        Get usable resolvers, best first.
+
+        Falls back to every resolver when none pass the health checks, so a
+        flaky network degrades the run instead of stopping it.
+
+        Returns:
+            list: Resolver IP addresses
+        """
+        with self._lock:
+            good = [
+                resolver for resolver, stats in self.stats.items()
+                if stats['probes'] == 0 or (
+                    stats['error_rate'] <= MAX_ERROR_RATE and stats['latency'] <= MAX_LATENCY
+                )
+            ]
+            ranked = sorted(good or list(self.stats), key=self.score)
+        return ranked
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Get rounded resolver statistics."""
+        with self._lock:
+            return {
+                resolver: {
+                    'latency_ms': round(stats['latency'] * 1000) if stats['latency'] is not None else None,
+                    'error_rate': round(stats['error_rate'], 2),
+                    'probes': stats['probes']
+                }
+                for resolver, stats in self.stats.items()
+            }
+
+
+def load_resolvers() -> List[str]:
+    """
+    Get the resolvers to use for brute-forcing.
+
+    Returns:
+        list: Resolvers from RESOLVERS_FILE if set, otherwise the defaults
+    """
+    path = os.environ.get("RESOLVERS_FILE")
+    if path and os.path.exists(path):
+        with open(path) as f:
+            resolvers = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if resolvers:
+            return resolvers
+    return list(DEFAULT_RESOLVERS)
+
+
+def compile_wordlist(path: Optional[str] = None) -> str:
+    """
+    Normalize and deduplicate a wordlist, caching the result between runs.
+
+    The cache key covers the source path, size and modification time, so
+    an edited wordlist is recompiled automatically.
+
+    Args:
+        path: Source wordlist, defaults to the SecLists top 5000
+
+    Returns:
+        str: Path of the compiled wordlist
+    """
+    path = path or DEFAULT_WORDLIST
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    if os.path.exists(path):
+        info = os.stat(path)
+        key = hashlib.sha256(f"{os.path.abspath(path)}:{info.st_size}:{info.st_mtime_ns}".encode()).hexdigest()
+    else:
+        key = hashlib.sha256('\n'.join(FALLBACK_WORDS).encode()).hexdigest()
+
+    compiled = os.path.join(CACHE_DIR, f"wordlist-{key[:16]}.txt")
+    if os.path.exists(compiled):
+        return compiled
+
+    words = {}
+    if os.path.exists(path):
+        with open(path, errors='replace') as f:
+            for line in f:
+                word = line.strip().lower().strip('.')
+                if word and not word.startswith('#') and LABEL_RE.match(word):
+                    words[word] = None
+    else:
+        words = dict.fromkeys(FALLBACK_WORDS)
+
+    # Write then rename so concurrent runs never read a half written cache file
+    partial = f"{compiled}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(partial, 'w') as f:
+        f.write('\n'.join(words))
+    os.replace(partial, compiled)
+
+    logger.info(f"Compiled wordlist {path} into {len(words)} unique words")
+    return compiled
+
+
+def shard_wordlist(compiled: str, workspace: Workspace, shards: int) -> List[Tuple[str, int]]:
+    """
+    Split a compiled wordlist into shard files.
+
+    Args:
+        compiled: Compiled wordlist path
+        workspace: Workspace to write the shards into
+        shards: Number of shards
+
+    Returns:
+        list: (shard path, word count) tuples, empty when the wordlist has no words
+    """
+    with open(compiled) as f:
+        words = [word for word in f.read().split('\n') if word]
+    if not words:
+        return []
+
+    shards = max(1, min(shards, len(words) // MIN_SHARD_SIZE or 1))
+    result = []
+    for index in range(shards):
+        chunk = words[index::shards]
+        result.append((workspace.file(f"shard-{index}.txt", '\n'.join(chunk)), len(chunk)))
+    return result
+
+
+class DnsBruteForcer:
+    """Parallel shuffledns brute-force over wordlist shards."""
+
+    def __init__(self, target: str, wordlist: Optional[str] = None, workers: Optional[int] = None,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize the DnsBruteForcer.
+
+        Args:
+            target: Target domain
+            wordlist: Source wordlist path
+            workers: Maximum number of parallel shuffledns processes
+            progress: Callback receiving a progress dict after each shard changes state
+        """
+        self.target = target
+        self.wordlist = wordlist
+        self.workers = workers or WORKERS
+        self.progress = progress
+        self.pool = ResolverPool(load_resolvers())
+        self.shards = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _report(self, index: int, **update) -> None:
+        with self._lock:
+            self.shards[index].update(update)
+            snapshot = {
+                'shards': [dict(shard) for shard in self.shards],
+                'resolvers': self.pool.report()
+            }
+        if self.progress:
+            try:
+                self.progress(snapshot)
+            except Exception as e:
+                logger.error(f"Error reporting brute-force progress: {str(e)}")
+
+    def _monitor_resolvers(self) -> None:
+        while not self._stop.wait(PROBE_INTERVAL):
+            self.pool.probe_all(self.target)
+
+    def _run_shard(self, index: int, path: str, words: int, workspace: Workspace,
+                   parent_stage) -> Tuple[bool, List[str]]:
+        from utils import ToolExecutor
+
+        # Resolvers are picked when the shard starts, so queued shards skip
+        # resolvers the background probes found unhealthy meanwhile.
+        # Rotate the healthiest resolvers so shards spread their load
+        resolvers = self.pool.healthy()
+        offset = index % len(resolvers)
+        resolvers = resolvers[offset:] + resolvers[:offset]
+        resolvers_file = workspace.file(f"resolvers-{index}.txt", '\n'.join(resolvers))
+
+        self._report(index, status='running', resolvers=len(resolvers))
+
+        collector = LineCollector()
+        reader = workspace.stream(f"found-{index}.txt", collector)
+        command = (
+            f"shuffledns -d {self.target} -w {path} -r {resolvers_file} "
+            f"-o {workspace.file(f'found-{index}.txt')}"
+        )
+
+        # Worker threads inherit the scan's limits. Shards are timed and
+        # recorded on their own, sized by their words, so their runtimes do
+        # not mix with those of whole runs
+        with tool_policy.stage('shuffledns_shard', self.target, words,
+                               parent_stage.limiter_keys if parent_stage else None) as stage:
+            # Each shard launch takes its own rate limiter token. A retry would
+            # stream a second run into the same collector, so shards run once
+            stage.launches = 1
+            success, output = ToolExecutor.run_command(command, tool='shuffledns_shard', retry=False)
+            reader.finish()
+            if parent_stage:
+                parent_stage.salvaged.extend(stage.salvaged)
+
+        found = collector.close() if success and reader.error is None else []
+        self._report(index, status='completed' if success else 'failed', found=len(found))
+        return success, found
+
+    def run(self) -> Tuple[bool, List[str]]:
+        """
+        Brute-force subdomains of the target.
+
+        The wordlist is split into more shards than workers; shards wait in
+        the executor's queue and each starts with the current resolver pool.
+
+        Returns:
+            tuple: (success (bool), subdomains (list)); success when at least one shard succeeded
+        """
+        compiled = compile_wordlist(self.wordlist)
+        parent_stage = tool_policy.current_stage()
+
+        subdomains = {}
+        any_success = False
+
+        with Workspace('shuffledns') as workspace:
+            shard_files = shard_wordlist(compiled, workspace, self.workers * SHARDS_PER_WORKER)
+            if not shard_files:
+                logger.error(f"Wordlist {self.wordlist or DEFAULT_WORDLIST} has no usable words, skipping brute-force")
+                return False, []
+
+            self.shards = [
+                {'shard': index, 'words': words, 'status': 'pending', 'found': 0}
+                for index, (_, words) in enumerate(shard_files)
+            ]
+            logger.info(
+                f"Brute-forcing {self.target} with {len(shard_files)} shards on "
+                f"{min(self.workers, len(shard_files))} workers"
+            )
+
+            self.pool.probe_all(self.target)
+            monitor = threading.Thread(target=self._monitor_resolvers, daemon=True)
+            monitor.start()
+
+            try:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(shard_files))) as executor:
+                    futures = [
+                        executor.submit(self._run_shard, index, path, words, workspace, parent_stage)
+                        for index, (path, words) in enumerate(shard_files)
+                    ]
+                    for future in as_completed(futures):
+                        try:
+                            success, found = future.result()
+                        except Exception as e:
+                            logger.error(f"Brute-force shard failed for {self.target}: {str(e)}")
+                            continue
+                        any_success = any_success or success
+                        for subdomain in found:
+                            subdomains[subdomain.lower()] = None
+            finally:
+                self._stop.set()
+
+        return any_success, list(subdomains)
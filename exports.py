@@ -0,0 +1,302 @@
+import csv
+import gzip
+import json
+import logging
+import threading
+from collections import OrderedDict
+from io import StringIO
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from storage import content_hash
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Payloads materialized for completed scans and their content types
+EXPORT_FORMATS = {
+    'results': 'application/json',  # /get_results API payload
+    'json': 'application/json',  # /download_results JSON export
+    'csv': 'text/csv',  # /download_results CSV export
+}
+
+# Exports are compressed once, so spend the extra time on the best ratio
+GZIP_LEVEL = 9
+
+# Completed results never change; clients may cache but must revalidate the ETag
+CACHE_CONTROL = 'private, no-cache'
+
+# ETags of recently served exports, so 304 answers skip the database
+ETAG_CACHE_SIZE = 4096
+
+
+class EtagCache:
+    """Small LRU of export ETags keyed by (scan_id, format)."""
+
+    def __init__(self, size: int = ETAG_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scan_id: str, format: str) -> Optional[str]:
+        with self._lock:
+            etag = self._items.get((scan_id, format))
+            if etag is not None:
+                self._items.move_to_end((scan_id, format))
+            return etag
+
+    def put(self, scan_id: str, format: str, etag: str) -> None:
+        with self._lock:
+            self._items[(scan_id, format)] = etag
+            self._items.move_to_end((scan_id, format))
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def discard(self, scan_id: str) -> None:
+        """Forget the ETags of every format of a scan whose exports changed."""
+        with self._lock:
+            for format in EXPORT_FORMATS:
+                self._items.pop((scan_id, format), None)
+
+
+etag_cache = EtagCache()
+
+
+def render_export(scan, results: List, format: str) -> bytes:
+    """
+    Serialize the results of a scan in an export format.
+
+    Args:
+        scan: Scan instance
+        results: ScanResult instances of the scan
+        format: One of EXPORT_FORMATS
+
+    Returns:
+        bytes: Uncompressed payload
+    """
+    if format == 'results':
+        text = json.dumps({
+            'status': 'success',
+            'data': [result.to_dict() for result in results]
+        })
+    elif format == 'json':
+        text = json.dumps({
+            **scan.to_dict(),
+            'results': [result.to_dict() for result in results]
+        })
+    elif format == 'csv':
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Tool', 'Type', 'Value', 'Timestamp'])
+        for result in results:
+            writer.writerows(result.csv_rows())
+        text = output.getvalue()
+    else:
+        raise ValueError(f"Unknown export format: {format}")
+
+    return text.encode('utf-8')
+
+
+def build_export(scan, results: List, format: str) -> 'ScanExport':
+    """
+    Render and compress one export format of a scan without storing it.
+
+    Args:
+        scan: Scan instance
+        results: ScanResult instances of the scan
+        format: One of EXPORT_FORMATS
+
+    Returns:
+        ScanExport: Export not added to any session
+    """
+    from models import ScanExport
+
+    raw = render_export(scan, results, format)
+    return ScanExport(
+        scan_id=scan.id,
+        format=format,
+        etag=content_hash(raw),
+        data=gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0),
+        size=len(raw)
+    )
+
+
+def materialize_exports(session, scan) -> Dict[str, 'ScanExport']:
+    """
+    Render, compress and store every export format of a completed scan.
+
+    Args:
+        session: SQLAlchemy session
+        scan: Completed Scan instance
+
+    Returns:
+        dict: ScanExport instances by format
+    """
+    from models import ScanExport
+    from archive import scan_results
+
+    results = scan_results(session, scan)
+
+    session.query(ScanExport).filter_by(scan_id=scan.id).delete()
+
+    exports = {format: build_export(scan, results, format) for format in EXPORT_FORMATS}
+
+    session.add_all(exports.values())
+    session.commit()
+
+    for format, export in exports.items():
+        etag_cache.put(scan.id, format, export.etag)
+
+    logger.debug(f"Materialized {len(exports)} exports for scan {scan.id}")
+    return exports
+
+
+def get_export(session, scan, format: str):
+    """
+    Get the materialized export of a scan, creating it on first use.
+
+    Archived scans are rendered from the archive on every call and never
+    stored, so the database stays free of their payloads.
+
+    Args:
+        session: SQLAlchemy session
+        scan: Scan instance
+        format: One of EXPORT_FORMATS
+
+    Returns:
+        ScanExport: Export, or None if the scan has not completed
+    """
+    from models import ScanExport
+    from archive import load_archived_results
+
+    if scan.status != 'completed' or format not in EXPORT_FORMATS:
+        return None
+
+    if scan.archived_at is not None:
+        export = build_export(scan, load_archived_results(scan), format)
+        etag_cache.put(scan.id, format, export.etag)
+        return export
+
+    export = session.query(ScanExport).filter_by(scan_id=scan.id, format=format).first()
+    if export is None:
+        try:
+            export = materialize_exports(session, scan)[format]
+        except IntegrityError:
+            # Another worker materialized the scan first
+            session.rollback()
+            export = session.query(ScanExport).filter_by(scan_id=scan.id, format=format).first()
+
+    if export is not None:
+        etag_cache.put(scan.id, format, export.etag)
+    return export
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an export ETag.
+
+    Uses weak comparison and ignores the per-encoding suffix, since every
+    encoding of an export carries the same content.
+
+    Args:
+        if_none_match: Header value
+        etag: Export ETag without quotes or suffix
+
+    Returns:
+        bool: True if the client already has the export
+    """
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.endswith('-gzip'):
+            tag = tag[:-5]
+        if tag == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Check whether an Accept-Encoding header allows gzip.
+
+    Args:
+        accept_encoding: Header value
+
+    Returns:
+        bool: True if gzip is acceptable
+    """
+    for coding in (accept_encoding or '').lower().split(','):
+        name, _, params = coding.strip().partition(';')
+        if name.strip() in ('gzip', '*'):
+            quality = params.strip()
+            if not quality.startswith('q='):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def _headers(etag: str, gzipped: bool) -> Dict[str, str]:
+    return {
+        'ETag': f'"{etag}-gzip"' if gzipped else f'"{etag}"',
+        'Cache-Control': CACHE_CONTROL,
+        'Vary': 'Accept-Encoding',
+    }
+
+
+def not_modified(scan_id: str, format: str, if_none_match: Optional[str],
+                 accept_encoding: Optional[str]) -> Optional[Tuple[bytes, int, Dict[str, str]]]:
+    """
+    Answer a conditional request from the ETag cache without touching the database.
+
+    Args:
+        scan_id: Unique scan identifier
+        format: One of EXPORT_FORMATS
+        if_none_match: If-None-Match header value
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        tuple: (body, status, headers) for a 304 response, or None
+    """
+    etag = etag_cache.get(scan_id, format)
+    if etag is None or not etag_matches(if_none_match, etag):
+        return None
+    return b'', 304, _headers(etag, accepts_gzip(accept_encoding))
+
+
+def export_response(export, if_none_match: Optional[str],
+                    accept_encoding: Optional[str]) -> Tuple[bytes, int, Dict[str, str]]:
+    """
+    Build the response for a materialized export.
+
+    Args:
+        export: ScanExport instance
+        if_none_match: If-None-Match header value
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        tuple: (body, status, headers), in the order Flask views return
+    """
+    gzipped = accepts_gzip(accept_encoding)
+    headers = _headers(export.etag, gzipped)
+
+    if etag_matches(if_none_match, export.etag):
+        return b'', 304, headers
+
+    headers['Content-Type'] = EXPORT_FORMATS[export.format]
+    if export.format == 'csv':
+        headers['Content-Disposition'] = f"attachment; filename=recon_results_{export.scan_id}.csv"
+    if gzipped:
+        headers['Content-Encoding'] = 'gzip'
+        return export.data, 200, headers
+    return gzip.decompress(export.data), 200, headers
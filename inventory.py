@@ -0,0 +1,344 @@
+import json
+import logging
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Number of asset values looked up per IN (...) query
+LOOKUP_CHUNK_SIZE = 500
+
+
+def reverse_hostname(hostname: str) -> str:
+    """
+    Reverse a hostname so that suffix lookups become indexed prefix ranges.
+
+    Args:
+        hostname: Hostname such as admin.example.com
+
+    Returns:
+        str: Reversed hostname such as moc.elpmaxe.nimda
+    """
+    return hostname[::-1]
+
+
+def extract_assets(result_type: str, data: Any) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Extract inventory assets from a tool result.
+
+    Args:
+        result_type: Type of result (subdomains, port_scan, urls, findings)
+        data: Result data as produced by ToolExecutor
+
+    Returns:
+        dict: Mapping of (kind, value) to extra asset columns
+    """
+    assets = {}
+
+    if not isinstance(data, list):
+        return assets
+
+    if result_type == 'subdomains':
+        for subdomain in data:
+            if isinstance(subdomain, str):
+                hostname = subdomain.strip().lower().rstrip('.')
+                if hostname:
+                    assets[('hostname', hostname)] = {}
+
+    elif result_type == 'port_scan':
+        for host in data:
+            if not isinstance(host, dict) or not host.get('ip'):
+                continue
+            for port in host.get('ports', []):
+                if port.get('state') != 'open' or not str(port.get('port', '')).isdigit():
+                    continue
+                protocol = port.get('protocol') or 'tcp'
+                assets[('service', f"{host['ip']}:{port['port']}/{protocol}")] = {
+                    'port': int(port['port']),
+                    'service': port.get('service') or None
+                }
+
+    elif result_type == 'urls':
+        for url in data:
+            if isinstance(url, str) and url.strip():
+                assets[('url', url.strip())] = {}
+
+    elif result_type == 'findings':
+        for finding in data:
+            if isinstance(finding, dict) and finding.get('type') == 'subdomain' and finding.get('value'):
+                hostname = str(finding['value']).strip().lower().rstrip('.')
+                if hostname:
+                    assets[('hostname', hostname)] = {}
+
+    return assets
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def record_assets(session, scan_id: str, tool: str, result_type: str, data: Any,
+                  seen_at: Optional[datetime.datetime] = None,
+                  changes: Optional[List[Tuple[str, str, List[str], Dict[str, Any]]]] = None) -> int:
+    """
+    Merge the assets found in a tool result into the global inventory.
+
+    Runs inside the caller's transaction so the inventory is committed
+    together with the ScanResult it was derived from.
+
+    Args:
+        session: SQLAlchemy session
+        scan_id: Unique scan identifier
+        tool: Tool name
+        result_type: Type of result
+        data: Result data
+        seen_at: Sighting time, defaults to now
+        changes: List receiving (kind, value, tools that found the asset earlier in
+            the scan, extra columns) for every asset the tool reports for the first time in the scan
+
+    Returns:
+        int: Number of assets touched
+    """
+    from models import Asset, AssetSighting, AssetTool
+
+    assets = extract_assets(result_type, data)
+    if not assets:
+        return 0
+
+    seen_at = seen_at or datetime.datetime.utcnow()
+
+    by_kind = {}
+    for kind, value in assets:
+        by_kind.setdefault(kind, []).append(value)
+
+    for kind, values in by_kind.items():
+        for chunk in _chunks(values, LOOKUP_CHUNK_SIZE):
+            existing = {
+                asset.value: asset
+                for asset in session.query(Asset).filter(Asset.kind == kind, Asset.value.in_(chunk))
+            }
+            new_tool = []  # Assets the tool reports for the first time
+
+            for value in chunk:
+                asset = existing.get(value)
+                extra = assets[(kind, value)]
+
+                if asset is None:
+                    asset = Asset(
+                        kind=kind,
+                        value=value,
+                        reversed_value=reverse_hostname(value) if kind == 'hostname' else None,
+                        first_seen=seen_at,
+                        last_seen=seen_at,
+                        seen_count=0,
+                        tools=json.dumps([]),
+                        **extra
+                    )
+                    session.add(asset)
+                    existing[value] = asset
+                else:
+                    asset.first_seen = min(asset.first_seen or seen_at, seen_at)
+                    asset.last_seen = max(asset.last_seen or seen_at, seen_at)
+                    for column, column_value in extra.items():
+                        if column_value is not None:
+                            setattr(asset, column, column_value)
+
+                tools = asset.tools_list
+                if tool not in tools:
+                    asset.tools = json.dumps(tools + [tool])
+                    new_tool.append(asset)
+
+            # Assign ids to new assets before recording sightings
+            session.flush()
+
+            for asset in new_tool:
+                session.add(AssetTool(tool=tool, asset_id=asset.id))
+
+            ids = [asset.id for asset in existing.values()]
+            sightings = {
+                sighting.asset_id: sighting for sighting in session.query(AssetSighting)
+                .filter(AssetSighting.scan_id == scan_id, AssetSighting.asset_id.in_(ids))
+            }
+            for value, asset in existing.items():
+                sighting = sightings.get(asset.id)
+                if sighting is None:
+                    previous = []
+                    session.add(AssetSighting(asset_id=asset.id, scan_id=scan_id, seen_at=seen_at,
+                                              tools=json.dumps([tool])))
+                    asset.seen_count = (asset.seen_count or 0) + 1
+                else:
+                    previous = sighting.tools_list
+                    if tool in previous:
+                        continue
+                    sighting.tools = json.dumps(previous + [tool])
+
+                if changes is not None:
+                    changes.append((kind, value, previous, assets[(kind, value)]))
+
+    return len(assets)
+
+
+def find_assets(session, kind: Optional[str] = None, value: Optional[str] = None,
+                domain: Optional[str] = None, port: Optional[int] = None,
+                service: Optional[str] = None, tool: Optional[str] = None,
+                limit: int = 100, offset: int = 0) -> List[Any]:
+    """
+    Query the asset inventory using indexed lookups.
+
+    Args:
+        session: SQLAlchemy session
+        kind: Asset kind (hostname, service, url)
+        value: Exact asset value
+        domain: Hostnames equal to or under this domain
+        port: Services on this port
+        service: Services with this service name
+        tool: Assets reported by this tool
+        limit: Maximum number of assets to return
+        offset: Number of assets to skip
+
+    Returns:
+        list: Matching Asset rows, most recently seen first
+    """
+    from models import Asset, AssetTool
+
+    query = session.query(Asset)
+
+    if kind:
+        query = query.filter(Asset.kind == kind)
+    if value:
+        query = query.filter(Asset.value == value)
+    if domain:
+        # Range over the reversed hostname index instead of a LIKE '%.domain' scan
+        suffix = reverse_hostname(domain.strip().lower().rstrip('.'))
+        query = query.filter(Asset.kind == 'hostname').filter(
+            (Asset.reversed_value == suffix) |
+            ((Asset.reversed_value >= suffix + '.') & (Asset.reversed_value < suffix + '/'))
+        )
+    if port is not None:
+        query = query.filter(Asset.kind == 'service', Asset.port == port)
+    if service:
+        query = query.filter(Asset.kind == 'service', Asset.service == service)
+    if tool:
+        query = query.join(AssetTool, AssetTool.asset_id == Asset.id).filter(AssetTool.tool == tool)
+
+    return query.order_by(Asset.last_seen.desc()).offset(offset).limit(limit).all()
+
+
+def scans_for_asset(session, kind: str, value: str) -> List[Any]:
+    """
+    Get every scan that found an asset.
+
+    Args:
+        session: SQLAlchemy session
+        kind: Asset kind
+        value: Asset value
+
+    Returns:
+        list: (Scan, seen_at) tuples, newest first
+    """
+    from models import Asset, AssetSighting, Scan
+
+    return (
+        session.query(Scan, AssetSighting.seen_at)
+        .join(AssetSighting, AssetSighting.scan_id == Scan.id)
+        .join(Asset, Asset.id == AssetSighting.asset_id)
+        .filter(Asset.kind == kind, Asset.value == value)
+        .order_by(AssetSighting.seen_at.desc())
+        .all()
+    )
+
+
+def rebuild_inventory(session, batch_size: int = 200) -> int:
+    """
+    Rebuild the inventory from every stored ScanResult.
+
+    The rebuild runs in one transaction, so readers keep seeing the old
+    inventory until the new one is committed.
+
+    Args:
+        session: SQLAlchemy session
+        batch_size: Number of results processed per flush
+
+    Returns:
+        int: Number of results processed
+    """
+    from models import Asset, AssetSighting, AssetTool, ScanResult
+
+    processed = 0
+    last_id = 0
+    try:
+        session.query(AssetTool).delete(synchronize_session=False)
+        session.query(AssetSighting).delete(synchronize_session=False)
+        session.query(Asset).delete(synchronize_session=False)
+
+        while True:
+            results = (
+                session.query(ScanResult)
+                .filter(ScanResult.id > last_id)
+                .filter(ScanResult.result_type != 'error')
+                .order_by(ScanResult.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not results:
+                break
+
+            for result in results:
+                record_assets(session, result.scan_id, result.tool, result.result_type,
+                              result.payload, seen_at=result.created_at)
+                last_id = result.id
+                processed += 1
+
+            # Write the batch but keep the transaction open, and free the loaded rows
+            session.flush()
+            session.expunge_all()
+            logger.info(f"Indexed {processed} results into the asset inventory")
+
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+    return processed
+
+
+def backfill_asset_tools(session, batch_size: int = 1000) -> int:
+    """
+    Fill the tool index of inventories created before it existed.
+
+    Args:
+        session: SQLAlchemy session
+        batch_size: Number of assets processed per query
+
+    Returns:
+        int: Number of index rows added
+    """
+    from models import Asset, AssetTool
+
+    if session.query(AssetTool).first() is not None or session.query(Asset).first() is None:
+        return 0
+
+    added = 0
+    last_id = 0
+    while True:
+        assets = (
+            session.query(Asset.id, Asset.tools)
+            .filter(Asset.id > last_id)
+            .order_by(Asset.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not assets:
+            break
+        for asset_id, tools in assets:
+            for tool in set(json.loads(tools) if tools else []):
+                session.add(AssetTool(tool=tool, asset_id=asset_id))
+                added += 1
+            last_id = asset_id
+        session.flush()
+
+    session.commit()
+    logger.info(f"Indexed the tools of {added} asset reports")
+    return added
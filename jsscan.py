@@ -0,0 +1,307 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from policy import tool_policy
+from profiling import span
+from scope import Scope
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.environ.get("RECON_CACHE_DIR", os.path.expanduser("~/.cache/recon")), "js")
+
+FETCH_WORKERS = int(os.environ.get("JS_FETCH_WORKERS", 8))
+FETCH_TIMEOUT = 15  # Seconds per file
+MAX_FILES = int(os.environ.get("JS_MAX_FILES", 500))  # Files fetched per run
+MAX_FILE_SIZE = 5 * 1024 * 1024  # Larger files are truncated
+USER_AGENT = "Mozilla/5.0 (compatible; recon-js-scanner)"
+
+# Bump when the patterns change so cached findings are recomputed
+PATTERNS_VERSION = 2
+
+# Secret patterns, tried before endpoints and subdomains at every position
+SECRET_PATTERNS = {
+    'aws_access_key': r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b',
+    'google_api_key': r'\bAIza[0-9A-Za-z_-]{35}\b',
+    'github_token': r'\bgh[pousr]_[A-Za-z0-9]{36,255}\b',
+    'slack_token': r'\bxox[abposr]-[0-9A-Za-z-]{10,72}\b',
+    'stripe_key': r'\b(?:sk|rk)_live_[0-9A-Za-z]{24,99}\b',
+    'private_key': r'-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----',
+    'jwt': r'\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}',
+    'assignment': (
+        r'\b[\w-]*(?:api[_-]?key|secret|token|passw(?:or)?d|client[_-]?secret)[\w-]*["\']?\s*[:=]\s*'
+        r'["\'][^"\'\s]{8,200}["\']'
+    ),
+}
+
+# Quoted absolute URLs and root-relative paths
+ENDPOINT_PATTERN = r'(?<=["\'`])(?:https?://[^"\'`\s<>]{4,2000}|/[A-Za-z0-9_\-.~%]+(?:/[A-Za-z0-9_\-.~%{}:]*)*(?:\?[^"\'`\s<>]*)?)(?=["\'`])'
+
+SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*\bsrc\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+_patterns = {}
+_patterns_lock = threading.Lock()
+
+
+def combined_pattern(domain: str, endpoints: bool = True) -> re.Pattern:
+    """
+    Build the single-pass pattern matching secrets, endpoints and subdomains of a domain.
+
+    Each alternative is a named group, so one scan over a file yields every
+    finding and match.lastgroup tells which kind it is.
+
+    Args:
+        domain: Target domain
+        endpoints: Include the endpoint alternative; without it the pattern
+            finds the secrets and subdomains inside an endpoint
+
+    Returns:
+        re.Pattern: Compiled pattern, cached per domain
+    """
+    with _patterns_lock:
+        pattern = _patterns.get((domain, endpoints))
+        if pattern is None:
+            subdomain = r'\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+' + re.escape(domain) + r'\b'
+            alternatives = [f"(?P<{name}>{regex})" for name, regex in SECRET_PATTERNS.items()]
+            if endpoints:
+                alternatives.append(f"(?P<endpoint>{ENDPOINT_PATTERN})")
+            alternatives.append(f"(?P<subdomain>{subdomain})")
+            pattern = _patterns[(domain, endpoints)] = re.compile('|'.join(alternatives), re.IGNORECASE)
+        return pattern
+
+
+def is_js_url(url: str) -> bool:
+    """
+    Check whether a URL points at a JavaScript file.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        bool: True for http(s) URLs whose path ends in .js or .mjs
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return parts.scheme in ('http', 'https') and parts.path.lower().endswith(('.js', '.mjs'))
+
+
+def normalize_url(url: str) -> str:
+    """Drop the fragment of a URL so the same file is only fetched once."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ''))
+
+
+def scan_text(text: str, domain: str) -> List[Dict[str, str]]:
+    """
+    Extract findings from JavaScript source.
+
+    Args:
+        text: JavaScript source
+        domain: Target domain subdomains must belong to
+
+    Returns:
+        list: Unique findings as dicts with type, value and, for secrets, kind
+    """
+    findings = {}
+
+    def add(finding_type: str, value: str, **extra: str) -> None:
+        findings.setdefault((finding_type, value), dict(type=finding_type, value=value, **extra))
+
+    def add_match(match: re.Match) -> None:
+        if match.lastgroup == 'subdomain':
+            add('subdomain', match.group().lower())
+        else:
+            add('secret', match.group(), kind=match.lastgroup)
+
+    inner = combined_pattern(domain, endpoints=False)
+    for match in combined_pattern(domain).finditer(text):
+        if match.lastgroup != 'endpoint':
+            add_match(match)
+            continue
+
+        # Matches cannot overlap, so the host and query string of an endpoint
+        # are scanned again for the subdomains and secrets it swallowed
+        add('endpoint', match.group())
+        for inner_match in inner.finditer(match.group()):
+            add_match(inner_match)
+
+    return list(findings.values())
+
+
+class JsScanner:
+    """Fetches JavaScript files concurrently and scans them for secrets, endpoints and subdomains."""
+
+    def __init__(self, target: str, urls: Iterable[str] = (), cache_dir: Optional[str] = None,
+                 workers: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Initialize the JsScanner.
+
+        Args:
+            target: Target domain, or a URL whose host is the target domain
+            urls: URLs discovered by other tools; JavaScript files among them are scanned
+            cache_dir: Directory of findings cached by content hash
+            workers: Number of concurrent fetches
+            timeout: Seconds for the whole run, chosen by the tool policy if omitted
+        """
+        self.base_url = target if target.startswith(('http://', 'https://')) else f"https://{target}"
+        self.domain = (urlsplit(self.base_url).hostname or target).lower()
+        self.urls = list(dict.fromkeys(normalize_url(url) for url in urls if is_js_url(url)))
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.workers = workers or FETCH_WORKERS
+        self.timeout = timeout
+        self.stats = {'files': 0, 'cached': 0, 'failed': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Download a file.
+
+        Args:
+            url: Absolute URL
+
+        Returns:
+            bytes: Body, truncated to MAX_FILE_SIZE
+        """
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            return response.read(MAX_FILE_SIZE)
+
+    def discover(self) -> Optional[List[str]]:
+        """Find the in-scope scripts referenced by the target's landing page, None if it cannot be fetched."""
+        try:
+            page = self.fetch(self.base_url).decode('utf-8', errors='replace')
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.error(f"Error fetching {self.base_url}: {str(e)}")
+            return None
+
+        # Third-party scripts (CDNs, analytics) are out of scope and never fetched
+        scope = Scope([self.domain])
+        scripts = (normalize_url(urljoin(self.base_url, src)) for src in SCRIPT_SRC_RE.findall(page))
+        return list(dict.fromkeys(
+            url for url in scripts if urlsplit(url).scheme in ('http', 'https') and scope.contains(url)
+        ))
+
+    def _cache_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}-{re.sub(r'[^a-z0-9.-]', '_', self.domain)}.json")
+
+    def _cached(self, digest: str) -> Optional[List[Dict[str, str]]]:
+        try:
+            with open(self._cache_path(digest)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry['findings'] if entry.get('version') == PATTERNS_VERSION else None
+
+    def _store(self, digest: str, findings: List[Dict[str, str]]) -> None:
+        path = self._cache_path(digest)
+        # Write then rename so concurrent runs never read a half written cache file
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(partial, 'w') as f:
+                json.dump({'version': PATTERNS_VERSION, 'findings': findings}, f)
+            os.replace(partial, path)
+        except OSError as e:
+            logger.error(f"Error caching JS findings: {str(e)}")
+
+    def scan_file(self, url: str) -> List[Dict[str, str]]:
+        """
+        Fetch one file and scan it, unless its content was scanned before.
+
+        Args:
+            url: JavaScript file URL
+
+        Returns:
+            list: Findings, each with the file it came from as source
+        """
+        try:
+            content = self.fetch(url)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.debug(f"Error fetching {url}: {str(e)}")
+            with self._lock:
+                self.stats['failed'] += 1
+            return []
+
+        digest = hashlib.sha256(content).hexdigest()
+        findings = self._cached(digest)
+        cached = findings is not None
+        if not cached:
+            findings = scan_text(content.decode('utf-8', errors='replace'), self.domain)
+            self._store(digest, findings)
+
+        with self._lock:
+            self.stats['files'] += 1
+            self.stats['cached'] += cached
+            self.stats['bytes'] += len(content)
+
+        return [dict(finding, source=url) for finding in findings]
+
+    def run(self) -> Tuple[bool, List[Dict[str, str]]]:
+        """
+        Scan every JavaScript file, falling back to the scripts of the landing page.
+
+        Files still pending when the run timeout is reached are skipped and
+        the findings gathered so far are returned.
+
+        Returns:
+            tuple: (success (bool), findings (list))
+        """
+        stage = tool_policy.current_stage()
+        timeout = self.timeout or tool_policy.timeout_for('subdomainizer', stage.target_size if stage else 1)
+
+        urls = self.urls or self.discover()
+        if urls is None:
+            return False, []
+        if len(urls) > MAX_FILES:
+            logger.warning(f"Scanning the first {MAX_FILES} of {len(urls)} JavaScript files for {self.domain}")
+            urls = urls[:MAX_FILES]
+
+        started = time.monotonic()
+        findings = {}
+
+        with span('js_scan', files=len(urls)):
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            futures = [executor.submit(self.scan_file, url) for url in urls]
+            done, pending = wait(futures, timeout=timeout)
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        for future in futures:
+            if future not in done:
+                continue
+            if future.exception() is not None:
+                logger.error(f"Error scanning JavaScript file: {str(future.exception())}")
+                continue
+            for finding in future.result():
+                findings.setdefault((finding['type'], finding['value']), finding)
+
+        duration = time.monotonic() - started
+        timed_out = bool(pending)
+        tool_policy.record('subdomainizer', timeout if timed_out else duration, not timed_out,
+                           timed_out=timed_out, target=self.domain)
+
+        if timed_out:
+            logger.warning(f"JS scan of {self.domain} timed out with {len(pending)} files left")
+            if stage:
+                stage.last_timeout = timeout
+                stage.salvaged.append({'command': f"js scan of {len(urls)} files", 'timeout': timeout})
+
+        logger.info(
+            f"Scanned {self.stats['files']} JavaScript files for {self.domain} "
+            f"({self.stats['cached']} cached, {self.stats['failed']} failed) in {duration:.1f}s"
+        )
+        # Only a run where every fetch failed counts as failed
+        return self.stats['files'] > 0 or not urls, list(findings.values())
@@ -1,4 +1,9 @@
-from app import app
+import os
+
+from app import app, scheduler
 
 if __name__ == "__main__":
+    # With the reloader, only the child process serving requests runs scheduled scans
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        scheduler.start()
     app.run(host="0.0.0.0", port=5000, debug=True)
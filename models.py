@@ -7,10 +7,15 @@ class Scan(db.Model):
     id = db.Column(db.String(36), primary_key=True)
     target = db.Column(db.String(255), nullable=False)
     tools = db.Column(db.Text, nullable=False)  # JSON string of tools used
+    scope = db.Column(db.Text)  # JSON string of extra include/exclude scope entries
     status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
     progress = db.Column(db.Integer, default=0)  # 0-100%
     start_time = db.Column(db.DateTime, default=datetime.utcnow)
     end_time = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime)  # Set once results moved to the archive
+    archive_path = db.Column(db.String(512))  # Archive file relative to ARCHIVE_DIR
+    schedule_id = db.Column(db.Integer, index=True)  # ScheduledScan that started the scan, if any
+    heartbeat_at = db.Column(db.DateTime)  # Last sign of life from the process running the scan
     
     def __repr__(self):
         return f'<Scan {self.id} - {self.target}>'
@@ -20,6 +25,11 @@ class Scan(db.Model):
         """Get tools as a list."""
         return json.loads(self.tools)
     
+    @property
+    def scope_dict(self):
+        """Get the extra scope entries as a dict."""
+        return json.loads(self.scope) if self.scope else {'include': [], 'exclude': []}
+    
     @property
     def duration(self):
         """Get the scan duration in seconds."""
@@ -42,6 +52,19 @@ class Scan(db.Model):
         """Check if the scan failed."""
         return self.status == 'failed'
     
+    def to_dict(self):
+        """Get the scan metadata as a JSON serializable dict."""
+        return {
+            'scan_id': self.id,
+            'target': self.target,
+            'tools': self.tools_list,
+            'status': self.status,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'archived': self.archived_at is not None,
+            'schedule_id': self.schedule_id
+        }
+    
     @property
     def formatted_duration(self):
         """Get formatted duration."""
@@ -64,8 +87,217 @@ class ScanResult(db.Model):
     scan_id = db.Column(db.String(36), db.ForeignKey('scan.id', ondelete='CASCADE'), nullable=False)
     tool = db.Column(db.String(50), nullable=False)  # nmap, amass, etc.
     result_type = db.Column(db.String(50), nullable=False)  # subdomain, port, url, etc.
-    data = db.Column(db.Text, nullable=False)  # JSON string of results
+    data = db.Column(db.Text, nullable=False)  # JSON string of results, empty when stored in a blob
+    blob_hash = db.Column(db.String(64), db.ForeignKey('result_blob.hash'), index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    blob = db.relationship('ResultBlob', lazy='joined')
+    
     def __repr__(self):
         return f'<ScanResult {self.id} - {self.tool}>'
+    
+    @property
+    def payload(self):
+        """Get the decoded result data."""
+        from storage import load_result_data
+        return load_result_data(self)
+    
+    def to_dict(self):
+        """Get the result as a JSON serializable dict."""
+        return {
+            'tool': self.tool,
+            'result_type': self.result_type,
+            'data': self.payload,
+            'created_at': self.created_at.isoformat()
+        }
+    
+    def csv_rows(self):
+        """Get the result as CSV rows of tool, type, value and timestamp."""
+        data = self.payload
+        if isinstance(data, list):
+            for item in data:
+                if isinstance(item, dict):
+                    for key, value in item.items():
+                        yield [self.tool, self.result_type, f"{key}: {value}", self.created_at]
+                else:
+                    yield [self.tool, self.result_type, item, self.created_at]
+        elif isinstance(data, dict):
+            for key, value in data.items():
+                yield [self.tool, self.result_type, f"{key}: {value}", self.created_at]
+        else:
+            yield [self.tool, self.result_type, data, self.created_at]
+
+class ResultBlob(db.Model):
+    """Model for compressed, content-addressed result payloads shared across scans."""
+    hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the uncompressed JSON
+    encoding = db.Column(db.String(10), nullable=False)  # zstd, gzip
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer, nullable=False)  # Uncompressed size in bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    used_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last time a result stored or reused the blob
+    
+    def __repr__(self):
+        return f'<ResultBlob {self.hash[:12]} - {self.size} bytes>'
+
+class ScanExport(db.Model):
+    """Model for API payloads and exports materialized once a scan completes."""
+    __table_args__ = (
+        db.UniqueConstraint('scan_id', 'format', name='uq_scan_export'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scan_id = db.Column(db.String(36), db.ForeignKey('scan.id', ondelete='CASCADE'), nullable=False, index=True)
+    format = db.Column(db.String(16), nullable=False)  # results, json, csv
+    etag = db.Column(db.String(64), nullable=False)  # SHA-256 of the uncompressed payload
+    data = db.Column(db.LargeBinary, nullable=False)  # Gzip compressed payload
+    size = db.Column(db.Integer, nullable=False)  # Uncompressed size in bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ScanExport {self.scan_id} - {self.format}>'
+
+class Asset(db.Model):
+    """Model for assets discovered across all scans."""
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'value', name='uq_asset_kind_value'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # hostname, service, url
+    value = db.Column(db.Text, nullable=False)  # admin.example.com, 10.0.0.1:8443/tcp, https://...
+    reversed_value = db.Column(db.Text, index=True)  # Reversed hostname for suffix lookups
+    port = db.Column(db.Integer, index=True)  # Services only
+    service = db.Column(db.String(100), index=True)  # Services only
+    first_seen = db.Column(db.DateTime, nullable=False)
+    last_seen = db.Column(db.DateTime, nullable=False, index=True)
+    seen_count = db.Column(db.Integer, default=0)  # Number of scans that found the asset
+    tools = db.Column(db.Text, nullable=False)  # JSON string of tools that reported the asset
+    
+    def __repr__(self):
+        return f'<Asset {self.kind} {self.value}>'
+    
+    @property
+    def tools_list(self):
+        """Get tools as a list."""
+        return json.loads(self.tools) if self.tools else []
+    
+    def to_dict(self):
+        """Get the asset as a JSON serializable dict."""
+        return {
+            'kind': self.kind,
+            'value': self.value,
+            'port': self.port,
+            'service': self.service,
+            'first_seen': self.first_seen.isoformat() if self.first_seen else None,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'seen_count': self.seen_count,
+            'tools': self.tools_list
+        }
+
+class AssetSighting(db.Model):
+    """Model linking an asset to each scan that found it."""
+    __table_args__ = (
+        db.UniqueConstraint('asset_id', 'scan_id', name='uq_asset_sighting'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id', ondelete='CASCADE'), nullable=False)
+    scan_id = db.Column(db.String(36), db.ForeignKey('scan.id', ondelete='CASCADE'), nullable=False, index=True)
+    seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    tools = db.Column(db.Text)  # JSON string of tools that reported the asset in this scan
+    
+    def __repr__(self):
+        return f'<AssetSighting {self.asset_id} - {self.scan_id}>'
+    
+    @property
+    def tools_list(self):
+        """Get tools as a list."""
+        return json.loads(self.tools) if self.tools else []
+
+class AssetTool(db.Model):
+    """Model indexing which tools reported each asset, for tool filters."""
+    tool = db.Column(db.String(50), primary_key=True)
+    asset_id = db.Column(db.Integer, db.ForeignKey('asset.id', ondelete='CASCADE'), primary_key=True)
+    
+    def __repr__(self):
+        return f'<AssetTool {self.tool} - {self.asset_id}>'
+
+class ScanSummary(db.Model):
+    """Model for per-scan statistics maintained as results are stored."""
+    scan_id = db.Column(db.String(36), db.ForeignKey('scan.id', ondelete='CASCADE'), primary_key=True)
+    data = db.Column(db.Text, nullable=False)  # JSON string of the summary
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ScanSummary {self.scan_id}>'
+    
+    @property
+    def summary_dict(self):
+        """Get the summary as a dict."""
+        return json.loads(self.data) if self.data else {}
+
+class ToolRuntime(db.Model):
+    """Model for recorded tool runtimes used to derive adaptive timeouts."""
+    id = db.Column(db.Integer, primary_key=True)
+    tool = db.Column(db.String(50), nullable=False, index=True)
+    target = db.Column(db.String(255))
+    target_size = db.Column(db.Integer, default=1)  # Addresses or known hosts behind the target
+    duration = db.Column(db.Float, nullable=False)  # Seconds
+    success = db.Column(db.Boolean, nullable=False)
+    timed_out = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<ToolRuntime {self.tool} - {self.duration:.1f}s>'
+
+class ScheduledScan(db.Model):
+    """Model for scans repeated at a fixed interval."""
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(255), nullable=False)
+    tools = db.Column(db.Text, nullable=False)  # JSON string of tools to run
+    scope = db.Column(db.Text)  # JSON string of extra include/exclude scope entries
+    interval = db.Column(db.Integer, nullable=False)  # Seconds between runs
+    jitter = db.Column(db.Integer, default=0)  # Maximum random delay added to each run, in seconds
+    phase = db.Column(db.Integer, default=0)  # Offset of the run grid within the interval, in seconds
+    overlap = db.Column(db.String(10), default='defer')  # skip or defer runs while the previous one is running
+    enabled = db.Column(db.Boolean, default=True, nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_run_at = db.Column(db.DateTime)
+    last_scan_id = db.Column(db.String(36))
+    skipped_runs = db.Column(db.Integer, default=0)
+    deferred_runs = db.Column(db.Integer, default=0)
+    consecutive_deferrals = db.Column(db.Integer, default=0)  # Capacity deferrals since the last run
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ScheduledScan {self.id} - {self.target} every {self.interval}s>'
+    
+    @property
+    def tools_list(self):
+        """Get tools as a list."""
+        return json.loads(self.tools)
+    
+    @property
+    def scope_dict(self):
+        """Get the extra scope entries as a dict."""
+        return json.loads(self.scope) if self.scope else {'include': [], 'exclude': []}
+    
+    def to_dict(self):
+        """Get the schedule as a JSON serializable dict."""
+        return {
+            'id': self.id,
+            'target': self.target,
+            'tools': self.tools_list,
+            'scope': self.scope_dict,
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'phase': self.phase,
+            'overlap': self.overlap,
+            'enabled': self.enabled,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_scan_id': self.last_scan_id,
+            'skipped_runs': self.skipped_runs or 0,
+            'deferred_runs': self.deferred_runs or 0,
+            'consecutive_deferrals': self.consecutive_deferrals or 0
+        }
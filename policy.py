@@ -0,0 +1,286 @@
+import os
+import re
+import math
+import random
+import logging
+import datetime
+import threading
+import contextlib
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Timeouts used until a tool has enough recorded runs
+DEFAULT_TIMEOUT = 300
+DEFAULT_TIMEOUTS = {
+    'amass': 600,
+    'crt': 60,
+    'assetfinder': 120,
+}
+
+MIN_TIMEOUT = int(os.environ.get("TOOL_MIN_TIMEOUT", 30))
+MAX_TIMEOUT = int(os.environ.get("TOOL_MAX_TIMEOUT", 4 * 3600))
+
+# Tools whose runtime grows with the target: nmap with the addresses of a
+# batch, brute-force shards with their words. Every other tool makes a fixed
+# number of upstream queries per target and is never scaled
+SIZE_SCALED_TOOLS = {'nmap', 'shuffledns_shard'}
+
+# Single-query lookups that should finish in seconds; a hung run is cut off here
+FAST_TOOLS = {'crt', 'assetfinder'}
+FAST_TOOL_MAX_TIMEOUT = int(os.environ.get("FAST_TOOL_MAX_TIMEOUT", 180))
+
+# Runtime distribution settings
+HISTORY_SIZE = 200  # Runs kept per tool
+MIN_SAMPLES = 5  # Runs needed before observed percentiles replace defaults
+PERCENTILE = 95
+HEADROOM = 1.5  # Multiplier applied on top of the percentile
+TIMEOUT_GROWTH = 2.0  # Multiplier after the previous run of a tool timed out
+
+# Retry settings for transient failures
+MAX_ATTEMPTS = int(os.environ.get("TOOL_MAX_ATTEMPTS", 3))
+BACKOFF_BASE = 2.0  # Seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 60.0
+
+TRANSIENT_ERROR_RE = re.compile(
+    r'temporary failure in name resolution|connection (?:reset|refused|timed out)|'
+    r'network is unreachable|too many requests|\b429\b|\b50[234]\b|rate limit|'
+    r'could not resolve host|tls handshake timeout|i/o timeout',
+    re.IGNORECASE
+)
+
+
+def size_factor(tool: str, target_size: int) -> float:
+    """
+    Scale factor for a run of a tool on a target of the given size.
+
+    Runtimes of the tools in SIZE_SCALED_TOOLS grow with target size, but
+    less than linearly since part of each run is fixed overhead.
+
+    Args:
+        tool: Tool name
+        target_size: Number of addresses or words the run covers
+
+    Returns:
+        float: Scale factor, 1.0 for tools that are not size scaled
+    """
+    if tool not in SIZE_SCALED_TOOLS:
+        return 1.0
+    return math.sqrt(max(target_size, 1))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value
+    """
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))) - 1, 0)
+    return ordered[rank]
+
+
+class ToolStage:
+    """Context of the tool stage running on the current thread."""
+
+    def __init__(self, tool: str, target: str = '', target_size: int = 1,
+                 limiter_keys: Optional[List[str]] = None):
+        self.tool = tool
+        self.target = target
+        self.target_size = target_size
+        self.limiter_keys = limiter_keys or []  # Rate limiter keys held by the stage
+        self.launches = 0  # Commands started so far
+        self.last_timeout = None  # Timeout of the most recent command that timed out
+        self.salvaged = []  # Commands whose partial output was kept after a timeout
+
+
+class ToolPolicy:
+    """Adaptive timeout and retry policy driven by recorded tool runtimes."""
+
+    def __init__(self):
+        """Initialize the ToolPolicy class."""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # {tool: deque of (normalized duration, timed out)}
+        self._history = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+        self._last_timed_out = {}
+        self._pending = []
+
+    @contextlib.contextmanager
+    def stage(self, tool: str, target: str = '', target_size: int = 1,
+              limiter_keys: Optional[List[str]] = None) -> Iterator[ToolStage]:
+        """
+        Mark the current thread as running a tool stage.
+
+        Commands run inside the block are attributed to the tool and use its
+        timeout and retry policy.
+
+        Args:
+            tool: Tool name
+            target: Target passed to the tool
+            target_size: Number of addresses or words the run covers
+            limiter_keys: Rate limiter keys every command launch must take a token from
+
+        Yields:
+            ToolStage: Stage context, with salvaged runs filled in afterwards
+        """
+        previous = getattr(self._local, 'stage', None)
+        self._local.stage = ToolStage(tool, target, target_size, limiter_keys)
+        try:
+            yield self._local.stage
+        finally:
+            self._local.stage = previous
+
+    def current_stage(self) -> Optional[ToolStage]:
+        """Get the tool stage running on the current thread, if any."""
+        return getattr(self._local, 'stage', None)
+
+    def timeout_for(self, tool: str, target_size: int = 1) -> int:
+        """
+        Compute the timeout for the next run of a tool.
+
+        Args:
+            tool: Tool name
+            target_size: Number of addresses or words the run covers
+
+        Returns:
+            int: Timeout in seconds
+        """
+        with self._lock:
+            samples = list(self._history.get(tool, ()))
+            last_timed_out = self._last_timed_out.get(tool, False)
+
+        if len(samples) < MIN_SAMPLES:
+            timeout = DEFAULT_TIMEOUTS.get(tool, DEFAULT_TIMEOUT) * size_factor(tool, target_size)
+        else:
+            observed = percentile([duration for duration, _ in samples], PERCENTILE)
+            timeout = observed * size_factor(tool, target_size) * HEADROOM
+
+        if last_timed_out:
+            timeout *= TIMEOUT_GROWTH
+
+        limit = FAST_TOOL_MAX_TIMEOUT if tool in FAST_TOOLS else MAX_TIMEOUT
+        return int(min(max(timeout, MIN_TIMEOUT), limit))
+
+    def record(self, tool: str, duration: float, success: bool, timed_out: bool = False,
+               target: str = '', target_size: int = 1) -> None:
+        """
+        Record a finished tool run.
+
+        Timed out runs are kept as censored samples at their timeout so the
+        distribution moves upwards instead of ignoring them.
+
+        Args:
+            tool: Tool name
+            duration: Wall clock runtime in seconds
+            success: Whether the run succeeded
+            timed_out: Whether the run was killed by its timeout
+            target: Target passed to the tool
+            target_size: Number of addresses or words the run covers
+        """
+        with self._lock:
+            if success or timed_out:
+                self._history[tool].append((duration / size_factor(tool, target_size), timed_out))
+            self._last_timed_out[tool] = timed_out
+            self._pending.append({
+                'tool': tool,
+                'target': target,
+                'target_size': target_size,
+                'duration': duration,
+                'success': success,
+                'timed_out': timed_out,
+                'created_at': datetime.datetime.utcnow()
+            })
+
+    def is_transient(self, output: str) -> bool:
+        """
+        Check whether a failed run looks like a transient error worth retrying.
+
+        Args:
+            output: Error output of the failed run
+
+        Returns:
+            bool: True if the failure is likely transient
+        """
+        return bool(output and TRANSIENT_ERROR_RE.search(output))
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retrying a failed run.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 1
+
+        Returns:
+            float: Delay in seconds, with full jitter
+        """
+        return random.uniform(0, min(BACKOFF_BASE * (2 ** (attempt - 1)), BACKOFF_MAX))
+
+    def load(self, session) -> None:
+        """
+        Seed runtime distributions from the database.
+
+        Args:
+            session: SQLAlchemy session
+        """
+        from models import ToolRuntime
+
+        runs = (
+            session.query(ToolRuntime)
+            .order_by(ToolRuntime.created_at.desc())
+            .limit(HISTORY_SIZE * 20)
+            .all()
+        )
+
+        with self._lock:
+            for run in reversed(runs):
+                if run.success or run.timed_out:
+                    self._history[run.tool].append(
+                        (run.duration / size_factor(run.tool, run.target_size or 1), run.timed_out)
+                    )
+                self._last_timed_out[run.tool] = run.timed_out
+
+        logger.debug(f"Loaded {len(runs)} tool runtimes")
+
+    def flush(self, session) -> None:
+        """
+        Persist runtimes recorded since the last flush.
+
+        Args:
+            session: SQLAlchemy session
+        """
+        from models import ToolRuntime
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending:
+            return
+
+        try:
+            session.add_all([ToolRuntime(**run) for run in pending])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error saving tool runtimes: {str(e)}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get current timeouts and sample counts for every known tool."""
+        with self._lock:
+            tools = sorted(set(self._history) | set(DEFAULT_TIMEOUTS))
+            counts = {tool: len(self._history.get(tool, ())) for tool in tools}
+        return {
+            tool: {'samples': counts[tool], 'timeout': self.timeout_for(tool)}
+            for tool in tools
+        }
+
+
+# Shared by ToolExecutor and the Scanner
+tool_policy = ToolPolicy()
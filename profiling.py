@@ -0,0 +1,322 @@
+import os
+import re
+import hmac
+import json
+import hashlib
+import time
+import pstats
+import logging
+import cProfile
+import datetime
+import threading
+import contextlib
+from io import StringIO
+from typing import Any, Dict, Iterator, List, Optional
+
+# OpenTelemetry is optional; spans are also exported through it when installed
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Secret a request or scan must present to be profiled. Without it profiling
+# is only available when PROFILING_ENABLED is set, e.g. in development
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ('1', 'true', 'yes')
+
+# Seconds the signed view and download links of the profiles page stay valid
+PROFILE_LINK_SECONDS = int(os.environ.get("PROFILE_LINK_SECONDS", 300))
+
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 200))  # Newest profiles kept on disk
+TOP_FUNCTIONS = 25  # Functions listed in the index of each profile
+
+NAME_RE = re.compile(r'^[\w.-]+$')
+
+# Links are signed with a key derived from the token, never the token itself;
+# without a token they are only valid in the process that signed them
+_LINK_KEY = hashlib.sha256(b'profile-link:' + PROFILE_TOKEN.encode()).digest() if PROFILE_TOKEN else os.urandom(32)
+
+
+def profiling_allowed(value: Optional[str]) -> bool:
+    """
+    Check whether a profiling trigger may start a profile.
+
+    Args:
+        value: Header, query parameter or scan option value
+
+    Returns:
+        bool: True if the value matches PROFILE_TOKEN, or profiling is enabled without a token
+    """
+    if not value:
+        return False
+    if PROFILE_TOKEN:
+        return hmac.compare_digest(value, PROFILE_TOKEN)
+    return PROFILING_ENABLED
+
+
+def sign_profile_link(name: str, now: Optional[float] = None) -> Dict[str, str]:
+    """
+    Sign a short-lived link to one stored profile.
+
+    Args:
+        name: Profile name
+        now: Current epoch time
+
+    Returns:
+        dict: expires and signature query parameters
+    """
+    expires = str(int((now or time.time()) + PROFILE_LINK_SECONDS))
+    signature = hmac.new(_LINK_KEY, f"{name}:{expires}".encode(), hashlib.sha256).hexdigest()
+    return {'expires': expires, 'signature': signature}
+
+
+def profile_link_valid(name: str, expires: Optional[str], signature: Optional[str]) -> bool:
+    """
+    Check a signed profile link.
+
+    Args:
+        name: Profile name in the link
+        expires: expires query parameter
+        signature: signature query parameter
+
+    Returns:
+        bool: True if the signature matches the profile and has not expired
+    """
+    if not expires or not signature or not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(_LINK_KEY, f"{name}:{expires}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class Profile:
+    """A cProfile run of one request or scan, with the spans recorded during it."""
+
+    def __init__(self, kind: str, label: str):
+        self.kind = kind
+        self.label = label
+        self.started_at = datetime.datetime.utcnow()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.depth = 0
+        self.profile = cProfile.Profile()
+
+
+class Profiler:
+    """
+    Runs at most one profile of each kind per process so profiling never piles up under load.
+
+    Requests and scans have separate slots, so a long scan profile never
+    keeps requests from being profiled.
+    """
+
+    def __init__(self):
+        """Initialize the Profiler class."""
+        self._locks = {'request': threading.Lock(), 'scan': threading.Lock()}
+        self._local = threading.local()
+
+    def current(self) -> Optional[Profile]:
+        """Get the profile running on the current thread, if any."""
+        return getattr(self._local, 'profile', None)
+
+    def start(self, kind: str, label: str) -> Optional[Profile]:
+        """
+        Start profiling the current thread.
+
+        Args:
+            kind: What is profiled (request, scan)
+            label: Request path or scan id
+
+        Returns:
+            Profile: Running profile, or None if another profile of the kind is already running
+        """
+        lock = self._locks[kind]
+        if not lock.acquire(blocking=False):
+            logger.info(f"Skipping profile of {kind} {label}, another {kind} profile is running")
+            return None
+
+        profile = Profile(kind, label)
+        try:
+            profile.profile.enable()
+        except ValueError as e:
+            # Python 3.12+ allows only one active cProfile per process
+            lock.release()
+            logger.info(f"Skipping profile of {kind} {label}: {str(e)}")
+            return None
+        self._local.profile = profile
+        return profile
+
+    def stop(self, profile: Profile) -> Optional[str]:
+        """
+        Stop a profile and write it to PROFILE_DIR.
+
+        Args:
+            profile: Profile returned by start()
+
+        Returns:
+            str: Profile name, or None if it could not be written
+        """
+        profile.profile.disable()
+        profile.duration = time.perf_counter() - profile.started
+        self._local.profile = None
+        self._locks[profile.kind].release()
+
+        try:
+            return self._write(profile)
+        except Exception as e:
+            logger.error(f"Error writing profile of {profile.kind} {profile.label}: {str(e)}")
+            return None
+
+    @contextlib.contextmanager
+    def profile(self, kind: str, label: str) -> Iterator[Optional[Profile]]:
+        """
+        Profile the block on the current thread.
+
+        Args:
+            kind: What is profiled (request, scan)
+            label: Request path or scan id
+
+        Yields:
+            Profile: Running profile, or None if another profile is already running
+        """
+        profile = self.start(kind, label)
+        try:
+            yield profile
+        finally:
+            if profile is not None:
+                self.stop(profile)
+
+    def _write(self, profile: Profile) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+        slug = re.sub(r'[^\w.-]+', '_', profile.label).strip('_')[:60] or 'root'
+        name = f"{profile.started_at.strftime('%Y%m%dT%H%M%S%f')}-{profile.kind}-{slug}"
+
+        profile.profile.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+
+        stats = pstats.Stats(profile.profile)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+
+        with open(os.path.join(PROFILE_DIR, f"{name}.json"), 'w') as f:
+            json.dump({
+                'name': name,
+                'kind': profile.kind,
+                'label': profile.label,
+                'started_at': profile.started_at.isoformat(),
+                'duration': round(profile.duration, 4),
+                'spans': profile.spans,
+                'top': [{
+                    'function': f"{filename}:{line}({function})",
+                    'calls': calls,
+                    'total': round(total, 4),
+                    'cumulative': round(cumulative, 4)
+                } for (filename, line, function), (_, calls, total, cumulative, _) in top]
+            }, f)
+
+        self._prune()
+        logger.info(f"Wrote profile {name} ({profile.duration:.3f}s)")
+        return name
+
+    def _prune(self) -> None:
+        names = sorted(f[:-5] for f in os.listdir(PROFILE_DIR) if f.endswith('.json'))
+        for name in names[:-PROFILE_KEEP] if len(names) > PROFILE_KEEP else []:
+            for extension in ('.json', '.prof'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(PROFILE_DIR, name + extension))
+
+    def path(self, name: str) -> str:
+        """
+        Get the cProfile dump of a profile.
+
+        Args:
+            name: Profile name
+
+        Returns:
+            str: Path of the .prof file
+
+        Raises:
+            ValueError: If the name is not a valid profile name
+        """
+        if not NAME_RE.match(name):
+            raise ValueError(f"Invalid profile name: {name}")
+        return os.path.join(PROFILE_DIR, f"{name}.prof")
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Get the metadata of every stored profile, newest first."""
+        if not os.path.isdir(PROFILE_DIR):
+            return []
+
+        profiles = []
+        for filename in sorted(os.listdir(PROFILE_DIR), reverse=True):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(PROFILE_DIR, filename)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading profile {filename}: {str(e)}")
+        return profiles
+
+    def stats_text(self, name: str, sort: str = 'cumulative', limit: int = 60) -> str:
+        """
+        Render a stored profile as pstats text.
+
+        Args:
+            name: Profile name
+            sort: pstats sort key (cumulative, tottime, calls)
+            limit: Number of functions to print
+
+        Returns:
+            str: Report text
+        """
+        output = StringIO()
+        stats = pstats.Stats(self.path(name), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """
+    Time a block as a tracing span.
+
+    Spans are recorded in the profile running on the current thread and
+    exported to OpenTelemetry when it is installed; otherwise they only cost
+    a clock read.
+
+    Args:
+        name: Span name, e.g. tool.nmap
+        **attributes: Extra span attributes
+    """
+    profile = profiler.current()
+    otel_span = (
+        otel_trace.get_tracer(__name__).start_as_current_span(name, attributes=attributes)
+        if otel_trace is not None else contextlib.nullcontext()
+    )
+
+    started = time.perf_counter()
+    if profile is not None:
+        profile.depth += 1
+    try:
+        with otel_span:
+            yield
+    finally:
+        duration = time.perf_counter() - started
+        if profile is not None:
+            profile.depth -= 1
+            profile.spans.append({
+                'name': name,
+                'depth': profile.depth,
+                'start': round(started - profile.started, 4),
+                'duration': round(duration, 4),
+                'attributes': {key: str(value) for key, value in attributes.items()}
+            })
+
+
+# Shared by the request hooks in app.py and the Scanner
+profiler = Profiler()
@@ -0,0 +1,299 @@
+import re
+import time
+import logging
+import threading
+import contextlib
+from typing import Any, Dict, Iterator, List, Optional
+
+from scope import parse_target
+
+# tldextract is optional; its bundled public suffix list is used when installed
+try:
+    import tldextract
+except ImportError:
+    tldextract = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Upstream services each tool queries. Tools sharing a source share its limits
+TOOL_SOURCES = {
+    'crt': ['crt.sh'],
+    'amass': ['passive'],
+    'sublist3r': ['passive'],
+    'assetfinder': ['passive'],
+    'subfinder': ['passive'],
+    'gau': ['archives'],
+    'shuffledns': ['resolvers'],
+}
+
+# Tools that send traffic to the target itself
+TARGET_TOOLS = {'nmap', 'gospider', 'subdomainizer', 'shuffledns'}
+
+# (launches per second, burst capacity, max concurrent runs)
+SOURCE_LIMITS = {
+    'crt.sh': (1 / 10.0, 2, 1),
+    'passive': (1 / 2.0, 4, 4),
+    'archives': (1 / 5.0, 2, 2),
+    'resolvers': (1 / 2.0, 2, 2),
+}
+TARGET_LIMITS = (1 / 5.0, 2, 2)
+
+# Seconds a source is paused after it reports throttling
+PENALTY_SECONDS = 30.0
+
+THROTTLED_RE = re.compile(r'\b429\b|too many requests|rate limit', re.IGNORECASE)
+
+# Second-level labels that registries under country code TLDs hand out
+# domains below (example.co.uk, example.com.au), used without tldextract
+COUNTRY_SECOND_LEVELS = {'ac', 'co', 'com', 'edu', 'gov', 'govt', 'gob', 'go', 'ltd', 'me', 'mil',
+                         'ne', 'net', 'nic', 'nom', 'or', 'org', 'plc', 'sch'}
+
+# Offline extractor, never fetches a fresh suffix list at runtime
+_extract = tldextract.TLDExtract(suffix_list_urls=()) if tldextract else None
+
+
+class TokenBucket:
+    """Token bucket with a cap on concurrent holders."""
+
+    def __init__(self, rate: float, capacity: float, max_concurrent: int):
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens
+            max_concurrent: Maximum number of runs holding the bucket at once
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.max_concurrent = max_concurrent
+        self.tokens = capacity
+        self.active = 0
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float, hold: bool) -> float:
+        """
+        Seconds until a token can be taken, 0 if one is available now.
+
+        Args:
+            now: Current monotonic time
+            hold: Whether the caller also needs a concurrency slot
+        """
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if hold and self.active >= self.max_concurrent:
+            # Woken up by release(); poll occasionally in case of lost wakeups
+            return 1.0
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def take(self, hold: bool) -> None:
+        """Consume a token and optionally a concurrency slot."""
+        self.tokens -= 1
+        if hold:
+            self.active += 1
+
+    def state(self) -> Dict[str, Any]:
+        """Get the bucket state for reporting."""
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            'tokens': round(self.tokens, 2),
+            'capacity': self.capacity,
+            'rate': self.rate,
+            'active': self.active,
+            'max_concurrent': self.max_concurrent,
+            'paused_for': round(max(self.blocked_until - now, 0.0), 1)
+        }
+
+
+class RateLimiter:
+    """Shared limiter keyed by upstream source and by target network."""
+
+    def __init__(self):
+        """Initialize the RateLimiter class."""
+        self._condition = threading.Condition()
+        self._buckets = {}
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            kind, name = key.split(':', 1)
+            limits = SOURCE_LIMITS.get(name, TARGET_LIMITS) if kind == 'source' else TARGET_LIMITS
+            bucket = self._buckets[key] = TokenBucket(*limits)
+        return bucket
+
+    def acquire(self, keys: List[str], hold: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every key has a token available, then take them together.
+
+        Taking all tokens at once means a tool never sits on one source's
+        token while waiting for another.
+
+        Args:
+            keys: Limiter keys
+            hold: Also take a concurrency slot on each key, released by release()
+            timeout: Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            bool: True if acquired, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                buckets = [self._bucket(key) for key in keys]
+                wait = max([bucket.wait_time(now, hold) for bucket in buckets] or [0.0])
+
+                if wait <= 0:
+                    for bucket in buckets:
+                        bucket.take(hold)
+                    return True
+
+                if deadline is not None:
+                    if now >= deadline:
+                        return False
+                    wait = min(wait, deadline - now)
+
+                self._condition.wait(wait)
+
+    def release(self, keys: List[str]) -> None:
+        """
+        Release concurrency slots taken with acquire(hold=True).
+
+        Args:
+            keys: Limiter keys
+        """
+        with self._condition:
+            for key in keys:
+                bucket = self._bucket(key)
+                bucket.active = max(bucket.active - 1, 0)
+            self._condition.notify_all()
+
+    def penalize(self, keys: List[str], seconds: float = PENALTY_SECONDS) -> None:
+        """
+        Pause keys after an upstream reported throttling.
+
+        Args:
+            keys: Limiter keys
+            seconds: Pause length
+        """
+        with self._condition:
+            until = time.monotonic() + seconds
+            for key in keys:
+                bucket = self._bucket(key)
+                bucket.blocked_until = max(bucket.blocked_until, until)
+                bucket.tokens = min(bucket.tokens, 0)
+        logger.warning(f"Pausing {', '.join(keys)} for {seconds:.0f}s after throttling")
+
+    @contextlib.contextmanager
+    def slot(self, keys: List[str]) -> Iterator[float]:
+        """
+        Hold a launch slot on every key for the duration of a tool run.
+
+        Args:
+            keys: Limiter keys
+
+        Yields:
+            float: Seconds spent waiting for the slot
+        """
+        started = time.monotonic()
+        self.acquire(keys, hold=True)
+        try:
+            yield time.monotonic() - started
+        finally:
+            self.release(keys)
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every bucket."""
+        with self._condition:
+            return {key: bucket.state() for key, bucket in sorted(self._buckets.items())}
+
+
+def is_throttled(output: str) -> bool:
+    """
+    Check whether tool output says an upstream throttled the request.
+
+    Args:
+        output: Tool output or error text
+
+    Returns:
+        bool: True if the output reports throttling
+    """
+    return bool(output and THROTTLED_RE.search(output))
+
+
+def registrable_domain(domain: str) -> str:
+    """
+    Get the domain registered under a public suffix.
+
+    Uses the public suffix list when tldextract is installed, otherwise
+    treats the common second-level labels of country code TLDs as part of
+    the suffix.
+
+    Args:
+        domain: Lower case hostname
+
+    Returns:
+        str: Registrable domain, e.g. example.co.uk for a.b.example.co.uk
+    """
+    if _extract is not None:
+        return _extract(domain).registered_domain or domain
+
+    labels = domain.split('.')
+    suffix_length = 2 if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in COUNTRY_SECOND_LEVELS else 1
+    return '.'.join(labels[-(suffix_length + 1):])
+
+
+def target_key(target: str) -> str:
+    """
+    Group a target with its neighbours for per-target limits.
+
+    Args:
+        target: Domain, IP or CIDR range
+
+    Returns:
+        str: Limiter key for the target's /24 (IPv4), /64 (IPv6) or registrable domain
+    """
+    kind, value = parse_target(target)
+
+    if kind in ('ip', 'network'):
+        prefix = 24 if value.version == 4 else 64
+        if value.prefixlen >= prefix:
+            value = value.supernet(new_prefix=prefix)
+        return f"target:{value}"
+
+    if kind in ('domain', 'wildcard'):
+        return f"target:{registrable_domain(value)}"
+
+    return f"target:{target}"
+
+
+def limiter_keys(tool: str, target: str) -> List[str]:
+    """
+    Get the limiter keys a tool run must hold.
+
+    Args:
+        tool: Tool name
+        target: Target passed to the tool
+
+    Returns:
+        list: Keys in a stable order
+    """
+    keys = [f"source:{source}" for source in TOOL_SOURCES.get(tool, [])]
+    if tool in TARGET_TOOLS:
+        keys.append(target_key(target))
+    return sorted(keys)
+
+
+# Shared by every scan in the process
+rate_limiter = RateLimiter()
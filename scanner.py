@@ -3,8 +3,21 @@ import logging
 import json
 import datetime
 import time
-from typing import List, Dict, Any, Union
+import hashlib
+from typing import List, Dict, Any, Union, Optional, Callable
+from sqlalchemy.exc import IntegrityError
 from utils import ToolExecutor
+from jsscan import is_js_url
+from scope import Scope, batch_network, parse_target, tool_target
+from policy import tool_policy
+from ratelimit import rate_limiter, limiter_keys
+from singleflight import tool_runs
+from storage import store_result_data
+from inventory import record_assets
+from search import index_result
+from exports import materialize_exports
+from summary import update_summary
+from profiling import profiler, span
 from app import db
 from models import Scan, ScanResult
 
@@ -19,36 +32,116 @@ class Scanner:
         """Initialize the Scanner class."""
         self.tool_executor = ToolExecutor()
         self.active_scans = {}
+        self._stopping = threading.Event()
+    
+    @property
+    def stopping(self) -> bool:
+        """Whether the scanner is shutting down and refuses new scans."""
+        return self._stopping.is_set()
+    
+    def shutdown(self, timeout: float = 60.0) -> List[str]:
+        """
+        Stop accepting scans and wait for running ones to finish.
+        
+        Running scans finish their current tool and skip the rest. Scans
+        still running after the timeout are marked failed, since their
+        threads die with the process.
+        
+        Args:
+            timeout: Maximum seconds to wait for running scans
+            
+        Returns:
+            list: IDs of the scans that were interrupted
+        """
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        
+        for scan in list(self.active_scans.values()):
+            scan['thread'].join(max(deadline - time.monotonic(), 0))
+        
+        interrupted = list(self.active_scans)
+        for scan_id in interrupted:
+            logger.warning(f"Scan {scan_id} still running at shutdown, marking it failed")
+            self._add_scan_result(scan_id, 'system', 'error', {
+                'message': 'Interrupted by server shutdown'
+            })
+            self._update_scan_status(scan_id, 'failed', 100)
+        
+        self._save_tool_runtimes()
+        return interrupted
 
-    def start_scan_async(self, scan_id: str, target: str, selected_tools: List[str]) -> None:
+    def heartbeat(self) -> None:
+        """Mark the scans running in this process as alive, so they can be told from scans orphaned by a crash."""
+        scan_ids = list(self.active_scans)
+        if not scan_ids:
+            return
+        
+        try:
+            from app import app
+            with app.app_context():
+                Scan.query.filter(Scan.id.in_(scan_ids)).update(
+                    {'heartbeat_at': datetime.datetime.utcnow()}, synchronize_session=False
+                )
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Error recording scan heartbeats: {str(e)}")
+
+    def start_scan_async(self, scan_id: str, target: str, selected_tools: List[str],
+                         scope: Optional[Dict[str, List[str]]] = None, profile: bool = False) -> None:
         """
         Start a scan asynchronously.
         
         Args:
             scan_id: Unique scan identifier
-            target: Target domain or IP
+            target: Target domain, IP or CIDR range
             selected_tools: List of tools to run
+            scope: Extra include/exclude scope entries
+            profile: Profile the scan thread and record its tool stage spans
+            
+        Raises:
+            RuntimeError: If the scanner is shutting down
         """
+        if self.stopping:
+            raise RuntimeError("Scanner is shutting down")
+        
         # Start a new thread for the scan
         scan_thread = threading.Thread(
             target=self._run_scan,
             args=(scan_id, target, selected_tools)
         )
         scan_thread.daemon = True
-        scan_thread.start()
         
-        # Track the active scan
+        # Track the active scan before the thread can look it up
         self.active_scans[scan_id] = {
             'thread': scan_thread,
             'start_time': datetime.datetime.utcnow(),
             'target': target,
             'tools': selected_tools,
+            'scope': Scope.from_dict(scope, target),
+            'profile': profile,
             'status': 'running'
         }
         
+        scan_thread.start()
+        
         logger.info(f"Started async scan {scan_id} for target {target}")
 
     def _run_scan(self, scan_id: str, target: str, selected_tools: List[str]) -> None:
+        """
+        Run a scan, profiling it when requested.
+        
+        Args:
+            scan_id: Unique scan identifier
+            target: Target domain or IP
+            selected_tools: List of tools to run
+        """
+        if self.active_scans.get(scan_id, {}).get('profile'):
+            with profiler.profile('scan', scan_id):
+                self._execute_scan(scan_id, target, selected_tools)
+        else:
+            self._execute_scan(scan_id, target, selected_tools)
+
+    def _execute_scan(self, scan_id: str, target: str, selected_tools: List[str]) -> None:
         """
         Run the actual scan with all selected tools.
         
@@ -71,6 +164,7 @@ class Scanner:
             
             total_tools = len(selected_tools)
             completed_tools = 0
+            target_size = self._target_size(target)
             
             # Define mapping of tool names to functions
             tool_functions = {
@@ -86,17 +180,37 @@ class Scanner:
                 'subdomainizer': self._run_subdomainizer
             }
             
+            # The JS scanner reads the URLs found by gau and gospider, so it runs after them
+            if 'subdomainizer' in selected_tools:
+                selected_tools = [tool for tool in selected_tools if tool != 'subdomainizer'] + ['subdomainizer']
+            
             # Run each selected tool
             for tool in selected_tools:
+                if self.stopping:
+                    logger.warning(f"Stopping scan {scan_id} before {tool}, server is shutting down")
+                    self._add_scan_result(scan_id, 'system', 'error', {
+                        'message': 'Interrupted by server shutdown'
+                    })
+                    self._update_scan_status(scan_id, 'failed', int((completed_tools / total_tools) * 100))
+                    return
+                
                 if tool in tool_functions:
                     try:
                         # Update progress
                         progress = int((completed_tools / total_tools) * 100)
                         self._update_scan_status(scan_id, 'running', progress)
                         
-                        # Run the tool
+                        # Run the tool, launches wait for the shared per-source and per-target limits
+                        keys = limiter_keys(tool, tool_target(target))
                         logger.info(f"Running {tool} for scan {scan_id}")
-                        tool_functions[tool](scan_id, target)
+                        with span(f"tool.{tool}", scan_id=scan_id), \
+                                tool_policy.stage(tool, target, target_size, keys) as stage:
+                            tool_functions[tool](scan_id, tool_target(target))
+                        
+                        for run in stage.salvaged:
+                            self._add_scan_result(scan_id, tool, 'error', {
+                                'message': f"Timed out after {run['timeout']}s, partial results were kept"
+                            })
                         
                         completed_tools += 1
                     except Exception as e:
@@ -104,6 +218,8 @@ class Scanner:
                         self._add_scan_result(scan_id, tool, 'error', {
                             'message': f"Error: {str(e)}"
                         })
+                    finally:
+                        self._save_tool_runtimes()
                 else:
                     logger.warning(f"Unknown tool {tool} for scan {scan_id}")
                     self._add_scan_result(scan_id, tool, 'error', {
@@ -122,9 +238,36 @@ class Scanner:
                 'message': f"Error: {str(e)}"
             })
         
-        # Remove from active scans
-        if scan_id in self.active_scans:
-            del self.active_scans[scan_id]
+        finally:
+            # Remove from active scans
+            self.active_scans.pop(scan_id, None)
+
+    def _target_size(self, target: str) -> int:
+        """
+        Get the size of a target for timeout scaling.
+        
+        Only network targets have a size; a domain is a single host to nmap,
+        and brute-force shards are sized by their own words.
+        
+        Args:
+            target: Target domain, IP or CIDR range
+            
+        Returns:
+            int: Number of addresses, 1 for domains
+        """
+        kind, value = parse_target(target)
+        if kind in ('ip', 'network'):
+            return value.num_addresses
+        return 1
+
+    def _save_tool_runtimes(self) -> None:
+        """Persist tool runtimes recorded by the tool policy."""
+        try:
+            from app import app
+            with app.app_context():
+                tool_policy.flush(db.session)
+        except Exception as e:
+            logger.error(f"Error saving tool runtimes: {str(e)}")
 
     def _update_scan_status(self, scan_id: str, status: str, progress: int) -> None:
         """
@@ -143,12 +286,21 @@ class Scanner:
                 if scan:
                     scan.status = status
                     scan.progress = progress
+                    scan.heartbeat_at = datetime.datetime.utcnow()
                     
                     if status in ['completed', 'failed']:
                         scan.end_time = datetime.datetime.utcnow()
                     
                     db.session.commit()
                     logger.debug(f"Updated scan {scan_id} status to {status}, progress: {progress}%")
+                    
+                    # Results of completed scans never change, render their payloads once
+                    if status == 'completed':
+                        try:
+                            materialize_exports(db.session, scan)
+                        except Exception as e:
+                            db.session.rollback()
+                            logger.error(f"Error materializing exports for {scan_id}: {str(e)}")
                 else:
                     logger.error(f"Scan {scan_id} not found in database when updating status")
         except Exception as e:
@@ -166,25 +318,133 @@ class Scanner:
         """
         try:
             from app import app
-            with app.app_context():
+            with app.app_context(), span('store_result', tool=tool, result_type=result_type):
                 from models import ScanResult
                 
-                result = ScanResult(
-                    scan_id=scan_id,
-                    tool=tool,
-                    result_type=result_type,
-                    data=json.dumps(data)
-                )
-                
-                db.session.add(result)
-                db.session.commit()
+                # Retry once if a concurrent scan stored the same blob or asset first
+                for attempt in range(2):
+                    try:
+                        result = ScanResult(
+                            scan_id=scan_id,
+                            tool=tool,
+                            result_type=result_type,
+                            **store_result_data(db.session, data)
+                        )
+                        
+                        db.session.add(result)
+                        changes = []
+                        if result_type != 'error':
+                            record_assets(db.session, scan_id, tool, result_type, data, changes=changes)
+                        update_summary(db.session, scan_id, tool, result_type, changes)
+                        
+                        # Flush to assign the result id referenced by the search index
+                        db.session.flush()
+                        scan = db.session.get(Scan, scan_id)
+                        index_result(db.session, result, scan.target if scan else '', data)
+                        db.session.commit()
+                        break
+                    except IntegrityError:
+                        db.session.rollback()
+                        if attempt:
+                            raise
                 logger.debug(f"Added {tool} result for scan {scan_id}")
         except Exception as e:
             logger.error(f"Error adding scan result for {scan_id}: {str(e)}")
 
+    def _tool_run(self, scan_id: str, tool: str, function: Callable[..., Any], target: str,
+                  progress: Optional[Callable[[Dict[str, Any]], None]] = None, **flags: Any) -> Any:
+        """
+        Run a tool, or join an identical run another scan already has in flight.
+        
+        Runs are identified by tool, target and flags. The first scan holds
+        the rate limiter slot and launches the process; scans arriving while
+        it runs wait for it and receive the same output, which each of them
+        then scope-filters and stores as its own results. Runs are only
+        shared between scans of the same process.
+        
+        Args:
+            scan_id: Unique scan identifier
+            tool: Tool name
+            function: ToolExecutor method running the tool
+            target: Target passed to the tool
+            progress: Progress callback, called for the scan that launched the run and every scan that joined it
+            **flags: Tool options, part of the run identity
+            
+        Returns:
+            Any: Return value of the ToolExecutor method
+        """
+        stage = tool_policy.current_stage()
+        keys = stage.limiter_keys if stage is not None else []
+        
+        def launch(publish: Callable[[Any], None]):
+            with rate_limiter.slot(keys) as waited:
+                if waited >= 1:
+                    logger.info(f"Waited {waited:.1f}s for {', '.join(keys)} before running {tool}")
+                
+                salvaged = len(stage.salvaged) if stage is not None else 0
+                if progress is not None:
+                    flags['progress'] = publish
+                result = function(target, **flags)
+                return result, stage.salvaged[salvaged:] if stage is not None else []
+        
+        # Long flags such as URL lists are identified by their digest
+        key = (tool, target) + tuple(
+            f"{name}={value!r}" if len(repr(value)) <= 200
+            else f"{name}={hashlib.sha256(repr(value).encode()).hexdigest()}"
+            for name, value in sorted(flags.items())
+        )
+        (result, salvaged), shared = tool_runs.run(key, launch, progress)
+        
+        if shared:
+            logger.info(f"Scan {scan_id} reused the in-flight {tool} run for {target}")
+            if stage is not None:
+                stage.salvaged.extend(salvaged)
+        return result
+
+    def _scan_scope(self, scan_id: str, target: str) -> Scope:
+        """Get the scope of a running scan."""
+        scan = self.active_scans.get(scan_id)
+        if scan and scan.get('scope') is not None:
+            return scan['scope']
+        return Scope([scan['target'] if scan else target])
+
+    def _filter_scope(self, scan_id: str, tool: str, target: str, assets: List[str]) -> List[str]:
+        """
+        Drop discovered assets that are outside the scan scope.
+        
+        Args:
+            scan_id: Unique scan identifier
+            tool: Tool that discovered the assets
+            target: Target passed to the tool
+            assets: Hostnames or URLs
+            
+        Returns:
+            list: In-scope assets
+        """
+        in_scope, out_of_scope = self._scan_scope(scan_id, target).filter(assets)
+        if out_of_scope:
+            logger.info(f"Dropped {len(out_of_scope)} out-of-scope {tool} results for scan {scan_id}")
+        return in_scope
+
     def _run_nmap(self, scan_id: str, target: str) -> None:
-        """Run nmap scan and save results."""
-        success, results = ToolExecutor.run_nmap(target)
+        """Run nmap scan and save results, one batch at a time for CIDR targets."""
+        scope = self._scan_scope(scan_id, target)
+        stage = tool_policy.current_stage()
+        success = False
+        results = []
+        
+        for batch, exclude in batch_network(target, scope):
+            # Timeouts and recorded runtimes apply to each batch, so size them by the batch
+            kind, network = parse_target(batch)
+            if stage is not None and kind in ('ip', 'network'):
+                stage.target = batch
+                stage.target_size = network.num_addresses
+            
+            batch_success, batch_results = self._tool_run(scan_id, 'nmap', ToolExecutor.run_nmap, batch, exclude=exclude)
+            success = success or batch_success
+            results.extend(batch_results)
+            if not batch_success:
+                logger.error(f"Nmap batch {batch} failed for scan {scan_id}")
         
         if success:
             self._add_scan_result(scan_id, 'nmap', 'port_scan', results)
@@ -196,9 +456,10 @@ class Scanner:
 
     def _run_amass(self, scan_id: str, target: str) -> None:
         """Run Amass and save results."""
-        success, subdomains = ToolExecutor.run_amass(target)
+        success, subdomains = self._tool_run(scan_id, 'amass', ToolExecutor.run_amass, target)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'amass', target, subdomains)
             self._add_scan_result(scan_id, 'amass', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'amass', 'error', {
@@ -207,9 +468,10 @@ class Scanner:
 
     def _run_sublist3r(self, scan_id: str, target: str) -> None:
         """Run Sublist3r and save results."""
-        success, subdomains = ToolExecutor.run_sublist3r(target)
+        success, subdomains = self._tool_run(scan_id, 'sublist3r', ToolExecutor.run_sublist3r, target)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'sublist3r', target, subdomains)
             self._add_scan_result(scan_id, 'sublist3r', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'sublist3r', 'error', {
@@ -218,9 +480,10 @@ class Scanner:
 
     def _run_assetfinder(self, scan_id: str, target: str) -> None:
         """Run Assetfinder and save results."""
-        success, subdomains = ToolExecutor.run_assetfinder(target)
+        success, subdomains = self._tool_run(scan_id, 'assetfinder', ToolExecutor.run_assetfinder, target)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'assetfinder', target, subdomains)
             self._add_scan_result(scan_id, 'assetfinder', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'assetfinder', 'error', {
@@ -229,9 +492,10 @@ class Scanner:
 
     def _run_gau(self, scan_id: str, target: str) -> None:
         """Run GetAllUrls (GAU) and save results."""
-        success, urls = ToolExecutor.run_gau(target)
+        success, urls = self._tool_run(scan_id, 'gau', ToolExecutor.run_gau, target)
         
         if success:
+            urls = self._filter_scope(scan_id, 'gau', target, urls)
             self._add_scan_result(scan_id, 'gau', 'urls', urls)
         else:
             self._add_scan_result(scan_id, 'gau', 'error', {
@@ -240,9 +504,10 @@ class Scanner:
 
     def _run_crt(self, scan_id: str, target: str) -> None:
         """Run Certificate Transparency scan and save results."""
-        success, subdomains = ToolExecutor.run_crt(target)
+        success, subdomains = self._tool_run(scan_id, 'crt', ToolExecutor.run_crt, target)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'crt', target, subdomains)
             self._add_scan_result(scan_id, 'crt', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'crt', 'error', {
@@ -251,9 +516,10 @@ class Scanner:
 
     def _run_subfinder(self, scan_id: str, target: str) -> None:
         """Run Subfinder and save results."""
-        success, subdomains = ToolExecutor.run_subfinder(target)
+        success, subdomains = self._tool_run(scan_id, 'subfinder', ToolExecutor.run_subfinder, target)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'subfinder', target, subdomains)
             self._add_scan_result(scan_id, 'subfinder', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'subfinder', 'error', {
@@ -261,10 +527,19 @@ class Scanner:
             })
 
     def _run_shuffledns(self, scan_id: str, target: str) -> None:
-        """Run ShuffleDNS and save results."""
-        success, subdomains = ToolExecutor.run_shuffledns(target)
+        """Run sharded ShuffleDNS brute-forcing and save the merged results."""
+        def progress(snapshot: Dict[str, Any]) -> None:
+            scan = self.active_scans.get(scan_id)
+            if scan is not None:
+                scan.setdefault('stages', {})['shuffledns'] = snapshot
+            done = sum(1 for shard in snapshot['shards'] if shard['status'] in ('completed', 'failed'))
+            logger.debug(f"ShuffleDNS for scan {scan_id}: {done}/{len(snapshot['shards'])} shards done")
+        
+        success, subdomains = self._tool_run(scan_id, 'shuffledns', ToolExecutor.run_shuffledns, target,
+                                              progress=progress)
         
         if success:
+            subdomains = self._filter_scope(scan_id, 'shuffledns', target, subdomains)
             self._add_scan_result(scan_id, 'shuffledns', 'subdomains', subdomains)
         else:
             self._add_scan_result(scan_id, 'shuffledns', 'error', {
@@ -273,20 +548,44 @@ class Scanner:
 
     def _run_gospider(self, scan_id: str, target: str) -> None:
         """Run GoSpider and save results."""
-        success, urls = ToolExecutor.run_gospider(target)
+        success, urls = self._tool_run(scan_id, 'gospider', ToolExecutor.run_gospider, target)
         
         if success:
+            urls = self._filter_scope(scan_id, 'gospider', target, urls)
             self._add_scan_result(scan_id, 'gospider', 'urls', urls)
         else:
             self._add_scan_result(scan_id, 'gospider', 'error', {
                 'message': 'GoSpider scan failed'
             })
 
+    def _discovered_urls(self, scan_id: str) -> List[str]:
+        """Get the URLs found so far in a scan, e.g. by gau and gospider."""
+        try:
+            from app import app
+            with app.app_context():
+                results = (
+                    ScanResult.query
+                    .filter_by(scan_id=scan_id, result_type='urls')
+                    .order_by(ScanResult.id)
+                    .all()
+                )
+                return [url for result in results for url in result.payload or [] if isinstance(url, str)]
+        except Exception as e:
+            logger.error(f"Error loading discovered URLs for {scan_id}: {str(e)}")
+            return []
+
     def _run_subdomainizer(self, scan_id: str, target: str) -> None:
-        """Run Subdomainizer and save results."""
-        success, findings = ToolExecutor.run_subdomainizer(target)
+        """Scan the JavaScript files found in the scan for subdomains, endpoints and secrets."""
+        urls = tuple(sorted({url for url in self._discovered_urls(scan_id) if is_js_url(url)}))
+        success, findings = self._tool_run(scan_id, 'subdomainizer', ToolExecutor.run_subdomainizer, target,
+                                           urls=urls)
         
         if success:
+            scope = self._scan_scope(scan_id, target)
+            findings = [
+                finding for finding in findings
+                if finding.get('type') != 'subdomain' or scope.contains(finding.get('value', ''))
+            ]
             self._add_scan_result(scan_id, 'subdomainizer', 'findings', findings)
         else:
             self._add_scan_result(scan_id, 'subdomainizer', 'error', {
@@ -0,0 +1,439 @@
+import os
+import json
+import random
+import logging
+import datetime
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from scope import is_valid_target, within_size_limit, MAX_TARGET_ADDRESSES
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "true").lower() in ('1', 'true', 'yes')
+SCHEDULER_INTERVAL = float(os.environ.get("SCHEDULER_INTERVAL", 30))  # Seconds between checks for due runs
+
+MIN_INTERVAL = int(os.environ.get("SCHEDULE_MIN_INTERVAL", 300))  # Shortest allowed schedule interval
+DEFAULT_JITTER_RATIO = 0.1  # Default jitter as a fraction of the interval
+OVERLAP_POLICIES = ('defer', 'skip')
+
+# Due runs are deferred while this many scans are running or the load average
+# per CPU is above MAX_LOAD, so scheduled work fills idle capacity instead of
+# piling onto busy periods
+MAX_RUNNING_SCANS = int(os.environ.get("SCHEDULER_MAX_RUNNING", 2))
+MAX_LOAD = float(os.environ.get("SCHEDULER_MAX_LOAD", 1.0))
+DEFER_SECONDS = 120  # Average delay of a deferred run
+
+# A run deferred for capacity this many times in a row starts anyway, so a
+# server that is never idle still runs its schedules
+MAX_CONSECUTIVE_DEFERRALS = int(os.environ.get("SCHEDULER_MAX_DEFERRALS", 10))
+
+# Running scans whose process has not sent a heartbeat for this long were
+# orphaned by a crash or reload and no longer count as running
+STALE_SCAN_SECONDS = float(os.environ.get("SCHEDULER_STALE_SCAN", 300))
+
+
+def system_load() -> float:
+    """Get the 1-minute load average per CPU, 0 where it is not available."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def epoch_seconds(moment: datetime.datetime) -> float:
+    """Get the seconds since the epoch of a naive UTC datetime."""
+    return (moment - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
+def nominal_run_after(schedule, after: datetime.datetime) -> datetime.datetime:
+    """
+    Get the first slot of a schedule's run grid after a time.
+
+    Runs fall on a fixed grid of interval-long steps, offset by the schedule's
+    phase. Jitter and deferrals never move the grid, so runs missed while the
+    server was down are collapsed into one and schedules never drift.
+
+    Args:
+        schedule: ScheduledScan instance
+        after: Naive UTC datetime
+
+    Returns:
+        datetime: Start of the next slot
+    """
+    offset = epoch_seconds(after) - (schedule.phase or 0)
+    steps = int(offset // schedule.interval) + 1
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(
+        seconds=steps * schedule.interval + (schedule.phase or 0)
+    )
+
+
+def next_run_after(schedule, after: datetime.datetime) -> datetime.datetime:
+    """
+    Get the next run time of a schedule, with a random delay of up to its jitter.
+
+    Args:
+        schedule: ScheduledScan instance
+        after: Naive UTC datetime
+
+    Returns:
+        datetime: Next run time
+    """
+    jitter = random.uniform(0, schedule.jitter or 0)
+    return nominal_run_after(schedule, after) + datetime.timedelta(seconds=jitter)
+
+
+def defer_delay() -> datetime.timedelta:
+    """Get the delay of a deferred run, randomized so deferred runs do not restart together."""
+    return datetime.timedelta(seconds=DEFER_SECONDS * random.uniform(0.5, 1.5))
+
+
+def create_schedule(session, target: str, tools: List[str], interval: int,
+                    scope: Optional[Dict[str, List[str]]] = None, jitter: Optional[int] = None,
+                    overlap: str = 'defer'):
+    """
+    Create a recurring scan.
+
+    Each schedule gets a random phase within its interval, so schedules
+    created together, or with the same interval, start at different times.
+
+    Args:
+        session: SQLAlchemy session
+        target: Target domain, IP or CIDR range
+        tools: Tools to run
+        interval: Seconds between runs
+        scope: Extra include/exclude scope entries
+        jitter: Maximum random delay added to each run, defaults to 10% of the interval
+        overlap: What to do when a run is due while the previous one is running (defer, skip)
+
+    Returns:
+        ScheduledScan: Created schedule
+
+    Raises:
+        ValueError: If the schedule is invalid
+    """
+    from models import ScheduledScan
+
+    target = target.strip()
+    scope = scope or {'include': [], 'exclude': []}
+
+    if not target or not is_valid_target(target):
+        raise ValueError(f"Invalid target: {target}")
+    if not within_size_limit(target):
+        raise ValueError(f"Target is larger than {MAX_TARGET_ADDRESSES} addresses")
+    if not tools:
+        raise ValueError("At least one tool must be selected")
+    invalid = [entry for entry in scope['include'] + scope['exclude'] if not is_valid_target(entry)]
+    if invalid:
+        raise ValueError(f"Invalid scope entries: {', '.join(invalid)}")
+    if interval < MIN_INTERVAL:
+        raise ValueError(f"Interval must be at least {MIN_INTERVAL} seconds")
+    if jitter is None:
+        jitter = int(interval * DEFAULT_JITTER_RATIO)
+    if not 0 <= jitter <= interval:
+        raise ValueError("Jitter must be between 0 and the interval")
+    if overlap not in OVERLAP_POLICIES:
+        raise ValueError(f"Overlap must be one of: {', '.join(OVERLAP_POLICIES)}")
+
+    schedule = ScheduledScan(
+        target=target,
+        tools=json.dumps(tools),
+        scope=json.dumps(scope),
+        interval=interval,
+        jitter=jitter,
+        phase=random.randrange(interval),
+        overlap=overlap,
+        enabled=True
+    )
+    schedule.next_run_at = next_run_after(schedule, datetime.datetime.utcnow())
+
+    session.add(schedule)
+    session.commit()
+    return schedule
+
+
+def update_schedule(session, schedule, tools: Optional[List[str]] = None, interval: Optional[int] = None,
+                    jitter: Optional[int] = None, overlap: Optional[str] = None,
+                    enabled: Optional[bool] = None):
+    """
+    Change a recurring scan. Omitted settings are left unchanged.
+
+    A new interval gets a new random phase and moves the next run onto the
+    new grid. Jitter is capped at the new interval unless a jitter is given.
+
+    Args:
+        session: SQLAlchemy session
+        schedule: ScheduledScan instance
+        tools: Tools to run
+        interval: Seconds between runs
+        jitter: Maximum random delay added to each run
+        overlap: What to do when a run is due while the previous one is running (defer, skip)
+        enabled: Whether the schedule runs
+
+    Returns:
+        ScheduledScan: Updated schedule
+
+    Raises:
+        ValueError: If a setting is invalid
+    """
+    if tools is not None and not tools:
+        raise ValueError("At least one tool must be selected")
+    if interval is not None and interval < MIN_INTERVAL:
+        raise ValueError(f"Interval must be at least {MIN_INTERVAL} seconds")
+    new_interval = interval if interval is not None else schedule.interval
+    if jitter is not None and not 0 <= jitter <= new_interval:
+        raise ValueError("Jitter must be between 0 and the interval")
+    if overlap is not None and overlap not in OVERLAP_POLICIES:
+        raise ValueError(f"Overlap must be one of: {', '.join(OVERLAP_POLICIES)}")
+
+    if tools is not None:
+        schedule.tools = json.dumps(tools)
+    if jitter is not None:
+        schedule.jitter = jitter
+    if interval is not None and interval != schedule.interval:
+        schedule.interval = interval
+        schedule.phase = random.randrange(interval)
+        if jitter is None:
+            schedule.jitter = min(schedule.jitter or 0, interval)
+        schedule.next_run_at = next_run_after(schedule, datetime.datetime.utcnow())
+    if overlap is not None:
+        schedule.overlap = overlap
+    if enabled is not None:
+        schedule.enabled = enabled
+
+    session.commit()
+    return schedule
+
+
+def upcoming_runs(session, hours: float = 24, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    List the runs of every enabled schedule in a time window.
+
+    Only the next run of each schedule has its jitter applied already; later
+    runs are listed at their grid slot with the window their jitter may move
+    them into.
+
+    Args:
+        session: SQLAlchemy session
+        hours: Length of the window from now
+        limit: Maximum number of runs
+
+    Returns:
+        list: Runs ordered by time
+    """
+    from models import ScheduledScan
+
+    now = datetime.datetime.utcnow()
+    end = now + datetime.timedelta(hours=hours)
+    runs = []
+
+    schedules = session.query(ScheduledScan).filter(ScheduledScan.enabled.is_(True)).all()
+    for schedule in schedules:
+        run_at = schedule.next_run_at
+        latest = run_at
+        for _ in range(limit):
+            if run_at > end:
+                break
+            runs.append({
+                'schedule_id': schedule.id,
+                'target': schedule.target,
+                'tools': schedule.tools_list,
+                'run_at': max(run_at, now).isoformat(),
+                'latest_run_at': max(latest, now).isoformat()
+            })
+            run_at = nominal_run_after(schedule, run_at)
+            latest = run_at + datetime.timedelta(seconds=schedule.jitter or 0)
+
+    runs.sort(key=lambda run: run['run_at'])
+    return runs[:limit]
+
+
+class Scheduler:
+    """Starts due scheduled scans from a background thread."""
+
+    def __init__(self, scanner):
+        """
+        Initialize the Scheduler class.
+
+        Args:
+            scanner: Scanner that runs the scans
+        """
+        self.scanner = scanner
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start sending heartbeats for this process's scans and checking for due runs.
+
+        Heartbeats are sent even when SCHEDULER_ENABLED turns off due run
+        checks, so schedulers in other processes see this process's scans
+        as running.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+        self._thread.start()
+        if SCHEDULER_ENABLED:
+            logger.info(f"Scheduler started, checking every {SCHEDULER_INTERVAL:.0f}s")
+
+    def stop(self) -> None:
+        """Stop checking for due runs."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(SCHEDULER_INTERVAL)
+
+    def _loop(self) -> None:
+        # Workers started together check at different times
+        if self._stop.wait(random.uniform(0, SCHEDULER_INTERVAL)):
+            return
+        while True:
+            self.scanner.heartbeat()
+            if SCHEDULER_ENABLED:
+                try:
+                    self.run_due()
+                except Exception as e:
+                    logger.error(f"Error running scheduled scans: {str(e)}")
+            if self._stop.wait(SCHEDULER_INTERVAL):
+                return
+
+    def _claim(self, session, schedule, next_run_at: datetime.datetime, **changes: Any) -> bool:
+        """
+        Move a due schedule to its next run time, unless another worker already did.
+
+        Every web worker runs a scheduler; the conditional update makes sure
+        only one of them acts on each due run.
+        """
+        from models import ScheduledScan
+
+        changes['next_run_at'] = next_run_at
+        claimed = (
+            session.query(ScheduledScan)
+            .filter_by(id=schedule.id, next_run_at=schedule.next_run_at)
+            .update(changes, synchronize_session=False)
+        )
+        session.commit()
+        return claimed == 1
+
+    def run_due(self, now: Optional[datetime.datetime] = None) -> List[str]:
+        """
+        Start the scheduled scans that are due.
+
+        A run is deferred while the previous run of its schedule is still in
+        progress (or skipped, depending on the schedule), and while the
+        server is busy. Only as many runs as there is capacity for are
+        started; the rest are deferred by a randomized delay so they spread
+        out instead of starting together, up to MAX_CONSECUTIVE_DEFERRALS
+        times in a row.
+
+        Only scans with a recent heartbeat count as running, so scans left
+        running by a crash never block schedules.
+
+        Args:
+            now: Current naive UTC time
+
+        Returns:
+            list: IDs of the started scans
+        """
+        from sqlalchemy import func
+        from app import app, db
+        from models import Scan, ScheduledScan
+
+        if self.scanner.stopping:
+            return []
+
+        started = []
+        with app.app_context():
+            now = now or datetime.datetime.utcnow()
+            due = (
+                ScheduledScan.query
+                .filter(ScheduledScan.enabled.is_(True))
+                .filter(ScheduledScan.next_run_at <= now)
+                .order_by(ScheduledScan.next_run_at)
+                .all()
+            )
+            if not due:
+                return []
+
+            live = (
+                Scan.query
+                .filter(Scan.status == 'running')
+                .filter(func.coalesce(Scan.heartbeat_at, Scan.start_time)
+                        >= now - datetime.timedelta(seconds=STALE_SCAN_SECONDS))
+            )
+            running = live.count()
+            load = system_load()
+
+            for schedule in due:
+                if schedule.last_scan_id and live.filter(Scan.id == schedule.last_scan_id).count():
+                    if schedule.overlap == 'skip':
+                        logger.info(f"Skipping run of schedule {schedule.id}, scan {schedule.last_scan_id} is still running")
+                        self._claim(db.session, schedule, next_run_after(schedule, now),
+                                    skipped_runs=ScheduledScan.skipped_runs + 1)
+                    else:
+                        logger.info(f"Deferring run of schedule {schedule.id}, scan {schedule.last_scan_id} is still running")
+                        self._claim(db.session, schedule, now + defer_delay(),
+                                    deferred_runs=ScheduledScan.deferred_runs + 1)
+                    continue
+
+                if running >= MAX_RUNNING_SCANS or load > MAX_LOAD:
+                    deferrals = schedule.consecutive_deferrals or 0
+                    if deferrals < MAX_CONSECUTIVE_DEFERRALS:
+                        logger.info(
+                            f"Deferring run of schedule {schedule.id}, {running} scans running, load {load:.2f}"
+                        )
+                        self._claim(db.session, schedule, now + defer_delay(),
+                                    deferred_runs=ScheduledScan.deferred_runs + 1,
+                                    consecutive_deferrals=deferrals + 1)
+                        continue
+                    logger.warning(
+                        f"Starting run of schedule {schedule.id} despite {running} scans running and load "
+                        f"{load:.2f}, it was deferred {deferrals} times in a row"
+                    )
+
+                scan_id = str(uuid.uuid4())
+                if not self._claim(db.session, schedule, next_run_after(schedule, now),
+                                   last_run_at=now, last_scan_id=scan_id, consecutive_deferrals=0):
+                    continue
+
+                self.launch(db.session, schedule, scan_id)
+                started.append(scan_id)
+                running += 1
+
+        return started
+
+    def launch(self, session, schedule, scan_id: str) -> None:
+        """
+        Create the scan of a scheduled run and start it.
+
+        Args:
+            session: SQLAlchemy session
+            schedule: ScheduledScan instance
+            scan_id: ID for the new scan
+        """
+        from models import Scan
+
+        scan = Scan(
+            id=scan_id,
+            target=schedule.target,
+            tools=schedule.tools,
+            scope=schedule.scope,
+            status='running',
+            start_time=datetime.datetime.utcnow(),
+            schedule_id=schedule.id
+        )
+        session.add(scan)
+        session.commit()
+
+        try:
+            self.scanner.start_scan_async(scan_id, schedule.target, schedule.tools_list, schedule.scope_dict)
+            logger.info(f"Started scheduled scan {scan_id} for schedule {schedule.id} ({schedule.target})")
+        except Exception as e:
+            logger.error(f"Error starting scheduled scan for schedule {schedule.id}: {str(e)}")
+            scan.status = 'failed'
+            scan.end_time = datetime.datetime.utcnow()
+            session.commit()
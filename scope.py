@@ -0,0 +1,348 @@
+import os
+import re
+import ipaddress
+import logging
+from urllib.parse import urlsplit
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Compiled once at import; validation runs for every target and scope entry
+DOMAIN_RE = re.compile(r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$')
+WILDCARD_DOMAIN_RE = re.compile(r'^\*\.((?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,})$')
+
+# Default number of addresses per nmap invocation when a CIDR target is expanded
+NMAP_BATCH_SIZE = 256
+
+# Largest network accepted as a scan target, a /16 by default. Bigger ranges
+# would expand into thousands of serial nmap batches (an IPv6 /64 into 2^56)
+MAX_TARGET_ADDRESSES = int(os.environ.get("MAX_TARGET_ADDRESSES", 65536))
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_target(target: str) -> Tuple[str, Union[str, Network, None]]:
+    """
+    Classify a target or scope entry.
+
+    Args:
+        target: Domain, wildcard domain, IPv4/IPv6 address or CIDR range
+
+    Returns:
+        tuple: (kind, value) where kind is domain, wildcard, ip, network or
+            invalid and value is the normalized domain or ip network
+    """
+    target = target.strip()
+
+    if DOMAIN_RE.match(target):
+        return 'domain', target.lower()
+
+    match = WILDCARD_DOMAIN_RE.match(target)
+    if match:
+        return 'wildcard', match.group(1).lower()
+
+    try:
+        if '/' in target:
+            return 'network', ipaddress.ip_network(target, strict=False)
+        return 'ip', ipaddress.ip_network(target)
+    except ValueError:
+        return 'invalid', None
+
+
+def is_valid_target(target: str) -> bool:
+    """
+    Check whether a target can be scanned.
+
+    Args:
+        target: Domain, wildcard domain, IPv4/IPv6 address or CIDR range
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    return parse_target(target)[0] != 'invalid'
+
+
+def within_size_limit(target: str) -> bool:
+    """
+    Check whether a target is small enough to be scanned.
+
+    Scope entries are not limited, only scan targets.
+
+    Args:
+        target: Domain, wildcard domain, IPv4/IPv6 address or CIDR range
+
+    Returns:
+        bool: False for networks larger than MAX_TARGET_ADDRESSES, True otherwise
+    """
+    kind, value = parse_target(target)
+    return kind != 'network' or value.num_addresses <= MAX_TARGET_ADDRESSES
+
+
+def tool_target(target: str) -> str:
+    """
+    Get the form of a target that should be passed to tools.
+
+    Args:
+        target: Scan target
+
+    Returns:
+        str: Target with any wildcard label removed
+    """
+    kind, value = parse_target(target)
+    if kind == 'wildcard':
+        return value
+    return target.strip()
+
+
+def asset_host(asset: str) -> str:
+    """
+    Extract the host part of a discovered asset.
+
+    Args:
+        asset: Hostname, IP address, host:port or URL
+
+    Returns:
+        str: Lower case hostname or IP address
+    """
+    asset = asset.strip()
+
+    if ':' not in asset:
+        return asset.rstrip('.').lower()
+
+    if '://' in asset:
+        return (urlsplit(asset).hostname or '').lower()
+
+    if asset.startswith('['):
+        # Bracketed IPv6 literal, optionally followed by a port
+        return asset[1:asset.find(']')].lower() if ']' in asset else asset.lower()
+
+    if asset.count(':') == 1:
+        asset = asset.split(':', 1)[0]
+
+    return asset.rstrip('.').lower()
+
+
+class _DomainNode:
+    """Node in the reversed-label domain trie."""
+
+    __slots__ = ('children', 'exact', 'subtree')
+
+    def __init__(self):
+        self.children = {}
+        # None, True (include) or False (exclude)
+        self.exact = None
+        self.subtree = None
+
+
+class Scope:
+    """
+    Set of in-scope and excluded domains and networks.
+
+    Domains are kept in a trie keyed by reversed labels and networks in
+    longest-prefix tables, so membership checks cost one step per label or
+    per distinct prefix length regardless of how many entries the scope has.
+    The most specific matching entry decides; exclusions win ties.
+    """
+
+    def __init__(self, includes: Iterable[str] = (), excludes: Iterable[str] = ()):
+        """
+        Initialize the Scope.
+
+        Args:
+            includes: In-scope domains, wildcard domains, IPs and CIDR ranges
+            excludes: Entries to carve out of the included ones
+        """
+        self._domains = _DomainNode()
+        # {version: {prefixlen: {network int: included}}}
+        self._networks = {4: {}, 6: {}}
+        self._prefixlens = {4: [], 6: []}
+        self.includes = []
+        self.excludes = []
+        self._excluded_networks = []  # Parsed IP and network exclusions
+
+        for entry in includes:
+            self.add(entry)
+        for entry in excludes:
+            self.add(entry, exclude=True)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, List[str]]], target: Optional[str] = None) -> 'Scope':
+        """
+        Build a Scope from its stored form.
+
+        Args:
+            data: Dict with include and exclude lists
+            target: Scan target, always included
+
+        Returns:
+            Scope: The scope
+        """
+        data = data or {}
+        includes = list(data.get('include', []))
+        if target and target not in includes:
+            includes.insert(0, target)
+        return cls(includes, data.get('exclude', []))
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Get the scope in its stored form."""
+        return {'include': list(self.includes), 'exclude': list(self.excludes)}
+
+    def add(self, entry: str, exclude: bool = False) -> None:
+        """
+        Add an entry to the scope.
+
+        A plain domain covers the domain and all of its subdomains, a
+        wildcard domain only its subdomains.
+
+        Args:
+            entry: Domain, wildcard domain, IP address or CIDR range
+            exclude: Add as an exclusion instead of an inclusion
+        """
+        kind, value = parse_target(entry)
+        if kind == 'invalid':
+            raise ValueError(f"Invalid scope entry: {entry}")
+
+        included = not exclude
+
+        if kind in ('domain', 'wildcard'):
+            node = self._domains
+            for label in reversed(value.split('.')):
+                node = node.children.setdefault(label, _DomainNode())
+            # Never let a later inclusion override an exclusion of the same entry
+            if kind == 'domain' and node.exact is not False:
+                node.exact = included
+            if node.subtree is not False:
+                node.subtree = included
+        else:
+            table = self._networks[value.version]
+            if value.prefixlen not in table:
+                table[value.prefixlen] = {}
+                self._prefixlens[value.version] = sorted(table, reverse=True)
+            networks = table[value.prefixlen]
+            key = int(value.network_address)
+            if networks.get(key) is not False:
+                networks[key] = included
+            if exclude:
+                self._excluded_networks.append(value)
+
+        (self.excludes if exclude else self.includes).append(entry.strip())
+
+    def _match_domain(self, hostname: str) -> bool:
+        labels = hostname.split('.')
+        node = self._domains
+        decision = False
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if depth == len(labels):
+                if node.exact is not None:
+                    decision = node.exact
+            elif node.subtree is not None:
+                decision = node.subtree
+        return decision
+
+    def _match_ip(self, address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+        table = self._networks[address.version]
+        value = int(address)
+        bits = address.max_prefixlen
+        for prefixlen in self._prefixlens[address.version]:
+            key = (value >> (bits - prefixlen)) << (bits - prefixlen) if prefixlen else 0
+            included = table[prefixlen].get(key)
+            if included is not None:
+                return included
+        return False
+
+    def contains(self, asset: str) -> bool:
+        """
+        Check whether a discovered asset is in scope.
+
+        Args:
+            asset: Hostname, IP address, host:port or URL
+
+        Returns:
+            bool: True if in scope, False otherwise
+        """
+        host = asset_host(asset)
+        if not host:
+            return False
+
+        # Hostnames end in an alphabetic TLD; skip the costly ip_address attempt
+        if ':' not in host and host[-1].isalpha():
+            return self._match_domain(host)
+
+        try:
+            return self._match_ip(ipaddress.ip_address(host))
+        except ValueError:
+            return self._match_domain(host)
+
+    def filter(self, assets: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Split discovered assets into in-scope and out-of-scope lists.
+
+        Args:
+            assets: Hostnames, IP addresses, host:port values or URLs
+
+        Returns:
+            tuple: (in scope (list), out of scope (list))
+        """
+        in_scope = []
+        out_of_scope = []
+        for asset in assets:
+            (in_scope if self.contains(asset) else out_of_scope).append(asset)
+        return in_scope, out_of_scope
+
+    def excluded_networks(self, network: Network) -> List[Network]:
+        """
+        Get the excluded networks that overlap a network.
+
+        Args:
+            network: Network about to be scanned
+
+        Returns:
+            list: Overlapping excluded networks
+        """
+        return [
+            excluded for excluded in self._excluded_networks
+            if excluded.version == network.version and excluded.overlaps(network)
+        ]
+
+
+def batch_network(target: str, scope: Optional[Scope] = None,
+                  batch_size: int = NMAP_BATCH_SIZE) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Split a CIDR target into batches for nmap.
+
+    Batches that are entirely excluded by the scope are skipped; partially
+    excluded batches carry the exclusions to pass to nmap --exclude.
+    The exclusions overlapping the target are looked up once, and each
+    batch only checks those.
+
+    Args:
+        target: CIDR range, IP address or domain
+        scope: Scope whose exclusions should be honoured
+        batch_size: Maximum number of addresses per batch
+
+    Yields:
+        tuple: (nmap target (str), excluded networks (list of str))
+
+    Raises:
+        ValueError: If the target is larger than MAX_TARGET_ADDRESSES
+    """
+    kind, network = parse_target(target)
+    if not within_size_limit(target):
+        raise ValueError(f"Target {target} is larger than {MAX_TARGET_ADDRESSES} addresses")
+
+    candidates = scope.excluded_networks(network) if scope and kind in ('ip', 'network') else []
+    if kind != 'network' or network.num_addresses <= batch_size:
+        yield tool_target(target), [str(excluded) for excluded in candidates]
+        return
+
+    new_prefix = max(network.max_prefixlen - (batch_size.bit_length() - 1), network.prefixlen)
+    for subnet in network.subnets(new_prefix=new_prefix):
+        exclusions = [excluded for excluded in candidates if excluded.overlaps(subnet)]
+        if any(subnet.subnet_of(excluded) for excluded in exclusions):
+            logger.debug(f"Skipping excluded batch {subnet}")
+            continue
+        yield str(subnet), [str(excluded) for excluded in exclusions]
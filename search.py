@@ -0,0 +1,275 @@
+import json
+import logging
+import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# One FTS5 row per searchable value. Only `value` is tokenized; the other
+# columns are carried along for filtering and display.
+CREATE_INDEX_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS result_search USING fts5(
+    value,
+    tool UNINDEXED,
+    result_type UNINDEXED,
+    target UNINDEXED,
+    scan_id UNINDEXED,
+    result_id UNINDEXED,
+    created_at UNINDEXED,
+    tokenize = 'unicode61',
+    prefix = '2 3'
+)
+"""
+
+INSERT_SQL = text(
+    "INSERT INTO result_search (value, tool, result_type, target, scan_id, result_id, created_at) "
+    "VALUES (:value, :tool, :result_type, :target, :scan_id, :result_id, :created_at)"
+)
+
+
+def is_enabled(bind) -> bool:
+    """
+    Check whether full-text search is available for the database.
+
+    Args:
+        bind: SQLAlchemy engine, connection or session
+
+    Returns:
+        bool: True for SQLite databases, which provide FTS5
+    """
+    if hasattr(bind, 'get_bind'):
+        bind = bind.get_bind()
+    return bind.dialect.name == 'sqlite'
+
+
+def ensure_search_index(engine) -> None:
+    """
+    Create the FTS5 table if it does not exist yet.
+
+    Args:
+        engine: SQLAlchemy engine bound to the application database
+    """
+    if not is_enabled(engine):
+        logger.info("Full-text search disabled: FTS5 requires SQLite")
+        return
+
+    with engine.begin() as connection:
+        connection.execute(text(CREATE_INDEX_SQL))
+
+
+def extract_documents(result_type: str, data: Any) -> List[str]:
+    """
+    Flatten a tool result into the text values that should be searchable.
+
+    Args:
+        result_type: Type of result (subdomains, port_scan, urls, findings, error)
+        data: Result data as produced by ToolExecutor
+
+    Returns:
+        list: Searchable strings, one per index row
+    """
+    documents = []
+
+    if result_type == 'port_scan' and isinstance(data, list):
+        for host in data:
+            if not isinstance(host, dict):
+                continue
+            for port in host.get('ports', []):
+                documents.append(' '.join(str(part) for part in (
+                    host.get('ip', ''),
+                    f"{port.get('port', '')}/{port.get('protocol', '')}",
+                    port.get('state', ''),
+                    port.get('service', ''),
+                    port.get('version', '')
+                ) if part))
+
+    elif result_type == 'findings' and isinstance(data, list):
+        for finding in data:
+            if isinstance(finding, dict):
+                documents.append(f"{finding.get('type', '')} {finding.get('value', '')}".strip())
+            else:
+                documents.append(str(finding))
+
+    elif isinstance(data, list):
+        for item in data:
+            documents.append(item if isinstance(item, str) else json.dumps(item))
+
+    elif isinstance(data, dict):
+        documents.append(data['message'] if 'message' in data else json.dumps(data))
+
+    elif data is not None:
+        documents.append(str(data))
+
+    return [document for document in documents if document]
+
+
+def index_result(session, result, target: str, data: Any) -> int:
+    """
+    Add a stored ScanResult to the search index.
+
+    Runs inside the caller's transaction; the result must already be flushed
+    so that it has an id.
+
+    Args:
+        session: SQLAlchemy session
+        result: Flushed ScanResult instance
+        target: Scan target
+        data: Decoded result data
+
+    Returns:
+        int: Number of index rows written
+    """
+    if not is_enabled(session):
+        return 0
+
+    documents = extract_documents(result.result_type, data)
+    if not documents:
+        return 0
+
+    created_at = (result.created_at or datetime.datetime.utcnow()).isoformat()
+    session.execute(INSERT_SQL, [{
+        'value': document,
+        'tool': result.tool,
+        'result_type': result.result_type,
+        'target': target,
+        'scan_id': result.scan_id,
+        'result_id': result.id,
+        'created_at': created_at
+    } for document in documents])
+
+    return len(documents)
+
+
+def remove_scan(session, scan_id: str) -> None:
+    """
+    Drop the index rows of a scan, e.g. when its results are archived.
+
+    Runs inside the caller's transaction.
+
+    Args:
+        session: SQLAlchemy session
+        scan_id: Unique scan identifier
+    """
+    if not is_enabled(session):
+        return
+
+    session.execute(text("DELETE FROM result_search WHERE scan_id = :scan_id"), {'scan_id': scan_id})
+
+
+def search_results(session, query: str, tool: Optional[str] = None,
+                   result_type: Optional[str] = None, target: Optional[str] = None,
+                   scan_id: Optional[str] = None, since: Optional[str] = None,
+                   until: Optional[str] = None, limit: int = 50,
+                   offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Search indexed result values.
+
+    The query uses FTS5 syntax, so "exact phrase" and prefix* queries work
+    as expected. Results are ordered by bm25 rank.
+
+    Args:
+        session: SQLAlchemy session
+        query: FTS5 match expression
+        tool: Only match values from this tool
+        result_type: Only match values of this result type
+        target: Only match values from scans of this target
+        scan_id: Only match values from this scan
+        since: Only match values indexed at or after this ISO date
+        until: Only match values indexed before this ISO date
+        limit: Maximum number of hits
+        offset: Number of hits to skip
+
+    Returns:
+        list: Hits with the value, a marked up snippet and its origin
+    """
+    if not is_enabled(session):
+        raise RuntimeError("Full-text search requires a SQLite database")
+
+    clauses = ["result_search MATCH :query"]
+    params = {'query': query, 'limit': limit, 'offset': offset}
+
+    filters = {
+        'tool': tool,
+        'result_type': result_type,
+        'target': target,
+        'scan_id': scan_id
+    }
+    for column, value in filters.items():
+        if value:
+            clauses.append(f"{column} = :{column}")
+            params[column] = value
+
+    if since:
+        clauses.append("created_at >= :since")
+        params['since'] = since
+    if until:
+        clauses.append("created_at < :until")
+        params['until'] = until
+
+    # Matches are wrapped in STX/ETX control characters rather than HTML so
+    # that clients can escape the value before adding their own markup
+    sql = text(
+        "SELECT value, highlight(result_search, 0, char(2), char(3)) AS snippet, "
+        "tool, result_type, target, scan_id, result_id, created_at, rank "
+        f"FROM result_search WHERE {' AND '.join(clauses)} "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+
+    try:
+        rows = session.execute(sql, params).mappings().all()
+    except Exception as e:
+        # Malformed match expressions surface as OperationalError from SQLite
+        session.rollback()
+        raise ValueError(f"Invalid search query: {str(getattr(e, 'orig', e))}")
+
+    return [dict(row) for row in rows]
+
+
+def rebuild_search_index(session, batch_size: int = 200) -> int:
+    """
+    Rebuild the search index from every stored ScanResult.
+
+    Args:
+        session: SQLAlchemy session
+        batch_size: Number of results processed per commit
+
+    Returns:
+        int: Number of results indexed
+    """
+    from models import Scan, ScanResult
+
+    if not is_enabled(session):
+        raise RuntimeError("Full-text search requires a SQLite database")
+
+    session.execute(text("DELETE FROM result_search"))
+    session.commit()
+
+    processed = 0
+    last_id = 0
+    while True:
+        rows = (
+            session.query(ScanResult, Scan.target)
+            .join(Scan, Scan.id == ScanResult.scan_id)
+            .filter(ScanResult.id > last_id)
+            .order_by(ScanResult.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        for result, target in rows:
+            index_result(session, result, target, result.payload)
+            last_id = result.id
+            processed += 1
+
+        session.commit()
+        logger.info(f"Indexed {processed} results for full-text search")
+
+    session.execute(text("INSERT INTO result_search (result_search) VALUES ('optimize')"))
+    session.commit()
+
+    return processed
@@ -0,0 +1,45 @@
+import os
+import logging
+
+import uvicorn
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 5000))
+# The rate limiter, tool run deduplication, export ETag cache, tool policy and
+# scan progress all live in process memory, so extra workers each get their
+# own copy and enforce limits independently. Only raise this behind a proxy
+# that sends every scan of a target to the same worker
+WORKERS = int(os.environ.get("WEB_WORKERS", 1))
+
+# Seconds open connections get to finish before a worker stops. Running scans
+# get SCAN_SHUTDOWN_TIMEOUT on top of this, see asgi.py
+GRACEFUL_TIMEOUT = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+
+# Pending connections queued by the kernel while workers are busy
+BACKLOG = int(os.environ.get("BACKLOG", 4096))
+
+
+def main() -> None:
+    """Serve the app with uvicorn, migrating the database before any worker starts."""
+    # Importing the app migrates the schema; workers inherit SCHEMA_READY and skip it
+    import app  # noqa: F401
+    os.environ["SCHEMA_READY"] = "1"
+
+    logger.info(f"Serving on {HOST}:{PORT} with {WORKERS} workers")
+    uvicorn.run(
+        "asgi:application",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        backlog=BACKLOG,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        log_level=os.environ.get("LOG_LEVEL", "info"),
+    )
+
+
+if __name__ == "__main__":
+    main()
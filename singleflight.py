@@ -0,0 +1,121 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """A tool run in progress and the scans waiting for its output."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0  # Scans that joined instead of starting their own run
+        self.subscribers = []  # Progress callbacks of the leader and every follower
+        self.progress = None  # Latest progress update, replayed to late followers
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Any], None]) -> None:
+        """Receive the run's progress updates, starting with the latest one."""
+        with self._lock:
+            self.subscribers.append(callback)
+            latest = self.progress
+        if latest is not None:
+            self._deliver(callback, latest)
+
+    def publish(self, update: Any) -> None:
+        """Send a progress update to every subscriber."""
+        with self._lock:
+            self.progress = update
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            self._deliver(callback, update)
+
+    def _deliver(self, callback: Callable[[Any], None], update: Any) -> None:
+        try:
+            callback(update)
+        except Exception as e:
+            logger.error(f"Error delivering progress of {self.key}: {str(e)}")
+
+
+class SingleFlight:
+    """
+    Deduplicates identical tool runs that are in flight at the same time.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive the same result, or the same exception.
+    Progress the run publishes reaches every caller. Nothing is cached once
+    the run has finished, so later scans always get a fresh run.
+
+    Runs are only shared within one process.
+    """
+
+    def __init__(self):
+        """Initialize the SingleFlight class."""
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def run(self, key: Hashable, function: Callable[[Callable[[Any], None]], Any],
+            progress: Optional[Callable[[Any], None]] = None) -> Tuple[Any, bool]:
+        """
+        Run a function unless an identical run is already in flight.
+
+        Args:
+            key: Identity of the run, e.g. (tool, target, flags)
+            function: Function performing the run, called with a callback
+                that publishes progress to every caller
+            progress: Callback receiving the run's progress updates
+
+        Returns:
+            tuple: (result, shared (bool) - True if another caller's run was joined)
+
+        Raises:
+            Exception: Whatever the function raised, for the caller and every follower
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight(key)
+            else:
+                flight.followers += 1
+
+        if progress is not None:
+            flight.subscribe(progress)
+
+        if not leader:
+            logger.info(f"Joining in-flight run {key}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = function(flight.publish)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        if flight.followers:
+            logger.info(f"Shared run {key} with {flight.followers} other scan(s)")
+        return flight.result, False
+
+    def state(self) -> List[Dict[str, Any]]:
+        """Get the runs in flight and how many scans joined each."""
+        with self._lock:
+            return [{
+                'key': [str(part) for part in flight.key],
+                'followers': flight.followers
+            } for flight in self._flights.values()]
+
+
+# Shared by every scan thread of the process
+tool_runs = SingleFlight()
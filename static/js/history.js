@@ -0,0 +1,48 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const cells = document.querySelectorAll('.scan-summary');
+
+    if (cells.length === 0) {
+        return;
+    }
+
+    // Fetch every summary on the page in one request
+    const params = new URLSearchParams();
+    cells.forEach(cell => params.append('scan_id', cell.dataset.scanId));
+
+    fetch(`/api/scan_summaries?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.status !== 'success') {
+                return;
+            }
+
+            cells.forEach(cell => {
+                const summary = data.data[cell.dataset.scanId];
+                if (summary) {
+                    cell.textContent = formatSummary(summary);
+                }
+            });
+        })
+        .catch(error => {
+            console.error('Error fetching scan summaries:', error);
+        });
+
+    /**
+     * Format the unique counts of a scan summary
+     */
+    function formatSummary(summary) {
+        const unique = summary.unique || {};
+        const parts = [
+            `${unique.hostname || 0} subdomains`,
+            `${unique.service || 0} ports`,
+            `${unique.url || 0} URLs`
+        ];
+
+        const errors = Object.values(summary.errors || {}).reduce((total, count) => total + count, 0);
+        if (errors > 0) {
+            parts.push(`${errors} errors`);
+        }
+
+        return parts.join(' · ');
+    }
+});
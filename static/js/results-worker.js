@@ -0,0 +1,326 @@
+/**
+ * Results worker: downloads, indexes and filters scan results off the main
+ * thread. The page only ever receives counts and the rows currently visible.
+ */
+
+// Rows of each virtualized category, their lowercase search keys and the
+// trigram index of the keys
+const tables = {
+    subdomains: { rows: [], keys: [], grams: new Map(), view: null, term: '' },
+    ports: { rows: [], keys: [], grams: new Map(), view: null, term: '' },
+    urls: { rows: [], keys: [], grams: new Map(), view: null, term: '' },
+    other: { rows: [], keys: [], grams: new Map(), view: null, term: '' }
+};
+
+// Length of the substrings the search index is built from; shorter terms scan the keys
+const GRAM_SIZE = 3;
+
+self.onmessage = function(event) {
+    const message = event.data;
+
+    try {
+        switch (message.type) {
+            case 'load':
+                load(message.url)
+                    .then(result => reply(message, result))
+                    .catch(error => reply(message, null, error));
+                return;
+
+            case 'filter':
+                reply(message, { count: filter(message.category, message.term) });
+                return;
+
+            case 'rows':
+                reply(message, { rows: rows(message.category, message.start, message.end) });
+                return;
+
+            default:
+                reply(message, null, new Error(`Unknown message type: ${message.type}`));
+        }
+    } catch (error) {
+        reply(message, null, error);
+    }
+};
+
+/**
+ * Answer a request from the page
+ */
+function reply(message, result, error) {
+    self.postMessage({
+        id: message.id,
+        result: result,
+        error: error ? String(error.message || error) : null
+    });
+}
+
+/**
+ * Fetch the results of a scan and build the row tables and search keys
+ */
+function load(url) {
+    return fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            if (data.status !== 'success') {
+                throw new Error(data.message || 'Failed to load scan results');
+            }
+            return index(data.data);
+        });
+}
+
+/**
+ * Group results by category, merging the tools that reported each value
+ */
+function index(results) {
+    const subdomains = new Map();
+    const urls = new Map();
+    const ports = [];
+    const other = [];
+    const errors = [];
+
+    const addTool = (map, value, tool) => {
+        const tools = map.get(value);
+        if (tools === undefined) {
+            map.set(value, [tool]);
+        } else if (!tools.includes(tool)) {
+            tools.push(tool);
+        }
+    };
+
+    results.forEach(result => {
+        switch (result.result_type) {
+            case 'subdomains':
+                if (Array.isArray(result.data)) {
+                    result.data.forEach(subdomain => addTool(subdomains, subdomain, result.tool));
+                }
+                break;
+
+            case 'port_scan':
+                if (Array.isArray(result.data)) {
+                    result.data.forEach(hostData => {
+                        if (hostData.ports && Array.isArray(hostData.ports)) {
+                            hostData.ports.forEach(port => {
+                                ports.push({
+                                    ip: hostData.ip,
+                                    port: port.port,
+                                    protocol: port.protocol,
+                                    service: port.service,
+                                    version: port.version,
+                                    state: port.state
+                                });
+                            });
+                        }
+                    });
+                }
+                break;
+
+            case 'urls':
+                if (Array.isArray(result.data)) {
+                    result.data.forEach(url => addTool(urls, url, result.tool));
+                }
+                break;
+
+            case 'findings':
+                if (Array.isArray(result.data)) {
+                    result.data.forEach(finding => {
+                        other.push({
+                            type: finding.type || 'unknown',
+                            value: String(finding.value),
+                            tool: result.tool
+                        });
+                    });
+                }
+                break;
+
+            case 'error':
+                errors.push({
+                    tool: result.tool,
+                    message: (result.data && result.data.message) || 'Unknown error'
+                });
+                break;
+
+            default:
+                other.push({
+                    type: result.result_type,
+                    value: JSON.stringify(result.data),
+                    tool: result.tool
+                });
+        }
+    });
+
+    tables.subdomains.rows = Array.from(subdomains, ([subdomain, tools]) => ({ subdomain, tools }));
+    tables.subdomains.keys = tables.subdomains.rows.map(row => String(row.subdomain).toLowerCase());
+
+    tables.ports.rows = ports;
+    tables.ports.keys = ports.map(row =>
+        [row.port, row.ip, row.service, row.protocol, row.version].join(' ').toLowerCase()
+    );
+
+    tables.urls.rows = Array.from(urls, ([url, tools]) => ({ url, tools }));
+    tables.urls.keys = tables.urls.rows.map(row => String(row.url).toLowerCase());
+
+    // Findings of the same type are listed together
+    tables.other.rows = other.sort((a, b) => String(a.type).localeCompare(String(b.type)));
+    tables.other.keys = tables.other.rows.map(row => [row.type, row.value, row.tool].join(' ').toLowerCase());
+
+    Object.values(tables).forEach(table => {
+        table.grams = buildGrams(table.keys);
+        table.view = null;
+        table.term = '';
+    });
+
+    return {
+        counts: {
+            subdomains: tables.subdomains.rows.length,
+            ports: tables.ports.rows.length,
+            urls: tables.urls.rows.length,
+            other: tables.other.rows.length
+        },
+        errors: errors
+    };
+}
+
+/**
+ * Get the distinct trigrams of a string
+ */
+function gramsOf(text) {
+    const grams = new Set();
+    for (let i = 0; i + GRAM_SIZE <= text.length; i++) {
+        grams.add(text.substr(i, GRAM_SIZE));
+    }
+    return grams;
+}
+
+/**
+ * Map every trigram of the keys to the ascending ids of the rows containing it
+ */
+function buildGrams(keys) {
+    const postings = new Map();
+    keys.forEach((key, id) => {
+        gramsOf(key).forEach(gram => {
+            const ids = postings.get(gram);
+            if (ids === undefined) {
+                postings.set(gram, [id]);
+            } else {
+                ids.push(id);
+            }
+        });
+    });
+
+    const grams = new Map();
+    postings.forEach((ids, gram) => grams.set(gram, Uint32Array.from(ids)));
+    return grams;
+}
+
+/**
+ * Check whether an ascending id list contains an id
+ */
+function containsId(ids, id) {
+    let low = 0;
+    let high = ids.length - 1;
+    while (low <= high) {
+        const middle = (low + high) >> 1;
+        if (ids[middle] === id) {
+            return true;
+        }
+        if (ids[middle] < id) {
+            low = middle + 1;
+        } else {
+            high = middle - 1;
+        }
+    }
+    return false;
+}
+
+/**
+ * Get the ids of rows that may contain a term: every row for terms shorter
+ * than a trigram, otherwise the rows holding all of the term's trigrams
+ */
+function candidates(table, term) {
+    if (term.length < GRAM_SIZE) {
+        return null;
+    }
+
+    const lists = [];
+    for (const gram of gramsOf(term)) {
+        const ids = table.grams.get(gram);
+        if (ids === undefined) {
+            return new Uint32Array(0);
+        }
+        lists.push(ids);
+    }
+
+    // Walk the rarest trigram and probe the others
+    lists.sort((a, b) => a.length - b.length);
+    const [rarest, ...others] = lists;
+    const ids = [];
+    for (let i = 0; i < rarest.length; i++) {
+        if (others.every(list => containsId(list, rarest[i]))) {
+            ids.push(rarest[i]);
+        }
+    }
+    return ids;
+}
+
+/**
+ * Filter a category by substring and return the number of matching rows
+ *
+ * Candidates come from the trigram index, or from the previous view when
+ * the term extends the previous one and that view is smaller, since it can
+ * only narrow. Candidates are checked against the keys, as sharing every
+ * trigram does not make the term a substring.
+ */
+function filter(category, term) {
+    const table = tables[category];
+    term = (term || '').trim().toLowerCase();
+
+    if (!term) {
+        table.view = null;
+        table.term = '';
+        return table.rows.length;
+    }
+
+    const keys = table.keys;
+    let ids = candidates(table, term);
+
+    if (table.view !== null && table.term && term.includes(table.term) &&
+            (ids === null || table.view.length < ids.length)) {
+        ids = table.view;
+    }
+
+    const matches = [];
+    if (ids === null) {
+        for (let i = 0; i < keys.length; i++) {
+            if (keys[i].includes(term)) {
+                matches.push(i);
+            }
+        }
+    } else {
+        for (let i = 0; i < ids.length; i++) {
+            if (keys[ids[i]].includes(term)) {
+                matches.push(ids[i]);
+            }
+        }
+    }
+
+    table.view = Uint32Array.from(matches);
+    table.term = term;
+    return table.view.length;
+}
+
+/**
+ * Get the rows of the current view between start (inclusive) and end (exclusive)
+ */
+function rows(category, start, end) {
+    const table = tables[category];
+
+    if (table.view === null) {
+        return table.rows.slice(start, end);
+    }
+
+    const page = [];
+    const last = Math.min(end, table.view.length);
+    for (let i = start; i < last; i++) {
+        page.push(table.rows[table.view[i]]);
+    }
+    return page;
+}
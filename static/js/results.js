@@ -1,605 +1,367 @@
 document.addEventListener('DOMContentLoaded', function() {
-    const scanId = document.getElementById('scanData').dataset.scanId;
-    const targetDomain = document.getElementById('scanData').dataset.target;
+    const scanData = document.getElementById('scanData');
+    const scanId = scanData.dataset.scanId;
     
-    // Pagination settings
-    const itemsPerPage = 10;
-    let currentPage = {
-        subdomains: 1,
-        ports: 1,
-        urls: 1
+    // Indexing and filtering run in a worker; the page only renders visible rows
+    const worker = new Worker(scanData.dataset.workerUrl);
+    const pending = new Map();
+    let nextRequestId = 1;
+    
+    worker.onmessage = function(event) {
+        const { id, result, error } = event.data;
+        const request = pending.get(id);
+        if (!request) {
+            return;
+        }
+        pending.delete(id);
+        if (error) {
+            request.reject(new Error(error));
+        } else {
+            request.resolve(result);
+        }
     };
     
-    // Data containers
-    let allResults = [];
-    let filteredResults = {
-        subdomains: [],
-        ports: [],
-        urls: [],
-        other: [],
-        errors: []
+    // Delay before a filter query is sent while the user is typing
+    const filterDelay = 150;
+    
+    // Tool errors are not virtualized, there is at most one per failed tool
+    let errors = [];
+    
+    // Virtualized tables
+    const tables = {
+        subdomains: new VirtualTable('subdomains', {
+            columns: 3,
+            noun: 'subdomains',
+            emptyMessage: 'No subdomains found',
+            renderRow: item => `
+                <td class="text-truncate" title="${escapeHtml(item.subdomain)}">${escapeHtml(item.subdomain)}</td>
+                <td class="text-truncate">${toolBadges(item.tools)}</td>
+                <td>
+                    <a href="https://${escapeHtml(item.subdomain)}" class="btn btn-sm btn-outline-primary" target="_blank" rel="noopener" title="Open in new tab">
+                        <i class="fas fa-external-link-alt"></i>
+                    </a>
+                </td>
+            `
+        }),
+        ports: new VirtualTable('ports', {
+            columns: 6,
+            noun: 'ports',
+            emptyMessage: 'No open ports found',
+            renderRow: port => `
+                <td>${escapeHtml(port.ip)}</td>
+                <td>${escapeHtml(port.port)}</td>
+                <td>${escapeHtml(port.protocol)}</td>
+                <td class="text-truncate">${escapeHtml(port.service || 'unknown')}</td>
+                <td class="text-truncate" title="${escapeHtml(port.version || '')}">${escapeHtml(port.version || 'unknown')}</td>
+                <td><span class="badge ${stateBadgeClass(port.state)}">${escapeHtml(port.state)}</span></td>
+            `
+        }),
+        urls: new VirtualTable('urls', {
+            columns: 3,
+            noun: 'URLs',
+            emptyMessage: 'No URLs found',
+            renderRow: item => `
+                <td class="text-truncate" title="${escapeHtml(item.url)}">${escapeHtml(item.url)}</td>
+                <td class="text-truncate">${toolBadges(item.tools)}</td>
+                <td>
+                    <a href="${escapeHtml(safeUrl(item.url))}" class="btn btn-sm btn-outline-primary" target="_blank" rel="noopener" title="Open in new tab">
+                        <i class="fas fa-external-link-alt"></i>
+                    </a>
+                </td>
+            `
+        }),
+        other: new VirtualTable('other', {
+            columns: 3,
+            noun: 'findings',
+            emptyMessage: 'No additional findings found',
+            renderRow: finding => `
+                <td class="text-truncate"><span class="badge bg-secondary">${escapeHtml(capitalizeFirstLetter(finding.type))}</span></td>
+                <td class="text-truncate" title="${escapeHtml(finding.value)}">${escapeHtml(finding.value)}</td>
+                <td><span class="badge bg-info">${escapeHtml(finding.tool)}</span></td>
+            `
+        })
     };
     
-    // Load results data
+    // Load summary statistics and results data
+    loadSummary();
     loadResults();
     
-    // Set up search filters
-    document.getElementById('subdomainSearch').addEventListener('input', function() {
-        filterAndDisplaySubdomains(this.value);
-    });
-    
-    document.getElementById('portsSearch').addEventListener('input', function() {
-        filterAndDisplayPorts(this.value);
-    });
+    // Set up debounced search filters
+    bindFilter('subdomainSearch', 'subdomains');
+    bindFilter('portsSearch', 'ports');
+    bindFilter('urlsSearch', 'urls');
+    bindFilter('otherSearch', 'other');
     
-    document.getElementById('urlsSearch').addEventListener('input', function() {
-        filterAndDisplayUrls(this.value);
-    });
+    /**
+     * Send a request to the results worker
+     */
+    function callWorker(type, payload) {
+        return new Promise((resolve, reject) => {
+            const id = nextRequestId++;
+            pending.set(id, { resolve, reject });
+            worker.postMessage(Object.assign({ id, type }, payload));
+        });
+    }
     
     /**
-     * Load scan results from the server
+     * Load and index scan results in the worker
      */
     function loadResults() {
-        fetch(`/get_results/${scanId}`)
-            .then(response => response.json())
+        const url = new URL(`/get_results/${scanId}`, window.location.href).href;
+        
+        callWorker('load', { url })
             .then(data => {
-                if (data.status === 'success') {
-                    allResults = data.data;
-                    processResults(allResults);
-                } else {
-                    showError('Failed to load scan results. Please try refreshing the page.');
-                }
+                errors = data.errors;
+                
+                Object.entries(tables).forEach(([category, table]) => {
+                    table.setCount(data.counts[category]);
+                });
+                
+                displayErrors();
             })
             .catch(error => {
                 console.error('Error fetching results:', error);
-                showError('Network error occurred while loading results.');
+                showError('Failed to load scan results. Please try refreshing the page.');
             });
     }
     
     /**
-     * Process all results into specific categories
+     * Filter a table as the user types, sending only the latest term
      */
-    function processResults(results) {
-        const subdomains = new Map();
-        const ports = [];
-        const urls = new Map();
-        const other = [];
-        const errors = [];
+    function bindFilter(inputId, category) {
+        let timer = null;
+        let sequence = 0;
         
-        results.forEach(result => {
-            switch(result.result_type) {
-                case 'subdomains':
-                    if (Array.isArray(result.data)) {
-                        result.data.forEach(subdomain => {
-                            if (!subdomains.has(subdomain)) {
-                                subdomains.set(subdomain, [result.tool]);
-                            } else {
-                                const tools = subdomains.get(subdomain);
-                                if (!tools.includes(result.tool)) {
-                                    tools.push(result.tool);
-                                }
-                            }
-                        });
-                    }
-                    break;
-                    
-                case 'port_scan':
-                    if (Array.isArray(result.data)) {
-                        result.data.forEach(hostData => {
-                            if (hostData.ports && Array.isArray(hostData.ports)) {
-                                hostData.ports.forEach(port => {
-                                    ports.push({
-                                        ip: hostData.ip,
-                                        port: port.port,
-                                        protocol: port.protocol,
-                                        service: port.service,
-                                        version: port.version,
-                                        state: port.state
-                                    });
-                                });
-                            }
-                        });
-                    }
-                    break;
-                    
-                case 'urls':
-                    if (Array.isArray(result.data)) {
-                        result.data.forEach(url => {
-                            if (!urls.has(url)) {
-                                urls.set(url, [result.tool]);
-                            } else {
-                                const tools = urls.get(url);
-                                if (!tools.includes(result.tool)) {
-                                    tools.push(result.tool);
-                                }
-                            }
-                        });
-                    }
-                    break;
-                    
-                case 'findings':
-                    if (Array.isArray(result.data)) {
-                        result.data.forEach(finding => {
-                            other.push({
-                                type: finding.type || 'unknown',
-                                value: finding.value,
-                                tool: result.tool
-                            });
-                        });
-                    }
-                    break;
-                    
-                case 'error':
-                    errors.push({
-                        tool: result.tool,
-                        message: result.data.message || 'Unknown error'
-                    });
-                    break;
-                    
-                default:
-                    // Store any other result types
-                    other.push({
-                        type: result.result_type,
-                        data: result.data,
-                        tool: result.tool
-                    });
-            }
+        document.getElementById(inputId).addEventListener('input', function() {
+            const term = this.value;
+            clearTimeout(timer);
+            
+            timer = setTimeout(() => {
+                const current = ++sequence;
+                callWorker('filter', { category, term })
+                    .then(data => {
+                        // Ignore answers to terms that were replaced meanwhile
+                        if (current === sequence) {
+                            tables[category].setCount(data.count);
+                        }
+                    })
+                    .catch(error => console.error('Error filtering results:', error));
+            }, filterDelay);
         });
-        
-        // Convert maps to arrays
-        filteredResults.subdomains = Array.from(subdomains).map(([subdomain, tools]) => ({
-            subdomain,
-            tools
-        }));
-        
-        filteredResults.ports = ports;
-        
-        filteredResults.urls = Array.from(urls).map(([url, tools]) => ({
-            url,
-            tools
-        }));
-        
-        filteredResults.other = other;
-        filteredResults.errors = errors;
-        
-        // Display results
-        displaySubdomains();
-        displayPorts();
-        displayUrls();
-        displayOtherFindings();
-        displayErrors();
     }
     
     /**
-     * Filter and display subdomains
+     * Table that keeps only the rows in view in the DOM
+     *
+     * Rows have a fixed height, so the scroll position maps directly to a row
+     * index. Very tall tables are compressed to the browser's maximum element
+     * height and the scroll position is mapped proportionally.
      */
-    function filterAndDisplaySubdomains(searchTerm) {
-        if (!searchTerm) {
-            filteredResults.subdomains = Array.from(new Map(allResults
-                .filter(result => result.result_type === 'subdomains')
-                .flatMap(result => 
-                    Array.isArray(result.data) ? 
-                    result.data.map(subdomain => [subdomain, [result.tool]]) : 
-                    []
-                )
-            ).entries())
-            .map(([subdomain, tools]) => ({
-                subdomain,
-                tools: Array.from(new Set(tools.flat()))
-            }));
-        } else {
-            const searchTermLower = searchTerm.toLowerCase();
+    function VirtualTable(category, options) {
+        const rowHeight = 41;
+        const overscan = 10;
+        const maxHeight = 8000000;
+        
+        const scroller = document.getElementById(`${category}Scroll`);
+        const tableBody = document.getElementById(`${category}Table`);
+        const countElement = document.getElementById(`${category}Count`);
+        
+        let count = 0;
+        let frame = null;
+        let sequence = 0;
+        
+        scroller.addEventListener('scroll', () => {
+            if (frame === null) {
+                frame = requestAnimationFrame(() => {
+                    frame = null;
+                    render();
+                });
+            }
+        });
+        
+        // Tables in hidden tabs have no height until they are shown
+        const tab = document.getElementById(`${category}-tab`);
+        if (tab) {
+            tab.addEventListener('shown.bs.tab', render);
+        }
+        
+        this.setCount = function(newCount) {
+            count = newCount;
+            countElement.textContent = `${count.toLocaleString()} ${options.noun} found`;
+            scroller.scrollTop = 0;
+            render();
+        };
+        
+        function render() {
+            if (count === 0) {
+                tableBody.innerHTML = `
+                    <tr>
+                        <td colspan="${options.columns}" class="text-center">
+                            <p class="my-3 text-muted">${options.emptyMessage}</p>
+                        </td>
+                    </tr>
+                `;
+                return;
+            }
+            
+            const viewport = scroller.clientHeight || 600;
+            const fullHeight = count * rowHeight;
+            const height = Math.min(fullHeight, maxHeight);
+            
+            // Map the scroll position onto the uncompressed table
+            const scrollRange = Math.max(height - viewport, 1);
+            const fullRange = Math.max(fullHeight - viewport, 0);
+            const scrollTop = Math.min(scroller.scrollTop, scrollRange);
+            const virtualTop = fullHeight > maxHeight ? scrollTop / scrollRange * fullRange : scrollTop;
             
-            // Create a filtered map of subdomains
-            const filteredMap = new Map();
+            const first = Math.floor(virtualTop / rowHeight);
+            const start = Math.max(first - overscan, 0);
+            const end = Math.min(first + Math.ceil(viewport / rowHeight) + overscan, count);
             
-            allResults
-                .filter(result => result.result_type === 'subdomains')
-                .forEach(result => {
-                    if (Array.isArray(result.data)) {
-                        result.data
-                            .filter(subdomain => 
-                                subdomain.toLowerCase().includes(searchTermLower)
-                            )
-                            .forEach(subdomain => {
-                                if (!filteredMap.has(subdomain)) {
-                                    filteredMap.set(subdomain, [result.tool]);
-                                } else {
-                                    const tools = filteredMap.get(subdomain);
-                                    if (!tools.includes(result.tool)) {
-                                        tools.push(result.tool);
-                                    }
-                                }
-                            });
+            // Position the first rendered row where it would be in the full table
+            const topSpacer = Math.max(scrollTop - (virtualTop - start * rowHeight), 0);
+            const bottomSpacer = Math.max(height - topSpacer - (end - start) * rowHeight, 0);
+            
+            const current = ++sequence;
+            callWorker('rows', { category, start, end })
+                .then(data => {
+                    if (current !== sequence) {
+                        return;
                     }
-                });
-                
-            filteredResults.subdomains = Array.from(filteredMap).map(([subdomain, tools]) => ({
-                subdomain,
-                tools
-            }));
+                    tableBody.innerHTML =
+                        `<tr style="height: ${topSpacer}px;"><td colspan="${options.columns}" class="p-0 border-0"></td></tr>` +
+                        data.rows.map(row => `<tr style="height: ${rowHeight}px;">${options.renderRow(row)}</tr>`).join('') +
+                        `<tr style="height: ${bottomSpacer}px;"><td colspan="${options.columns}" class="p-0 border-0"></td></tr>`;
+                    
+                    // The container grows up to its maximum height once rows are in it
+                    if (scroller.clientHeight > viewport) {
+                        render();
+                    }
+                })
+                .catch(error => console.error('Error rendering rows:', error));
         }
-        
-        // Reset to first page and display
-        currentPage.subdomains = 1;
-        displaySubdomains();
     }
     
     /**
-     * Display subdomains with pagination
+     * Render tool names as badges
      */
-    function displaySubdomains() {
-        const tableBody = document.getElementById('subdomainsTable');
-        const paginationContainer = document.querySelector('#subdomainsPagination .pagination');
-        const countElement = document.getElementById('subdomainsCount');
-        
-        // Update count
-        countElement.textContent = `${filteredResults.subdomains.length} subdomains found`;
-        
-        // Clear table
-        tableBody.innerHTML = '';
-        
-        if (filteredResults.subdomains.length === 0) {
-            tableBody.innerHTML = `
-                <tr>
-                    <td colspan="3" class="text-center">
-                        <p class="my-3 text-muted">No subdomains found</p>
-                    </td>
-                </tr>
-            `;
-            paginationContainer.innerHTML = '';
-            return;
-        }
-        
-        // Calculate pagination
-        const totalPages = Math.ceil(filteredResults.subdomains.length / itemsPerPage);
-        const startIndex = (currentPage.subdomains - 1) * itemsPerPage;
-        const endIndex = Math.min(startIndex + itemsPerPage, filteredResults.subdomains.length);
-        
-        // Get current page data
-        const currentPageData = filteredResults.subdomains.slice(startIndex, endIndex);
-        
-        // Render table rows
-        currentPageData.forEach(item => {
-            const row = document.createElement('tr');
-            
-            const toolBadges = item.tools.map(tool => 
-                `<span class="badge bg-info me-1">${tool}</span>`
-            ).join('');
-            
-            row.innerHTML = `
-                <td>${item.subdomain}</td>
-                <td>${toolBadges}</td>
-                <td>
-                    <a href="https://${item.subdomain}" class="btn btn-sm btn-outline-primary" target="_blank" title="Open in new tab">
-                        <i class="fas fa-external-link-alt"></i>
-                    </a>
-                </td>
-            `;
-            
-            tableBody.appendChild(row);
-        });
-        
-        // Update pagination
-        updatePagination(paginationContainer, totalPages, currentPage.subdomains, 'subdomains');
+    function toolBadges(tools) {
+        return tools.map(tool => `<span class="badge bg-info me-1">${escapeHtml(tool)}</span>`).join('');
     }
     
     /**
-     * Filter and display ports
+     * Badge color for a port state
      */
-    function filterAndDisplayPorts(searchTerm) {
-        if (!searchTerm) {
-            filteredResults.ports = allResults
-                .filter(result => result.result_type === 'port_scan')
-                .flatMap(result => 
-                    Array.isArray(result.data) ? 
-                    result.data.flatMap(hostData => 
-                        Array.isArray(hostData.ports) ?
-                        hostData.ports.map(port => ({
-                            ip: hostData.ip,
-                            port: port.port,
-                            protocol: port.protocol,
-                            service: port.service,
-                            version: port.version,
-                            state: port.state
-                        })) : []
-                    ) : []
-                );
-        } else {
-            const searchTermLower = searchTerm.toLowerCase();
-            
-            filteredResults.ports = allResults
-                .filter(result => result.result_type === 'port_scan')
-                .flatMap(result => 
-                    Array.isArray(result.data) ? 
-                    result.data.flatMap(hostData => 
-                        Array.isArray(hostData.ports) ?
-                        hostData.ports
-                            .filter(port => 
-                                port.port.toString().includes(searchTerm) ||
-                                port.service.toLowerCase().includes(searchTermLower) ||
-                                port.protocol.toLowerCase().includes(searchTermLower) ||
-                                port.version.toLowerCase().includes(searchTermLower) ||
-                                hostData.ip.includes(searchTerm)
-                            )
-                            .map(port => ({
-                                ip: hostData.ip,
-                                port: port.port,
-                                protocol: port.protocol,
-                                service: port.service,
-                                version: port.version,
-                                state: port.state
-                            })) : []
-                    ) : []
-                );
+    function stateBadgeClass(state) {
+        if (state === 'open') {
+            return 'bg-success';
+        } else if (state === 'closed') {
+            return 'bg-danger';
+        } else if (state === 'filtered') {
+            return 'bg-warning';
         }
-        
-        // Reset to first page and display
-        currentPage.ports = 1;
-        displayPorts();
+        return 'bg-secondary';
     }
     
     /**
-     * Display ports with pagination
+     * Only link to http(s) URLs
      */
-    function displayPorts() {
-        const tableBody = document.getElementById('portsTable');
-        const paginationContainer = document.querySelector('#portsPagination .pagination');
-        const countElement = document.getElementById('portsCount');
-        
-        // Update count
-        countElement.textContent = `${filteredResults.ports.length} ports found`;
-        
-        // Clear table
-        tableBody.innerHTML = '';
-        
-        if (filteredResults.ports.length === 0) {
-            tableBody.innerHTML = `
-                <tr>
-                    <td colspan="6" class="text-center">
-                        <p class="my-3 text-muted">No open ports found</p>
-                    </td>
-                </tr>
-            `;
-            paginationContainer.innerHTML = '';
-            return;
-        }
-        
-        // Calculate pagination
-        const totalPages = Math.ceil(filteredResults.ports.length / itemsPerPage);
-        const startIndex = (currentPage.ports - 1) * itemsPerPage;
-        const endIndex = Math.min(startIndex + itemsPerPage, filteredResults.ports.length);
-        
-        // Get current page data
-        const currentPageData = filteredResults.ports.slice(startIndex, endIndex);
-        
-        // Render table rows
-        currentPageData.forEach(port => {
-            const row = document.createElement('tr');
-            
-            // Determine state badge color
-            let stateBadgeClass = 'bg-secondary';
-            if (port.state === 'open') {
-                stateBadgeClass = 'bg-success';
-            } else if (port.state === 'closed') {
-                stateBadgeClass = 'bg-danger';
-            } else if (port.state === 'filtered') {
-                stateBadgeClass = 'bg-warning';
-            }
-            
-            row.innerHTML = `
-                <td>${port.ip}</td>
-                <td>${port.port}</td>
-                <td>${port.protocol}</td>
-                <td>${port.service || 'unknown'}</td>
-                <td>${port.version || 'unknown'}</td>
-                <td><span class="badge ${stateBadgeClass}">${port.state}</span></td>
-            `;
-            
-            tableBody.appendChild(row);
-        });
-        
-        // Update pagination
-        updatePagination(paginationContainer, totalPages, currentPage.ports, 'ports');
+    function safeUrl(url) {
+        return /^https?:\/\//i.test(url) ? url : '#';
     }
     
     /**
-     * Filter and display URLs
+     * Escape a value for use in HTML
      */
-    function filterAndDisplayUrls(searchTerm) {
-        if (!searchTerm) {
-            const urlMap = new Map();
-            
-            allResults
-                .filter(result => result.result_type === 'urls')
-                .forEach(result => {
-                    if (Array.isArray(result.data)) {
-                        result.data.forEach(url => {
-                            if (!urlMap.has(url)) {
-                                urlMap.set(url, [result.tool]);
-                            } else {
-                                const tools = urlMap.get(url);
-                                if (!tools.includes(result.tool)) {
-                                    tools.push(result.tool);
-                                }
-                            }
-                        });
-                    }
-                });
-                
-            filteredResults.urls = Array.from(urlMap).map(([url, tools]) => ({
-                url,
-                tools
-            }));
-        } else {
-            const searchTermLower = searchTerm.toLowerCase();
-            const urlMap = new Map();
-            
-            allResults
-                .filter(result => result.result_type === 'urls')
-                .forEach(result => {
-                    if (Array.isArray(result.data)) {
-                        result.data
-                            .filter(url => url.toLowerCase().includes(searchTermLower))
-                            .forEach(url => {
-                                if (!urlMap.has(url)) {
-                                    urlMap.set(url, [result.tool]);
-                                } else {
-                                    const tools = urlMap.get(url);
-                                    if (!tools.includes(result.tool)) {
-                                        tools.push(result.tool);
-                                    }
-                                }
-                            });
-                    }
-                });
-                
-            filteredResults.urls = Array.from(urlMap).map(([url, tools]) => ({
-                url,
-                tools
-            }));
-        }
-        
-        // Reset to first page and display
-        currentPage.urls = 1;
-        displayUrls();
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        return div.innerHTML;
     }
     
     /**
-     * Display URLs with pagination
+     * Load the scan summary maintained by the server
      */
-    function displayUrls() {
-        const tableBody = document.getElementById('urlsTable');
-        const paginationContainer = document.querySelector('#urlsPagination .pagination');
-        const countElement = document.getElementById('urlsCount');
-        
-        // Update count
-        countElement.textContent = `${filteredResults.urls.length} URLs found`;
-        
-        // Clear table
-        tableBody.innerHTML = '';
-        
-        if (filteredResults.urls.length === 0) {
-            tableBody.innerHTML = `
-                <tr>
-                    <td colspan="3" class="text-center">
-                        <p class="my-3 text-muted">No URLs found</p>
-                    </td>
-                </tr>
-            `;
-            paginationContainer.innerHTML = '';
-            return;
-        }
-        
-        // Calculate pagination
-        const totalPages = Math.ceil(filteredResults.urls.length / itemsPerPage);
-        const startIndex = (currentPage.urls - 1) * itemsPerPage;
-        const endIndex = Math.min(startIndex + itemsPerPage, filteredResults.urls.length);
-        
-        // Get current page data
-        const currentPageData = filteredResults.urls.slice(startIndex, endIndex);
-        
-        // Render table rows
-        currentPageData.forEach(item => {
-            const row = document.createElement('tr');
-            
-            const toolBadges = item.tools.map(tool => 
-                `<span class="badge bg-info me-1">${tool}</span>`
-            ).join('');
-            
-            // Truncate long URLs
-            let displayUrl = item.url;
-            const maxLength = 100;
-            if (displayUrl.length > maxLength) {
-                displayUrl = displayUrl.substring(0, maxLength) + '...';
-            }
-            
-            row.innerHTML = `
-                <td title="${item.url}">${displayUrl}</td>
-                <td>${toolBadges}</td>
-                <td>
-                    <a href="${item.url}" class="btn btn-sm btn-outline-primary" target="_blank" title="Open in new tab">
-                        <i class="fas fa-external-link-alt"></i>
-                    </a>
-                </td>
-            `;
-            
-            tableBody.appendChild(row);
-        });
-        
-        // Update pagination
-        updatePagination(paginationContainer, totalPages, currentPage.urls, 'urls');
+    function loadSummary() {
+        fetch(`/scan_summary/${scanId}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status === 'success') {
+                    displaySummary(data.data);
+                }
+            })
+            .catch(error => {
+                console.error('Error fetching summary:', error);
+            });
     }
     
     /**
-     * Display other findings
+     * Display unique counts, tool contribution, service counts and tool overlap
      */
-    function displayOtherFindings() {
-        const container = document.getElementById('otherFindings');
-        
-        // Clear container
-        container.innerHTML = '';
-        
-        if (filteredResults.other.length === 0) {
-            container.innerHTML = `
-                <div class="text-center my-4">
-                    <p class="text-muted">No additional findings found</p>
-                </div>
-            `;
-            return;
+    function displaySummary(summary) {
+        document.getElementById('summarySubdomains').textContent = summary.unique.hostname;
+        document.getElementById('summaryPorts').textContent = summary.unique.service;
+        document.getElementById('summaryUrls').textContent = summary.unique.url;
+        document.getElementById('summarySingleTool').textContent = summary.single_tool.hostname;
+        
+        // Tool contribution, most exclusive subdomains first
+        const tools = Array.from(new Set([
+            ...Object.keys(summary.tools),
+            ...Object.keys(summary.errors)
+        ]));
+        const exclusive = tool => ((summary.tools[tool] || {}).hostname || {}).exclusive || 0;
+        tools.sort((a, b) => exclusive(b) - exclusive(a) || a.localeCompare(b));
+        
+        const toolsBody = document.getElementById('summaryTools');
+        if (tools.length === 0) {
+            toolsBody.innerHTML = '<tr><td colspan="5" class="text-center text-muted">No results yet</td></tr>';
+        } else {
+            toolsBody.innerHTML = tools.map(tool => {
+                const counts = summary.tools[tool] || {};
+                const cell = kind => counts[kind] ? `${escapeHtml(counts[kind].found)} / ${escapeHtml(counts[kind].exclusive)}` : '-';
+                return `
+                    <tr>
+                        <td><span class="badge bg-info">${escapeHtml(tool)}</span></td>
+                        <td>${cell('hostname')}</td>
+                        <td>${cell('service')}</td>
+                        <td>${cell('url')}</td>
+                        <td>${escapeHtml(summary.errors[tool] || 0)}</td>
+                    </tr>
+                `;
+            }).join('');
         }
         
-        // Group findings by type
-        const findingsByType = {};
-        filteredResults.other.forEach(finding => {
-            if (!findingsByType[finding.type]) {
-                findingsByType[finding.type] = [];
-            }
-            findingsByType[finding.type].push(finding);
-        });
-        
-        // Display each type in an accordion
-        const accordion = document.createElement('div');
-        accordion.className = 'accordion';
-        accordion.id = 'otherFindingsAccordion';
+        // Open ports by service, most common first
+        const services = Object.entries(summary.services).sort((a, b) => b[1] - a[1]);
+        document.getElementById('summaryServices').innerHTML = services.length === 0 ?
+            '<span class="text-muted">No open ports</span>' :
+            services.map(([service, count]) =>
+                `<span class="badge bg-secondary me-1 mb-1">${escapeHtml(service)}: ${escapeHtml(count)}</span>`
+            ).join('');
         
-        let index = 0;
-        for (const [type, findings] of Object.entries(findingsByType)) {
-            const accordionItem = document.createElement('div');
-            accordionItem.className = 'accordion-item';
-            
-            const headerId = `heading-${type}-${index}`;
-            const collapseId = `collapse-${type}-${index}`;
-            
-            accordionItem.innerHTML = `
-                <h2 class="accordion-header" id="${headerId}">
-                    <button class="accordion-button ${index > 0 ? 'collapsed' : ''}" type="button" data-bs-toggle="collapse" data-bs-target="#${collapseId}" aria-expanded="${index === 0 ? 'true' : 'false'}" aria-controls="${collapseId}">
-                        ${capitalizeFirstLetter(type)} (${findings.length})
-                    </button>
-                </h2>
-                <div id="${collapseId}" class="accordion-collapse collapse ${index === 0 ? 'show' : ''}" aria-labelledby="${headerId}" data-bs-parent="#otherFindingsAccordion">
-                    <div class="accordion-body">
-                        <div class="list-group">
-                            ${findings.map(finding => `
-                                <div class="list-group-item list-group-item-action">
-                                    <div class="d-flex w-100 justify-content-between">
-                                        <h6 class="mb-1">${finding.value || JSON.stringify(finding.data)}</h6>
-                                        <small class="text-muted">
-                                            <span class="badge bg-info">${finding.tool}</span>
-                                        </small>
-                                    </div>
-                                </div>
-                            `).join('')}
-                        </div>
-                    </div>
-                </div>
-            `;
-            
-            accordion.appendChild(accordionItem);
-            index++;
+        // Subdomains found by both tools of each pair, found counts on the diagonal
+        const overlap = summary.overlap.hostname;
+        const overlapTools = Object.keys(overlap).sort();
+        const overlapTable = document.getElementById('summaryOverlap');
+        if (overlapTools.length < 2) {
+            overlapTable.innerHTML = '<tr><td class="text-muted">Needs subdomains from at least two tools</td></tr>';
+            return;
         }
-        
-        container.appendChild(accordion);
+        overlapTable.innerHTML = `
+            <thead>
+                <tr><th></th>${overlapTools.map(tool => `<th>${escapeHtml(tool)}</th>`).join('')}</tr>
+            </thead>
+            <tbody>
+                ${overlapTools.map(row => `
+                    <tr>
+                        <th>${escapeHtml(row)}</th>
+                        ${overlapTools.map(column => `
+                            <td class="${row === column ? 'table-active' : ''}">${escapeHtml(overlap[row][column] || 0)}</td>
+                        `).join('')}
+                    </tr>
+                `).join('')}
+            </tbody>
+        `;
     }
     
     /**
@@ -611,7 +373,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // Clear container
         container.innerHTML = '';
         
-        if (filteredResults.errors.length === 0) {
+        if (errors.length === 0) {
             container.innerHTML = `
                 <div class="text-center my-4">
                     <p class="text-muted">No errors reported</p>
@@ -624,16 +386,16 @@ document.addEventListener('DOMContentLoaded', function() {
         const list = document.createElement('div');
         list.className = 'list-group';
         
-        filteredResults.errors.forEach(error => {
+        errors.forEach(error => {
             const item = document.createElement('div');
             item.className = 'list-group-item list-group-item-danger';
             
             item.innerHTML = `
                 <div class="d-flex w-100 justify-content-between">
-                    <h6 class="mb-1">${error.tool}</h6>
+                    <h6 class="mb-1">${escapeHtml(error.tool)}</h6>
                     <small>Error</small>
                 </div>
-                <p class="mb-1">${error.message}</p>
+                <p class="mb-1">${escapeHtml(error.message)}</p>
             `;
             
             list.appendChild(item);
@@ -642,110 +404,11 @@ document.addEventListener('DOMContentLoaded', function() {
         container.appendChild(list);
     }
     
-    /**
-     * Update pagination controls
-     */
-    function updatePagination(container, totalPages, currentPageNum, category) {
-        container.innerHTML = '';
-        
-        if (totalPages <= 1) {
-            return;
-        }
-        
-        // Previous button
-        const prevLi = document.createElement('li');
-        prevLi.className = `page-item ${currentPageNum === 1 ? 'disabled' : ''}`;
-        
-        const prevLink = document.createElement('a');
-        prevLink.className = 'page-link';
-        prevLink.href = '#';
-        prevLink.innerHTML = '&laquo;';
-        prevLink.setAttribute('aria-label', 'Previous');
-        
-        if (currentPageNum > 1) {
-            prevLink.addEventListener('click', function(e) {
-                e.preventDefault();
-                currentPage[category]--;
-                updateDisplay(category);
-            });
-        }
-        
-        prevLi.appendChild(prevLink);
-        container.appendChild(prevLi);
-        
-        // Page numbers
-        const maxVisiblePages = 5;
-        let startPage = Math.max(1, currentPageNum - Math.floor(maxVisiblePages / 2));
-        let endPage = Math.min(totalPages, startPage + maxVisiblePages - 1);
-        
-        if (endPage - startPage + 1 < maxVisiblePages) {
-            startPage = Math.max(1, endPage - maxVisiblePages + 1);
-        }
-        
-        for (let i = startPage; i <= endPage; i++) {
-            const pageLi = document.createElement('li');
-            pageLi.className = `page-item ${i === currentPageNum ? 'active' : ''}`;
-            
-            const pageLink = document.createElement('a');
-            pageLink.className = 'page-link';
-            pageLink.href = '#';
-            pageLink.textContent = i;
-            
-            if (i !== currentPageNum) {
-                pageLink.addEventListener('click', function(e) {
-                    e.preventDefault();
-                    currentPage[category] = i;
-                    updateDisplay(category);
-                });
-            }
-            
-            pageLi.appendChild(pageLink);
-            container.appendChild(pageLi);
-        }
-        
-        // Next button
-        const nextLi = document.createElement('li');
-        nextLi.className = `page-item ${currentPageNum === totalPages ? 'disabled' : ''}`;
-        
-        const nextLink = document.createElement('a');
-        nextLink.className = 'page-link';
-        nextLink.href = '#';
-        nextLink.innerHTML = '&raquo;';
-        nextLink.setAttribute('aria-label', 'Next');
-        
-        if (currentPageNum < totalPages) {
-            nextLink.addEventListener('click', function(e) {
-                e.preventDefault();
-                currentPage[category]++;
-                updateDisplay(category);
-            });
-        }
-        
-        nextLi.appendChild(nextLink);
-        container.appendChild(nextLi);
-    }
-    
-    /**
-     * Update display based on category
-     */
-    function updateDisplay(category) {
-        switch(category) {
-            case 'subdomains':
-                displaySubdomains();
-                break;
-            case 'ports':
-                displayPorts();
-                break;
-            case 'urls':
-                displayUrls();
-                break;
-        }
-    }
-    
     /**
      * Helper function to capitalize first letter
      */
     function capitalizeFirstLetter(string) {
+        string = String(string);
         return string.charAt(0).toUpperCase() + string.slice(1);
     }
     
@@ -0,0 +1,118 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const searchForm = document.getElementById('searchForm');
+    const tableBody = document.getElementById('searchResultsTable');
+    const countElement = document.getElementById('searchCount');
+    const moreBtn = document.getElementById('searchMoreBtn');
+
+    const pageSize = 50;
+    let currentParams = null;
+    let offset = 0;
+    let hitCount = 0;
+
+    // Form submission handler
+    searchForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+
+        currentParams = new URLSearchParams();
+        new FormData(searchForm).forEach((value, key) => {
+            if (value) {
+                currentParams.append(key, value);
+            }
+        });
+
+        offset = 0;
+        hitCount = 0;
+        tableBody.innerHTML = '';
+        runSearch();
+    });
+
+    // Load more button handler
+    moreBtn.addEventListener('click', function() {
+        runSearch();
+    });
+
+    /**
+     * Fetch the next page of hits for the current query
+     */
+    function runSearch() {
+        const params = new URLSearchParams(currentParams);
+        params.set('limit', pageSize);
+        params.set('offset', offset);
+
+        fetch(`/api/search?${params.toString()}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.status === 'success') {
+                    appendHits(data.data);
+                    offset += data.data.length;
+                    moreBtn.style.display = data.data.length === pageSize ? 'block' : 'none';
+                } else {
+                    showMessage(data.message || 'Search failed');
+                }
+            })
+            .catch(error => {
+                console.error('Error searching results:', error);
+                showMessage('Network error occurred while searching.');
+            });
+    }
+
+    /**
+     * Render search hits as table rows
+     */
+    function appendHits(hits) {
+        if (hitCount === 0 && hits.length === 0) {
+            showMessage('No matches found');
+            return;
+        }
+
+        hits.forEach(hit => {
+            const row = document.createElement('tr');
+
+            row.innerHTML = `
+                <td class="text-break">${markSnippet(hit.snippet)}</td>
+                <td><span class="badge bg-info">${escapeHtml(hit.tool)}</span></td>
+                <td>${escapeHtml(hit.result_type)}</td>
+                <td><a href="/results/${encodeURIComponent(hit.scan_id)}">${escapeHtml(hit.target)}</a></td>
+                <td>${escapeHtml(hit.created_at.replace('T', ' ').substring(0, 19))}</td>
+            `;
+
+            tableBody.appendChild(row);
+        });
+
+        hitCount += hits.length;
+        countElement.textContent = `${hitCount} matches shown`;
+    }
+
+    /**
+     * Escape a snippet and turn the STX/ETX match markers into <mark> tags
+     */
+    function markSnippet(snippet) {
+        return escapeHtml(snippet)
+            .replace(/\u0002/g, '<mark>')
+            .replace(/\u0003/g, '</mark>');
+    }
+
+    /**
+     * Escape text for insertion into HTML
+     */
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        return div.innerHTML;
+    }
+
+    /**
+     * Show a single message row in the results table
+     */
+    function showMessage(message) {
+        tableBody.innerHTML = `
+            <tr>
+                <td colspan="5" class="text-center">
+                    <p class="my-3 text-muted">${escapeHtml(message)}</p>
+                </td>
+            </tr>
+        `;
+        countElement.textContent = '';
+        moreBtn.style.display = 'none';
+    }
+});
@@ -0,0 +1,281 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import datetime
+from typing import Any, Dict, Tuple
+
+# zstd is optional; fall back to gzip when the binding is not installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Payloads at or above this size (bytes of serialized JSON) are moved into
+# compressed, content-addressed blobs instead of living inline in ScanResult.data
+COMPRESSION_THRESHOLD = int(os.environ.get("RESULT_COMPRESSION_THRESHOLD", 64 * 1024))
+COMPRESSION_LEVEL = int(os.environ.get("RESULT_COMPRESSION_LEVEL", 6))
+
+# Unreferenced blobs used more recently than this are kept, since a result
+# referencing them may still be waiting to commit
+BLOB_GRACE_MINUTES = int(os.environ.get("BLOB_GRACE_MINUTES", 10))
+
+
+def content_hash(raw: bytes) -> str:
+    """
+    Compute the content address of a serialized payload.
+
+    Args:
+        raw: Serialized payload bytes
+
+    Returns:
+        str: Hex encoded SHA-256 digest
+    """
+    return hashlib.sha256(raw).hexdigest()
+
+
+def compress(raw: bytes) -> Tuple[str, bytes]:
+    """
+    Compress a payload with the best available codec.
+
+    Args:
+        raw: Serialized payload bytes
+
+    Returns:
+        tuple: (encoding (str), compressed bytes)
+    """
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(raw)
+    return 'gzip', gzip.compress(raw, compresslevel=COMPRESSION_LEVEL)
+
+
+def decompress(encoding: str, blob: bytes) -> bytes:
+    """
+    Decompress a payload stored with the given encoding.
+
+    Args:
+        encoding: Codec name recorded with the blob
+        blob: Compressed bytes
+
+    Returns:
+        bytes: Serialized payload bytes
+    """
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd compressed results")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if encoding == 'gzip':
+        return gzip.decompress(blob)
+    if encoding == 'identity':
+        return blob
+    raise ValueError(f"Unknown result encoding: {encoding}")
+
+
+def store_result_data(session, data: Any) -> Dict[str, Any]:
+    """
+    Serialize result data and build the storage columns for a ScanResult.
+
+    Small payloads stay inline as JSON text. Larger payloads are compressed
+    and stored once per unique content in ResultBlob; the ScanResult only
+    keeps the content hash.
+
+    Reused blobs are touched with an UPDATE in the caller's transaction, so
+    delete_unused_blobs() cannot remove them before the result commits. If
+    the blob was removed before the touch, it is stored again.
+
+    Args:
+        session: SQLAlchemy session used to look up and add blobs
+        data: Result data
+
+    Returns:
+        dict: Column values for the ScanResult (data, blob_hash)
+    """
+    from models import ResultBlob
+
+    text = json.dumps(data)
+    raw = text.encode('utf-8')
+
+    if len(raw) < COMPRESSION_THRESHOLD:
+        return {'data': text, 'blob_hash': None}
+
+    digest = content_hash(raw)
+    now = datetime.datetime.utcnow()
+    touched = (
+        session.query(ResultBlob)
+        .filter_by(hash=digest)
+        .update({'used_at': now}, synchronize_session=False)
+    )
+    if not touched and session.get(ResultBlob, digest) is None:
+        encoding, compressed = compress(raw)
+        session.add(ResultBlob(
+            hash=digest,
+            encoding=encoding,
+            data=compressed,
+            size=len(raw),
+            used_at=now
+        ))
+        logger.debug(f"Stored {encoding} blob {digest[:12]} ({len(raw)} -> {len(compressed)} bytes)")
+
+    return {'data': '', 'blob_hash': digest}
+
+
+def load_result_data(result) -> Any:
+    """
+    Decode the data of a ScanResult regardless of how it is stored.
+
+    Args:
+        result: ScanResult instance
+
+    Returns:
+        Result data
+    """
+    if result.blob_hash:
+        blob = result.blob
+        if blob is None:
+            raise ValueError(f"Missing result blob {result.blob_hash} for result {result.id}")
+        return json.loads(decompress(blob.encoding, blob.data))
+    return json.loads(result.data)
+
+
+def upgrade_schema(engine) -> None:
+    """
+    Add columns introduced after a database was first created.
+
+    db.create_all() only creates missing tables, so existing recon.db files
+    need newer columns added in place.
+
+    Args:
+        engine: SQLAlchemy engine bound to the application database
+    """
+    from sqlalchemy import inspect, text
+
+    columns = {
+        'scan': {
+            'scope': 'TEXT',
+            'archived_at': 'DATETIME',
+            'archive_path': 'VARCHAR(512)',
+            'schedule_id': 'INTEGER',
+            'heartbeat_at': 'DATETIME',
+        },
+        'scan_result': {
+            'blob_hash': 'VARCHAR(64)',
+        },
+        'asset_sighting': {
+            'tools': 'TEXT',
+        },
+        'result_blob': {
+            'used_at': 'DATETIME',
+        },
+        'scheduled_scan': {
+            'consecutive_deferrals': 'INTEGER DEFAULT 0',
+        },
+    }
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, wanted in columns.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, ddl in wanted.items():
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"Added column {table}.{name}")
+
+
+def compact_results(session, batch_size: int = 500, vacuum: bool = True) -> Dict[str, int]:
+    """
+    Move large inline payloads into compressed blobs and drop unused blobs.
+
+    Args:
+        session: SQLAlchemy session bound to the application database
+        batch_size: Number of rows to rewrite per commit
+        vacuum: Run VACUUM afterwards to return freed pages to the filesystem
+
+    Returns:
+        dict: Counts of rewritten rows, bytes saved and deleted blobs
+    """
+    from sqlalchemy import func
+    from models import ScanResult
+
+    stats = {'rows_rewritten': 0, 'bytes_before': 0, 'blobs_deleted': 0}
+
+    last_id = 0
+    while True:
+        rows = (
+            session.query(ScanResult)
+            .filter(ScanResult.id > last_id)
+            .filter(ScanResult.blob_hash.is_(None))
+            .filter(func.length(ScanResult.data) >= COMPRESSION_THRESHOLD)
+            .order_by(ScanResult.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        for row in rows:
+            stats['bytes_before'] += len(row.data.encode('utf-8'))
+            columns = store_result_data(session, json.loads(row.data))
+            # Make the new blob visible to the next lookup in this batch
+            session.flush()
+            row.data = columns['data']
+            row.blob_hash = columns['blob_hash']
+            stats['rows_rewritten'] += 1
+            last_id = row.id
+
+        session.commit()
+        logger.info(f"Compacted {stats['rows_rewritten']} results so far")
+
+    stats['blobs_deleted'] = delete_unused_blobs(session)
+
+    if vacuum:
+        vacuum_database(session)
+
+    return stats
+
+
+def delete_unused_blobs(session) -> int:
+    """
+    Delete blobs no longer referenced by any ScanResult.
+
+    Blobs stored or reused within BLOB_GRACE_MINUTES are kept, since the
+    result referencing them may not have committed yet.
+
+    Args:
+        session: SQLAlchemy session
+
+    Returns:
+        int: Number of deleted blobs
+    """
+    from sqlalchemy import func
+    from models import ScanResult, ResultBlob
+
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(minutes=BLOB_GRACE_MINUTES)
+    referenced = session.query(ScanResult.blob_hash).filter(ScanResult.blob_hash.isnot(None))
+    deleted = (
+        session.query(ResultBlob)
+        .filter(ResultBlob.hash.notin_(referenced))
+        .filter(func.coalesce(ResultBlob.used_at, ResultBlob.created_at) < cutoff)
+        .delete(synchronize_session=False)
+    )
+    session.commit()
+    return deleted
+
+
+def vacuum_database(session) -> None:
+    """
+    Return freed SQLite pages to the filesystem.
+
+    Args:
+        session: SQLAlchemy session
+    """
+    from sqlalchemy import text
+
+    if session.get_bind().dialect.name == 'sqlite':
+        with session.get_bind().connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
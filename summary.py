@@ -0,0 +1,188 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from inventory import extract_assets
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Asset kinds counted in summaries
+SUMMARY_KINDS = ('hostname', 'service', 'url')
+
+
+def empty_summary() -> Dict[str, Any]:
+    """Get the summary of a scan without results."""
+    return {
+        'results': {},  # Stored results per result type
+        'errors': {},  # Error results per tool
+        'unique': {kind: 0 for kind in SUMMARY_KINDS},  # Distinct assets
+        'single_tool': {kind: 0 for kind in SUMMARY_KINDS},  # Assets only one tool found
+        'tools': {},  # {tool: {kind: {'found': n, 'exclusive': n}}}
+        'overlap': {kind: {} for kind in SUMMARY_KINDS},  # {kind: {tool: {tool: n}}}, found counts on the diagonal
+        'services': {}  # Open ports per service name
+    }
+
+
+def _tool_counts(summary: Dict[str, Any], tool: str, kind: str) -> Dict[str, int]:
+    kinds = summary['tools'].setdefault(tool, {})
+    return kinds.setdefault(kind, {'found': 0, 'exclusive': 0})
+
+
+def apply_result(summary: Dict[str, Any], tool: str, result_type: str,
+                 changes: List[Tuple[str, str, List[str], Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Fold a stored result into a scan summary.
+
+    Args:
+        summary: Summary to update in place
+        tool: Tool name
+        result_type: Type of result
+        changes: Assets the tool reported for the first time in the scan, as
+            collected by record_assets
+
+    Returns:
+        dict: The updated summary
+    """
+    summary['results'][result_type] = summary['results'].get(result_type, 0) + 1
+    if result_type == 'error':
+        summary['errors'][tool] = summary['errors'].get(tool, 0) + 1
+
+    for kind, value, previous, extra in changes:
+        if kind not in SUMMARY_KINDS:
+            continue
+
+        counts = _tool_counts(summary, tool, kind)
+        counts['found'] += 1
+
+        if not previous:
+            summary['unique'][kind] += 1
+            summary['single_tool'][kind] += 1
+            counts['exclusive'] += 1
+            if kind == 'service':
+                service = extra.get('service') or 'unknown'
+                summary['services'][service] = summary['services'].get(service, 0) + 1
+        elif len(previous) == 1:
+            # The asset is no longer exclusive to the tool that found it first
+            summary['single_tool'][kind] -= 1
+            _tool_counts(summary, previous[0], kind)['exclusive'] -= 1
+
+        overlap = summary['overlap'][kind]
+        row = overlap.setdefault(tool, {})
+        row[tool] = row.get(tool, 0) + 1
+        for other in previous:
+            row[other] = row.get(other, 0) + 1
+            other_row = overlap.setdefault(other, {})
+            other_row[tool] = other_row.get(tool, 0) + 1
+
+    return summary
+
+
+def update_summary(session, scan_id: str, tool: str, result_type: str,
+                   changes: List[Tuple[str, str, List[str], Dict[str, Any]]]) -> None:
+    """
+    Fold a stored result into the persisted summary of its scan.
+
+    Runs inside the caller's transaction so the summary is committed
+    together with the ScanResult it was derived from.
+
+    Args:
+        session: SQLAlchemy session
+        scan_id: Unique scan identifier
+        tool: Tool name
+        result_type: Type of result
+        changes: Assets the tool reported for the first time in the scan
+    """
+    from models import ScanSummary
+
+    row = session.get(ScanSummary, scan_id)
+    if row is None:
+        row = ScanSummary(scan_id=scan_id, data=json.dumps(empty_summary()))
+        session.add(row)
+
+    row.data = json.dumps(apply_result(row.summary_dict, tool, result_type, changes))
+
+
+def summarize_results(results: List[Any]) -> Dict[str, Any]:
+    """
+    Compute a summary from stored results, for scans stored before summaries existed.
+
+    Args:
+        results: ScanResult instances in insertion order
+
+    Returns:
+        dict: Scan summary
+    """
+    summary = empty_summary()
+    found = {}  # {(kind, value): tools}
+
+    for result in results:
+        changes = []
+        if result.result_type != 'error':
+            for (kind, value), extra in extract_assets(result.result_type, result.payload).items():
+                tools = found.setdefault((kind, value), [])
+                if result.tool not in tools:
+                    changes.append((kind, value, list(tools), extra))
+                    tools.append(result.tool)
+        apply_result(summary, result.tool, result.result_type, changes)
+
+    return summary
+
+
+def get_summaries(session, scan_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the summaries of several scans, computing missing ones once.
+
+    Args:
+        session: SQLAlchemy session
+        scan_ids: Unique scan identifiers
+
+    Returns:
+        dict: Summaries by scan id, for scans that exist
+    """
+    from models import Scan, ScanResult, ScanSummary
+
+    summaries = {
+        row.scan_id: row.summary_dict
+        for row in session.query(ScanSummary).filter(ScanSummary.scan_id.in_(scan_ids))
+    }
+
+    missing = [
+        scan_id for (scan_id,) in session.query(Scan.id).filter(Scan.id.in_(scan_ids))
+        if scan_id not in summaries
+    ]
+    for scan_id in missing:
+        results = (
+            session.query(ScanResult)
+            .filter_by(scan_id=scan_id)
+            .order_by(ScanResult.id)
+            .all()
+        )
+        summaries[scan_id] = summarize_results(results)
+        try:
+            session.add(ScanSummary(scan_id=scan_id, data=json.dumps(summaries[scan_id])))
+            session.commit()
+        except IntegrityError:
+            # The scan stored its first result meanwhile and created the row
+            session.rollback()
+            row = session.get(ScanSummary, scan_id)
+            if row is not None:
+                summaries[scan_id] = row.summary_dict
+
+    return summaries
+
+
+def get_summary(session, scan_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the summary of a scan.
+
+    Args:
+        session: SQLAlchemy session
+        scan_id: Unique scan identifier
+
+    Returns:
+        dict: Scan summary, or None if the scan does not exist
+    """
+    return get_summaries(session, [scan_id]).get(scan_id)
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import, so point it at a throwaway
+# database and cache before any test module imports it
+_tmp = tempfile.mkdtemp(prefix='recon-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault('RECON_CACHE_DIR', os.path.join(_tmp, 'cache'))
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+
+
+@pytest.fixture
+def session():
+    """Database session inside an app context, emptied after the test."""
+    from app import app, db
+
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
@@ -0,0 +1,87 @@
+import gzip
+
+import pytest
+
+from exports import EtagCache, accepts_gzip, etag_matches, export_response, not_modified, etag_cache
+
+
+class Export:
+    def __init__(self, raw: bytes):
+        self.scan_id = 'scan-1'
+        self.format = 'json'
+        self.etag = 'abc123'
+        self.data = gzip.compress(raw)
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('', False),
+    ('"abc123"', True),
+    ('W/"abc123"', True),
+    ('"abc123-gzip"', True),
+    ('"other", "abc123"', True),
+    ('*', True),
+    ('"abc1234"', False),
+    ('"other"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, 'abc123') is expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, False),
+    ('', False),
+    ('gzip', True),
+    ('deflate, gzip;q=0.5', True),
+    ('GZIP', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('gzip;q=0.0, br', False),
+    ('br, deflate', False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_export_response_negotiates_encoding():
+    export = Export(b'{"results": []}')
+
+    body, status, headers = export_response(export, None, 'gzip')
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == '"abc123-gzip"'
+    assert gzip.decompress(body) == b'{"results": []}'
+
+    body, status, headers = export_response(export, None, None)
+    assert 'Content-Encoding' not in headers
+    assert headers['ETag'] == '"abc123"'
+    assert body == b'{"results": []}'
+
+    # A tag received in one encoding revalidates the other
+    body, status, headers = export_response(export, '"abc123-gzip"', None)
+    assert (body, status) == (b'', 304)
+
+
+def test_not_modified_answers_from_cache():
+    etag_cache.put('scan-cached', 'json', 'abc123')
+    try:
+        assert not_modified('scan-cached', 'json', '"abc123"', 'gzip')[1] == 304
+        assert not_modified('scan-cached', 'json', '"stale"', 'gzip') is None
+        assert not_modified('scan-cached', 'csv', '"abc123"', 'gzip') is None
+    finally:
+        etag_cache.discard('scan-cached')
+
+
+def test_etag_cache_evicts_least_recent_and_discards_scans():
+    cache = EtagCache(size=2)
+    cache.put('a', 'json', '1')
+    cache.put('b', 'json', '2')
+    cache.get('a', 'json')
+    cache.put('c', 'json', '3')
+
+    assert cache.get('b', 'json') is None
+    assert cache.get('a', 'json') == '1'
+
+    cache.discard('a')
+    assert cache.get('a', 'json') is None
+    assert cache.get('c', 'json') == '3'
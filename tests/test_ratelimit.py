@@ -0,0 +1,84 @@
+import pytest
+
+import ratelimit
+from ratelimit import TokenBucket, RateLimiter, is_throttled, limiter_keys, registrable_domain, target_key
+
+
+@pytest.fixture(autouse=True)
+def without_suffix_list(monkeypatch):
+    # Exercise the built-in fallback whether or not tldextract is installed
+    monkeypatch.setattr(ratelimit, '_extract', None)
+
+
+def test_bucket_spends_burst_then_refills_at_rate():
+    bucket = TokenBucket(rate=0.5, capacity=2, max_concurrent=5)
+    now = bucket.updated
+
+    for _ in range(2):
+        assert bucket.wait_time(now, hold=False) == 0
+        bucket.take(hold=False)
+
+    assert bucket.wait_time(now, hold=False) == pytest.approx(2.0)
+    assert bucket.wait_time(now + 1.0, hold=False) == pytest.approx(1.0)
+    assert bucket.wait_time(now + 2.0, hold=False) == 0
+
+
+def test_bucket_caps_concurrent_holders():
+    bucket = TokenBucket(rate=10, capacity=10, max_concurrent=1)
+    now = bucket.updated
+
+    bucket.take(hold=True)
+
+    assert bucket.wait_time(now, hold=True) > 0
+    assert bucket.wait_time(now, hold=False) == 0
+
+
+def test_penalize_pauses_only_the_throttled_keys():
+    limiter = RateLimiter()
+
+    limiter.penalize(['source:passive'], seconds=30)
+
+    assert not limiter.acquire(['source:passive'], timeout=0.05)
+    assert limiter.acquire(['source:archives'], timeout=0.05)
+    assert limiter.state()['source:passive']['paused_for'] > 29
+
+
+def test_slot_releases_concurrency_on_exit():
+    limiter = RateLimiter()
+
+    with limiter.slot(['target:example.com']):
+        assert limiter.state()['target:example.com']['active'] == 1
+
+    assert limiter.state()['target:example.com']['active'] == 0
+
+
+@pytest.mark.parametrize('domain, expected', [
+    ('example.com', 'example.com'),
+    ('a.b.example.com', 'example.com'),
+    ('shop.example.co.uk', 'example.co.uk'),
+    ('www.example.com.au', 'example.com.au'),
+    ('www.example.io', 'example.io'),
+])
+def test_registrable_domain(domain, expected):
+    assert registrable_domain(domain) == expected
+
+
+def test_target_key_groups_neighbours():
+    assert target_key('10.0.0.7') == target_key('10.0.0.200') == 'target:10.0.0.0/24'
+    assert target_key('10.0.0.0/16') == 'target:10.0.0.0/16'
+    assert target_key('2001:db8::1') == 'target:2001:db8::/64'
+    assert target_key('api.example.com') == target_key('*.example.com') == 'target:example.com'
+
+
+def test_limiter_keys_combine_sources_and_target():
+    assert limiter_keys('crt', 'example.com') == ['source:crt.sh']
+    assert limiter_keys('nmap', 'www.example.com') == ['target:example.com']
+    assert limiter_keys('shuffledns', 'example.com') == ['source:resolvers', 'target:example.com']
+    assert limiter_keys('unknown', 'example.com') == []
+
+
+def test_is_throttled():
+    assert is_throttled('HTTP 429 returned by upstream')
+    assert is_throttled('Too Many Requests')
+    assert not is_throttled('connection refused')
+    assert not is_throttled('')
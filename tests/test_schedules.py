@@ -0,0 +1,64 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from schedules import Scheduler, create_schedule, nominal_run_after, next_run_after, MIN_INTERVAL
+
+HOUR = 3600
+
+
+def at(hour, minute=0, second=0):
+    return datetime.datetime(2026, 1, 1, hour, minute, second)
+
+
+def test_runs_fall_on_the_phase_shifted_grid():
+    schedule = SimpleNamespace(interval=HOUR, phase=600)
+
+    assert nominal_run_after(schedule, at(0)) == at(0, 10)
+    assert nominal_run_after(schedule, at(5, 37)) == at(6, 10)
+
+
+def test_next_slot_is_strictly_after():
+    schedule = SimpleNamespace(interval=HOUR, phase=600)
+
+    assert nominal_run_after(schedule, at(0, 10)) == at(1, 10)
+    assert nominal_run_after(schedule, at(0, 9, 59)) == at(0, 10)
+
+
+def test_missed_slots_collapse_into_the_next_one():
+    schedule = SimpleNamespace(interval=HOUR, phase=600)
+    # A server down since 00:10 resumes on the grid, not with a backlog of runs
+    resumed = at(0, 15) + datetime.timedelta(days=1)
+
+    assert nominal_run_after(schedule, resumed) == at(1, 10) + datetime.timedelta(days=1)
+
+
+def test_jitter_delays_within_its_bound_without_moving_the_grid():
+    schedule = SimpleNamespace(interval=HOUR, phase=0, jitter=300)
+
+    for _ in range(50):
+        run_at = next_run_after(schedule, at(2, 30))
+        assert at(3) <= run_at <= at(3, 5)
+
+
+def test_create_schedule_rejects_short_intervals(session):
+    with pytest.raises(ValueError):
+        create_schedule(session, 'example.com', ['crt'], MIN_INTERVAL - 1)
+
+
+def test_claim_lets_only_one_worker_take_a_due_run(session):
+    schedule = create_schedule(session, 'example.com', ['crt'], HOUR)
+    observed = schedule.next_run_at
+    scheduler = Scheduler(scanner=None)
+
+    # Both workers read the schedule while it was due
+    other_worker_view = SimpleNamespace(id=schedule.id, next_run_at=observed)
+    later = observed + datetime.timedelta(seconds=HOUR)
+
+    assert scheduler._claim(session, schedule, later, skipped_runs=1)
+    assert not scheduler._claim(session, other_worker_view, later, skipped_runs=2)
+
+    session.refresh(schedule)
+    assert schedule.next_run_at == later
+    assert schedule.skipped_runs == 1
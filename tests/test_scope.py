@@ -0,0 +1,76 @@
+import pytest
+
+import scope
+from scope import Scope, batch_network, within_size_limit, parse_target
+
+
+def test_domain_covers_apex_and_subdomains():
+    in_scope = Scope(['example.com'])
+
+    assert in_scope.contains('example.com')
+    assert in_scope.contains('a.b.example.com')
+    assert in_scope.contains('https://api.example.com:8443/path')
+    assert not in_scope.contains('example.org')
+    assert not in_scope.contains('notexample.com')
+
+
+def test_wildcard_covers_only_subdomains():
+    in_scope = Scope(['*.example.com'])
+
+    assert in_scope.contains('www.example.com')
+    assert not in_scope.contains('example.com')
+
+
+def test_most_specific_entry_decides():
+    in_scope = Scope(['example.com', 'keep.internal.example.com'], ['internal.example.com'])
+
+    assert not in_scope.contains('internal.example.com')
+    assert not in_scope.contains('db.internal.example.com')
+    assert in_scope.contains('keep.internal.example.com')
+    assert in_scope.contains('www.example.com')
+
+
+def test_exclusion_wins_over_the_same_inclusion():
+    in_scope = Scope(['example.com', 'dev.example.com'], ['dev.example.com'])
+
+    assert not in_scope.contains('dev.example.com')
+
+
+def test_networks_use_longest_prefix():
+    in_scope = Scope(['10.0.0.0/16', '10.0.1.5'], ['10.0.1.0/24'])
+
+    assert in_scope.contains('10.0.2.1')
+    assert not in_scope.contains('10.0.1.7')
+    assert in_scope.contains('10.0.1.5:443')
+    assert not in_scope.contains('10.1.0.1')
+
+
+def test_batch_network_splits_and_skips_excluded_batches():
+    batches = dict(batch_network('10.0.0.0/22', Scope(['10.0.0.0/22'], ['10.0.1.0/24', '10.0.2.128/25'])))
+
+    assert list(batches) == ['10.0.0.0/24', '10.0.2.0/24', '10.0.3.0/24']
+    assert batches['10.0.2.0/24'] == ['10.0.2.128/25']
+    assert batches['10.0.0.0/24'] == []
+
+
+def test_batch_network_passes_small_targets_through():
+    assert list(batch_network('*.example.com')) == [('example.com', [])]
+    assert list(batch_network('192.168.1.0/28', Scope(['192.168.1.0/28'], ['192.168.1.1']))) == [
+        ('192.168.1.0/28', ['192.168.1.1/32'])
+    ]
+
+
+def test_size_limit(monkeypatch):
+    monkeypatch.setattr(scope, 'MAX_TARGET_ADDRESSES', 1024)
+
+    assert within_size_limit('10.0.0.0/22')
+    assert not within_size_limit('10.0.0.0/21')
+    assert within_size_limit('example.com')
+    with pytest.raises(ValueError):
+        list(batch_network('10.0.0.0/21'))
+
+
+def test_parse_target():
+    assert parse_target('Example.COM') == ('domain', 'example.com')
+    assert parse_target('*.example.com') == ('wildcard', 'example.com')
+    assert parse_target('not a target') == ('invalid', None)
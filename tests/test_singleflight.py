@@ -0,0 +1,131 @@
+import time
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+KEY = ('nmap', 'example.com', '-sV')
+
+
+def start_leader(flights, function):
+    """Run function as the leader on a thread and return the thread and its outcome."""
+    outcome = {}
+
+    def leader():
+        try:
+            outcome['value'] = flights.run(KEY, function)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    return thread, outcome
+
+
+def wait_for_flight(flights):
+    for _ in range(200):
+        if flights.state():
+            return
+        time.sleep(0.01)
+    raise AssertionError('leader never started its run')
+
+
+def test_followers_share_the_leader_result_and_late_ones_get_latest_progress():
+    flights = SingleFlight()
+    published = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def function(publish):
+        calls.append(1)
+        publish({'done': 1})
+        publish({'done': 2})
+        published.set()
+        release.wait(5)
+        publish({'done': 3})
+        return ['a.example.com']
+
+    thread, outcome = start_leader(flights, function)
+    published.wait(5)
+
+    # Joining after two updates replays only the latest, then follows the run
+    updates = []
+    follower = {}
+
+    def join():
+        follower['value'] = flights.run(KEY, lambda publish: pytest.fail('follower ran'), updates.append)
+
+    joiner = threading.Thread(target=join)
+    joiner.start()
+    for _ in range(200):
+        if updates:
+            break
+        time.sleep(0.01)
+
+    assert flights.state()[0]['followers'] == 1
+    release.set()
+    thread.join(5)
+    joiner.join(5)
+
+    assert calls == [1]
+    assert updates == [{'done': 2}, {'done': 3}]
+    assert outcome['value'] == (['a.example.com'], False)
+    assert follower['value'] == (['a.example.com'], True)
+    assert flights.state() == []
+
+
+def test_followers_receive_the_leader_error():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def function(publish):
+        started.set()
+        release.wait(5)
+        raise RuntimeError('nmap exploded')
+
+    thread, outcome = start_leader(flights, function)
+    started.wait(5)
+    wait_for_flight(flights)
+
+    errors = []
+
+    def join():
+        try:
+            flights.run(KEY, lambda publish: None)
+        except RuntimeError as e:
+            errors.append(e)
+
+    joiner = threading.Thread(target=join)
+    joiner.start()
+    for _ in range(200):
+        if flights.state() and flights.state()[0]['followers']:
+            break
+        time.sleep(0.01)
+    release.set()
+    thread.join(5)
+    joiner.join(5)
+
+    assert isinstance(outcome['error'], RuntimeError)
+    assert errors and errors[0] is outcome['error']
+
+
+def test_finished_runs_are_not_cached():
+    flights = SingleFlight()
+
+    assert flights.run(KEY, lambda publish: 1) == (1, False)
+    assert flights.run(KEY, lambda publish: 2) == (2, False)
+
+
+def test_failing_progress_callback_does_not_break_the_run():
+    flights = SingleFlight()
+
+    def broken(update):
+        raise ValueError('bad subscriber')
+
+    def function(publish):
+        publish('halfway')
+        return 'done'
+
+    assert flights.run(KEY, function, broken) == ('done', False)
@@ -0,0 +1,106 @@
+import datetime
+import json
+
+import pytest
+
+import storage
+from storage import store_result_data, load_result_data, compact_results, delete_unused_blobs
+
+
+@pytest.fixture
+def small_threshold(monkeypatch):
+    monkeypatch.setattr(storage, 'COMPRESSION_THRESHOLD', 64)
+
+
+@pytest.fixture
+def scan(session):
+    from models import Scan
+
+    scan = Scan(id='scan-1', target='example.com', tools='["crt"]', status='completed')
+    session.add(scan)
+    session.commit()
+    return scan
+
+
+def large_payload(prefix='host'):
+    return [f"{prefix}{index}.example.com" for index in range(50)]
+
+
+def add_result(session, scan, data):
+    from models import ScanResult
+
+    result = ScanResult(scan_id=scan.id, tool='crt', result_type='subdomains', **store_result_data(session, data))
+    session.add(result)
+    session.commit()
+    return result
+
+
+def test_small_payloads_stay_inline(session, scan):
+    columns = store_result_data(session, ['a.example.com'])
+
+    assert columns == {'data': json.dumps(['a.example.com']), 'blob_hash': None}
+
+
+def test_large_payloads_share_one_blob(session, scan, small_threshold):
+    from models import ResultBlob
+
+    first = add_result(session, scan, large_payload())
+    second = add_result(session, scan, large_payload())
+
+    assert first.blob_hash == second.blob_hash
+    assert session.query(ResultBlob).count() == 1
+    assert load_result_data(second) == large_payload()
+
+
+def test_referenced_blobs_are_kept(session, scan, small_threshold, monkeypatch):
+    monkeypatch.setattr(storage, 'BLOB_GRACE_MINUTES', -1)
+    add_result(session, scan, large_payload())
+
+    assert delete_unused_blobs(session) == 0
+
+
+def test_unreferenced_blobs_are_kept_within_the_grace_window(session, scan, small_threshold, monkeypatch):
+    from models import ResultBlob
+
+    # A blob whose result has not committed yet
+    store_result_data(session, large_payload())
+    session.commit()
+
+    assert delete_unused_blobs(session) == 0
+
+    monkeypatch.setattr(storage, 'BLOB_GRACE_MINUTES', -1)
+    assert delete_unused_blobs(session) == 1
+    assert session.query(ResultBlob).count() == 0
+
+
+def test_reuse_touches_an_old_blob(session, scan, small_threshold):
+    from models import ResultBlob
+
+    store_result_data(session, large_payload())
+    session.commit()
+    blob = session.query(ResultBlob).one()
+    blob.used_at = blob.created_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    session.commit()
+
+    # Reused by a result that has not committed when the cleanup runs
+    store_result_data(session, large_payload())
+    session.commit()
+
+    assert delete_unused_blobs(session) == 0
+
+
+def test_compact_results_moves_inline_payloads_into_blobs(session, scan, small_threshold):
+    from models import ScanResult
+
+    for _ in range(2):
+        session.add(ScanResult(scan_id=scan.id, tool='crt', result_type='subdomains',
+                               data=json.dumps(large_payload())))
+    session.commit()
+
+    stats = compact_results(session, vacuum=False)
+
+    assert stats['rows_rewritten'] == 2
+    assert stats['blobs_deleted'] == 0
+    results = session.query(ScanResult).all()
+    assert len({result.blob_hash for result in results}) == 1
+    assert all(result.data == '' and load_result_data(result) == large_payload() for result in results)
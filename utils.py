@@ -4,8 +4,15 @@ import shlex
 import logging
 import json
 import os
-from typing import List, Dict, Union, Tuple, Optional, Any
-import tempfile
+import time
+from typing import List, Dict, Union, Tuple, Optional, Any, Callable, Iterable
+from scope import is_valid_target
+from policy import tool_policy, MAX_ATTEMPTS
+from ratelimit import rate_limiter, is_throttled
+from workspace import Workspace, LineCollector
+from dnsbrute import DnsBruteForcer
+from jsscan import JsScanner
+from profiling import span
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -16,162 +23,234 @@ class ToolExecutor:
     @staticmethod
     def validate_target(target: str) -> bool:
         """
-        Validate if the target is a valid domain or IP address.
+        Validate if the target is a valid domain, wildcard domain, IP address or CIDR range.
         
         Args:
-            target: Domain or IP address to validate
+            target: Domain, IPv4/IPv6 address or CIDR range to validate
             
         Returns:
             bool: True if valid, False otherwise
         """
-        # Domain name validation - simple check
-        domain_pattern = r'^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$'
-        
-        # IP address validation
-        ip_pattern = r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$'
-        
-        if re.match(domain_pattern, target):
-            return True
-        
-        if re.match(ip_pattern, target):
-            # Check if each octet is in range 0-255
-            octets = target.split('.')
-            for octet in octets:
-                if int(octet) > 255:
-                    return False
-            return True
-            
-        return False
+        return is_valid_target(target)
 
     @staticmethod
-    def run_command(command: str, timeout: int = 300) -> Tuple[bool, str]:
+    def run_command(command: str, timeout: Optional[int] = None, tool: Optional[str] = None,
+                    salvage: bool = True, retry: bool = True) -> Tuple[bool, str]:
         """
         Run a shell command and return the output.
         
+        Transient failures are retried with backoff. When the command times
+        out, whatever it printed so far is returned as a successful result
+        instead of being discarded.
+        
         Args:
             command: Command to run
-            timeout: Command timeout in seconds
+            timeout: Command timeout in seconds, chosen by the tool policy if omitted
+            tool: Tool name used for the policy, defaults to the current tool stage
+            salvage: Return partial output when the command times out
+            retry: Retry transient failures; disable for tools writing to a
+                streamed output file, whose reader cannot take a second run
             
         Returns:
             tuple: (success (bool), output (str))
         """
-        try:
-            # Use shlex to properly handle command args
-            args = shlex.split(command)
-            
-            # Run the command with a timeout
-            result = subprocess.run(
-                args, 
-                capture_output=True, 
-                text=True, 
-                timeout=timeout
-            )
+        stage = tool_policy.current_stage()
+        target_size = stage.target_size if stage else 1
+        target = stage.target if stage else ''
+        
+        # Use shlex to properly handle command args
+        args = shlex.split(command)
+        tool = tool or (stage.tool if stage else os.path.basename(args[0]))
+        
+        if timeout is None:
+            timeout = tool_policy.timeout_for(tool, target_size)
+        
+        max_attempts = MAX_ATTEMPTS if retry else 1
+        
+        for attempt in range(1, max_attempts + 1):
+            # The stage's first launch is covered by its scheduler slot; retries
+            # and follow-up batches each need a fresh token
+            if stage and stage.launches and stage.limiter_keys:
+                rate_limiter.acquire(stage.limiter_keys)
+            if stage:
+                stage.launches += 1
             
-            if result.returncode == 0:
-                return True, result.stdout
-            else:
+            started = time.monotonic()
+            try:
+                # Run the command with a timeout
+                with span('subprocess', tool=tool, attempt=attempt):
+                    result = subprocess.run(
+                        args, 
+                        capture_output=True, 
+                        text=True, 
+                        timeout=timeout
+                    )
+                
+                duration = time.monotonic() - started
+                
+                if result.returncode == 0:
+                    tool_policy.record(tool, duration, True, target=target, target_size=target_size)
+                    # Tools that keep going after an upstream throttled them only say so on stderr
+                    if stage and stage.limiter_keys and is_throttled(result.stderr):
+                        rate_limiter.penalize(stage.limiter_keys)
+                    return True, result.stdout
+                
+                tool_policy.record(tool, duration, False, target=target, target_size=target_size)
                 logger.error(f"Command failed: {command}")
                 logger.error(f"Error: {result.stderr}")
+                
+                if stage and stage.limiter_keys and is_throttled(result.stderr or result.stdout):
+                    rate_limiter.penalize(stage.limiter_keys)
+                
+                if attempt < max_attempts and tool_policy.is_transient(result.stderr or result.stdout):
+                    delay = tool_policy.backoff(attempt)
+                    logger.warning(f"Retrying {tool} in {delay:.1f}s after transient failure (attempt {attempt})")
+                    time.sleep(delay)
+                    continue
+                
                 return False, result.stderr
+                    
+            except subprocess.TimeoutExpired as e:
+                tool_policy.record(tool, timeout, False, timed_out=True, target=target, target_size=target_size)
+                logger.error(f"Command timed out: {command}")
+                if stage:
+                    stage.last_timeout = timeout
                 
-        except subprocess.TimeoutExpired:
-            logger.error(f"Command timed out: {command}")
-            return False, f"Command timed out after {timeout} seconds"
+                # TimeoutExpired carries bytes even when text=True was requested
+                partial = e.stdout or b''
+                if isinstance(partial, bytes):
+                    partial = partial.decode('utf-8', errors='replace')
+                
+                if salvage and partial.strip():
+                    logger.warning(f"Keeping {len(partial.splitlines())} lines of partial {tool} output")
+                    if stage:
+                        stage.salvaged.append({'command': command, 'timeout': timeout})
+                    return True, partial
+                
+                return False, f"Command timed out after {timeout} seconds"
+                
+            except Exception as e:
+                logger.error(f"Error running command '{command}': {str(e)}")
+                return False, f"Error: {str(e)}"
+        
+        return False, "Command failed after retries"
+
+    @staticmethod
+    def _parse_nmap_host(host) -> Dict[str, Any]:
+        """
+        Convert an nmap XML host element into a result dict.
+        
+        Args:
+            host: ElementTree host element
+            
+        Returns:
+            dict: Host IP and ports
+        """
+        host_data = {'ip': '', 'ports': []}
+        
+        # Get IP address
+        for address in host.findall('address'):
+            if address.attrib.get('addrtype') in ('ipv4', 'ipv6'):
+                host_data['ip'] = address.attrib.get('addr', '')
+                break
+        
+        # Get ports
+        for port in host.findall('.//port'):
+            port_data = {
+                'port': port.attrib.get('portid', ''),
+                'protocol': port.attrib.get('protocol', ''),
+                'state': '',
+                'service': '',
+                'version': ''
+            }
+            
+            # Get state
+            state = port.find('state')
+            if state is not None:
+                port_data['state'] = state.attrib.get('state', '')
             
-        except Exception as e:
-            logger.error(f"Error running command '{command}': {str(e)}")
-            return False, f"Error: {str(e)}"
+            # Get service details
+            service = port.find('service')
+            if service is not None:
+                port_data['service'] = service.attrib.get('name', '')
+                port_data['version'] = service.attrib.get('product', '')
+                if 'version' in service.attrib:
+                    port_data['version'] += f" {service.attrib.get('version', '')}"
+            
+            host_data['ports'].append(port_data)
+        
+        return host_data
 
     @staticmethod
-    def run_nmap(target: str, flags: str = "-sV -sS -T4") -> Tuple[bool, List[Dict[str, Any]]]:
+    def run_nmap(target: str, flags: str = "-sV -sS -T4",
+                 exclude: Optional[List[str]] = None) -> Tuple[bool, List[Dict[str, Any]]]:
         """
         Run nmap scan against the target.
         
+        The XML report is written to a named pipe and parsed host by host
+        while nmap runs, so hosts finished before a timeout are kept.
+        
         Args:
-            target: Target domain or IP
+            target: Target domain, IP or CIDR range
             flags: Nmap flags
+            exclude: Hosts or networks to skip
             
         Returns:
             tuple: (success (bool), results (list))
         """
-        # Create temporary file for output
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xml')
-        temp_file.close()
+        import xml.etree.ElementTree as ET
         
-        command = f"nmap {flags} -oX {temp_file.name} {target}"
-        success, output = ToolExecutor.run_command(command)
+        if ':' in target and '-6' not in flags.split():
+            flags = f"{flags} -6"
+        if exclude:
+            flags = f"{flags} --exclude {','.join(exclude)}"
         
         results = []
-        if success:
-            try:
-                # Parse XML output
-                import xml.etree.ElementTree as ET
-                tree = ET.parse(temp_file.name)
-                root = tree.getroot()
-                
-                # Process hosts
-                for host in root.findall('.//host'):
-                    host_data = {'ip': '', 'ports': []}
-                    
-                    # Get IP address
-                    address = host.find('.//address')
-                    if address is not None and address.attrib.get('addrtype') == 'ipv4':
-                        host_data['ip'] = address.attrib.get('addr', '')
-                    
-                    # Get ports
-                    for port in host.findall('.//port'):
-                        port_data = {
-                            'port': port.attrib.get('portid', ''),
-                            'protocol': port.attrib.get('protocol', ''),
-                            'state': '',
-                            'service': '',
-                            'version': ''
-                        }
-                        
-                        # Get state
-                        state = port.find('state')
-                        if state is not None:
-                            port_data['state'] = state.attrib.get('state', '')
-                        
-                        # Get service details
-                        service = port.find('service')
-                        if service is not None:
-                            port_data['service'] = service.attrib.get('name', '')
-                            port_data['version'] = service.attrib.get('product', '')
-                            if 'version' in service.attrib:
-                                port_data['version'] += f" {service.attrib.get('version', '')}"
-                        
-                        host_data['ports'].append(port_data)
-                    
-                    results.append(host_data)
-                    
-            except Exception as e:
-                logger.error(f"Error parsing nmap output: {str(e)}")
-                success = False
-                results = []
-        
-        # Clean up temp file
-        try:
-            os.unlink(temp_file.name)
-        except:
-            pass
+        parser = ET.XMLPullParser(events=('end',))
+        
+        def consume(chunk: bytes) -> None:
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if element.tag == 'host':
+                    results.append(ToolExecutor._parse_nmap_host(element))
+                    element.clear()
+        
+        with Workspace('nmap') as workspace:
+            reader = workspace.stream('nmap.xml', consume)
             
-        return success, results
+            command = f"nmap {flags} -oX {workspace.file('nmap.xml')} {target}"
+            # Stdout is not the report, so salvaging it on timeout is pointless.
+            # A retry would append a second XML document to the pipe, which
+            # the parser rejects, so nmap runs once
+            success, output = ToolExecutor.run_command(command, tool='nmap', salvage=False, retry=False)
+            reader.finish()
+        
+        if reader.error is not None:
+            logger.error(f"Error parsing nmap output: {str(reader.error)}")
+            return False, []
+        
+        stage = tool_policy.current_stage()
+        if not success and results and stage and stage.last_timeout:
+            logger.warning(f"Keeping {len(results)} hosts from timed out nmap scan of {target}")
+            stage.salvaged.append({'command': command, 'timeout': stage.last_timeout})
+            success = True
+        
+        return success, results if success else []
 
     @staticmethod
-    def run_amass(target: str, timeout: int = 600) -> Tuple[bool, List[str]]:
+    def run_amass(target: str, timeout: Optional[int] = None) -> Tuple[bool, List[str]]:
         """
         Run Amass for subdomain enumeration.
         
         Args:
             target: Target domain
-            timeout: Command timeout in seconds
+            timeout: Command timeout in seconds, chosen by the tool policy if omitted
             
         Returns:
             tuple: (success (bool), subdomains (list))
         """
         command = f"amass enum -d {target}"
-        success, output = ToolExecutor.run_command(command, timeout)
+        success, output = ToolExecutor.run_command(command, timeout, tool='amass')
         
         if success:
             # Parse output for subdomains
@@ -196,24 +275,21 @@ class ToolExecutor:
         Returns:
             tuple: (success (bool), subdomains (list))
         """
-        command = f"sublist3r -d {target} -o sublist3r_output.txt"
-        success, output = ToolExecutor.run_command(command)
+        collector = LineCollector()
+        
+        with Workspace('sublist3r') as workspace:
+            reader = workspace.stream('subdomains.txt', collector)
+            
+            command = f"sublist3r -d {target} -o {workspace.file('subdomains.txt')}"
+            success, output = ToolExecutor.run_command(command, tool='sublist3r', retry=False)
+            reader.finish()
         
         if success:
-            subdomains = []
+            subdomains = collector.close()
             
-            try:
-                # Try to read from the output file
-                with open("sublist3r_output.txt", "r") as f:
-                    for line in f:
-                        subdomain = line.strip()
-                        if subdomain:
-                            subdomains.append(subdomain)
-                
-                # Delete the temporary file
-                os.remove("sublist3r_output.txt")
-            except:
-                # If we can't read the file, parse from the output
+            if reader.error is not None or not subdomains:
+                # If we can't read the output file, parse from the output
+                subdomains = []
                 for line in output.splitlines():
                     if target in line and not line.startswith('['):
                         subdomain = line.strip()
@@ -236,7 +312,7 @@ class ToolExecutor:
             tuple: (success (bool), subdomains (list))
         """
         command = f"assetfinder --subs-only {target}"
-        success, output = ToolExecutor.run_command(command)
+        success, output = ToolExecutor.run_command(command, tool='assetfinder')
         
         if success:
             # Parse output for subdomains
@@ -261,7 +337,7 @@ class ToolExecutor:
             tuple: (success (bool), urls (list))
         """
         command = f"gau {target}"
-        success, output = ToolExecutor.run_command(command)
+        success, output = ToolExecutor.run_command(command, tool='gau')
         
         if success:
             # Parse output for URLs
@@ -285,9 +361,10 @@ class ToolExecutor:
         Returns:
             tuple: (success (bool), subdomains (list))
         """
-        # Using curl to access crt.sh website
-        command = f"curl -s 'https://crt.sh/?q=%25.{target}&output=json'"
-        success, output = ToolExecutor.run_command(command)
+        # Using curl to access crt.sh website; -f turns HTTP errors such as
+        # 429 into a failed run whose stderr reports the status code
+        command = f"curl -sSf 'https://crt.sh/?q=%25.{target}&output=json'"
+        success, output = ToolExecutor.run_command(command, tool='crt')
         
         if success:
             try:
@@ -323,7 +400,7 @@ class ToolExecutor:
             tuple: (success (bool), subdomains (list))
         """
         command = f"subfinder -d {target}"
-        success, output = ToolExecutor.run_command(command)
+        success, output = ToolExecutor.run_command(command, tool='subfinder')
         
         if success:
             # Parse output for subdomains
@@ -337,57 +414,25 @@ class ToolExecutor:
             return False, []
 
     @staticmethod
-    def run_shuffledns(target: str) -> Tuple[bool, List[str]]:
+    def run_shuffledns(target: str, wordlist: Optional[str] = None, workers: Optional[int] = None,
+                       progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[bool, List[str]]:
         """
         Run ShuffleDNS for subdomain enumeration.
         
+        The wordlist is deduplicated and cached, split into shards and
+        brute-forced by parallel shuffledns processes using the resolvers
+        that currently score best on latency and error rate.
+        
         Args:
             target: Target domain
+            wordlist: Wordlist path, defaults to the SecLists top 5000
+            workers: Number of parallel shards
+            progress: Callback receiving per-shard progress
             
         Returns:
             tuple: (success (bool), subdomains (list))
         """
-        # Create temporary files for output and wordlist
-        temp_output = tempfile.NamedTemporaryFile(delete=False)
-        temp_output.close()
-        
-        # Check if the resolvers file exists, if not create it
-        resolvers_file = "resolvers.txt"
-        if not os.path.exists(resolvers_file):
-            with open(resolvers_file, "w") as f:
-                f.write("1.1.1.1\n8.8.8.8\n9.9.9.9\n208.67.222.222")
-        
-        # Check if we have a wordlist, if not use a simple example
-        wordlist_file = "/usr/share/wordlists/seclists/Discovery/DNS/subdomains-top1million-5000.txt"
-        if not os.path.exists(wordlist_file):
-            wordlist_file = "wordlist.txt"
-            if not os.path.exists(wordlist_file):
-                with open(wordlist_file, "w") as f:
-                    f.write("www\nadmin\nmail\nblog\ndev\ntest\nstaging")
-        
-        command = f"shuffledns -d {target} -w {wordlist_file} -r {resolvers_file} -o {temp_output.name}"
-        success, output = ToolExecutor.run_command(command)
-        
-        subdomains = []
-        if success:
-            try:
-                # Read subdomains from the output file
-                with open(temp_output.name, "r") as f:
-                    for line in f:
-                        subdomain = line.strip()
-                        if subdomain:
-                            subdomains.append(subdomain)
-            except Exception as e:
-                logger.error(f"Error reading ShuffleDNS output: {str(e)}")
-                success = False
-        
-        # Clean up temp files
-        try:
-            os.unlink(temp_output.name)
-        except:
-            pass
-            
-        return success, subdomains
+        return DnsBruteForcer(target, wordlist, workers, progress).run()
 
     @staticmethod
     def run_gospider(target: str) -> Tuple[bool, List[str]]:
@@ -405,7 +450,7 @@ class ToolExecutor:
             target = f"https://{target}"
             
         command = f"gospider -s {target} -d 2 -c 5 -t 5"
-        success, output = ToolExecutor.run_command(command)
+        success, output = ToolExecutor.run_command(command, tool='gospider')
         
         if success:
             # Parse output for URLs
@@ -420,49 +465,20 @@ class ToolExecutor:
             return False, []
 
     @staticmethod
-    def run_subdomainizer(target: str) -> Tuple[bool, List[str]]:
+    def run_subdomainizer(target: str, urls: Iterable[str] = ()) -> Tuple[bool, List[Dict[str, str]]]:
         """
-        Run Subdomainizer to find subdomains and secrets.
+        Scan JavaScript files for subdomains, endpoints and secrets.
+        
+        JavaScript URLs among the given URLs are fetched concurrently and
+        matched in a single pass; files whose content was scanned before
+        reuse the cached findings. Without any, the scripts referenced by
+        the target's landing page are scanned.
         
         Args:
             target: Target domain
+            urls: URLs already discovered, e.g. by gau and gospider
             
         Returns:
             tuple: (success (bool), findings (list))
         """
-        # Ensure the target has http/https prefix
-        if not target.startswith(('http://', 'https://')):
-            target = f"https://{target}"
-            
-        command = f"python3 SubDomainizer.py -u {target}"
-        success, output = ToolExecutor.run_command(command)
-        
-        if success:
-            # Parse output for findings
-            findings = []
-            
-            current_section = None
-            for line in output.splitlines():
-                line = line.strip()
-                
-                if "Subdomain Discovery Started" in line:
-                    current_section = "subdomains"
-                    continue
-                elif "Domain Discovery Completed" in line:
-                    current_section = None
-                    continue
-                elif "Scanning for secrets" in line:
-                    current_section = "secrets"
-                    continue
-                elif "Scanning for secrets completed" in line:
-                    current_section = None
-                    continue
-                
-                if current_section == "subdomains" and line and not line.startswith(("[+]", "[*]")):
-                    findings.append({"type": "subdomain", "value": line})
-                elif current_section == "secrets" and "Found" in line:
-                    findings.append({"type": "secret", "value": line})
-            
-            return True, findings
-        else:
-            return False, []
+        return JsScanner(target, urls).run()
@@ -0,0 +1,217 @@
+import os
+import stat
+import errno
+import select
+import shutil
+import logging
+import tempfile
+import threading
+from typing import Callable, List, Optional
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# Preferred parent directories for workspaces, memory backed first
+WORKSPACE_ROOTS = [os.environ.get("RECON_WORKSPACE_ROOT"), '/dev/shm', None]
+
+READ_SIZE = 65536
+POLL_INTERVAL = 0.1
+READER_TIMEOUT = 5.0  # Seconds to wait for a reader to drain its pipe
+
+
+def _workspace_root() -> Optional[str]:
+    for root in WORKSPACE_ROOTS:
+        if root is None:
+            return None
+        if os.path.isdir(root) and os.access(root, os.W_OK | os.X_OK):
+            return root
+    return None
+
+
+class FifoReader(threading.Thread):
+    """
+    Thread that drains a named pipe while the tool writing to it runs.
+
+    The pipe is opened non-blocking so a tool that never opens its output
+    file cannot hang the reader. End of file only ends the read loop once
+    finish() has been called, because tools may open and close the output
+    several times.
+    """
+
+    def __init__(self, path: str, consume: Callable[[bytes], None]):
+        """
+        Initialize the FifoReader.
+
+        Args:
+            path: Path of the named pipe
+            consume: Callback receiving each chunk read from the pipe
+        """
+        super().__init__(daemon=True)
+        self.path = path
+        self.consume = consume
+        self.error = None
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        try:
+            while True:
+                readable, _, _ = select.select([fd], [], [], POLL_INTERVAL)
+                if not readable:
+                    if self._done.is_set():
+                        break
+                    continue
+
+                try:
+                    chunk = os.read(fd, READ_SIZE)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        continue
+                    raise
+
+                if chunk:
+                    self.consume(chunk)
+                elif self._done.is_set():
+                    break
+                else:
+                    # No writer connected; wait instead of spinning on EOF
+                    self._done.wait(POLL_INTERVAL)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error reading tool output from {self.path}: {str(e)}")
+        finally:
+            os.close(fd)
+
+    def finish(self, timeout: float = READER_TIMEOUT) -> None:
+        """
+        Stop reading once the pipe is drained.
+
+        Args:
+            timeout: Maximum seconds to wait for the reader
+        """
+        self._done.set()
+        self.join(timeout)
+
+
+class FileReader:
+    """Fallback for platforms without named pipes: read the file at the end."""
+
+    def __init__(self, path: str, consume: Callable[[bytes], None]):
+        self.path = path
+        self.consume = consume
+        self.error = None
+        self._done = False
+
+    def start(self) -> None:
+        pass
+
+    def finish(self, timeout: float = READER_TIMEOUT) -> None:
+        if self._done:
+            return
+        self._done = True
+        try:
+            with open(self.path, 'rb') as f:
+                while True:
+                    chunk = f.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    self.consume(chunk)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error reading tool output from {self.path}: {str(e)}")
+
+
+class LineCollector:
+    """Split streamed bytes into stripped, non-empty lines."""
+
+    def __init__(self):
+        self.lines = []
+        self._buffer = b''
+
+    def __call__(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        *complete, self._buffer = self._buffer.split(b'\n')
+        for line in complete:
+            self._add(line)
+
+    def _add(self, line: bytes) -> None:
+        line = line.decode('utf-8', errors='replace').strip()
+        if line:
+            self.lines.append(line)
+
+    def close(self) -> List[str]:
+        """Flush the last unterminated line and return every line."""
+        if self._buffer:
+            self._add(self._buffer)
+            self._buffer = b''
+        return self.lines
+
+
+class Workspace:
+    """Private directory for a single tool run, on tmpfs when available."""
+
+    def __init__(self, tool: str):
+        """
+        Initialize the Workspace.
+
+        Args:
+            tool: Tool name, used as the directory prefix
+        """
+        self.tool = tool
+        self.path = None
+        self._readers = []
+
+    def __enter__(self) -> 'Workspace':
+        self.path = tempfile.mkdtemp(prefix=f"recon-{self.tool}-", dir=_workspace_root())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Readers still consuming would lose the end of their output if the
+        # directory went away underneath them
+        for reader in self._readers:
+            reader.finish(timeout=READER_TIMEOUT)
+            if isinstance(reader, FifoReader) and reader.is_alive():
+                logger.warning(f"Reader for {reader.path} still running after {READER_TIMEOUT}s")
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def file(self, name: str, content: Optional[str] = None) -> str:
+        """
+        Get the path of a file in the workspace, optionally writing it.
+
+        Args:
+            name: File name
+            content: Text to write
+
+        Returns:
+            str: Absolute path
+        """
+        path = os.path.join(self.path, name)
+        if content is not None:
+            with open(path, 'w') as f:
+                f.write(content)
+        return path
+
+    def stream(self, name: str, consume: Callable[[bytes], None]):
+        """
+        Create an output path whose contents are handed to consume as they are written.
+
+        Args:
+            name: File name passed to the tool as its output file
+            consume: Callback receiving each chunk of output
+
+        Returns:
+            FifoReader or FileReader: Started reader; call finish() after the tool exits
+        """
+        path = os.path.join(self.path, name)
+
+        if hasattr(os, 'mkfifo'):
+            os.mkfifo(path, stat.S_IRUSR | stat.S_IWUSR)
+            reader = FifoReader(path, consume)
+        else:
+            reader = FileReader(path, consume)
+
+        reader.start()
+        self._readers.append(reader)
+        return reader